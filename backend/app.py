@@ -1,14 +1,33 @@
+import os
+import time
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from backend.database import init_db
-from backend.routers import upload, subscriptions, insights
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from backend.database import init_db, load_models
+from backend.middleware.compression import CompressionMiddleware
+from backend.middleware.metrics import MetricsMiddleware
+from backend.middleware.readiness import ReadinessGateMiddleware
+from backend.utils.metrics import REGISTRY, STARTUP_SECONDS, WORKER_READY
+from backend.utils.warmup import warm_caches
+from backend.routers import upload, subscriptions, insights, profiles, events
+
+# Wall-clock launch time; backend.server sets it before spawning workers so
+# time-to-ready includes process start and imports
+LAUNCH_TIME = float(os.environ.get("SUBSMART_LAUNCH_TIME", time.time()))
 
 # Create FastAPI app
 app = FastAPI(
     title="SubSmart API",
     description="Fintech Subscription Tracker API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
+app.state.ready = False
+app.state.warmup_error = None
+
+# Cold workers answer 503 (except /health, /ready, /metrics)
+app.add_middleware(ReadinessGateMiddleware, is_ready=lambda: app.state.ready)
 
 # Configure CORS
 app.add_middleware(
@@ -17,20 +36,74 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Profile-Id"],
 )
 
+# Compress JSON payloads over 1 KB (brotli when available, else gzip)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Per-route latency histograms, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(upload.router)
 app.include_router(subscriptions.router)
 app.include_router(insights.router)
+app.include_router(profiles.router)
+app.include_router(events.router)
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup"""
-    init_db()
-    print("✅ Database initialized")
-    print("🚀 SubSmart API is running")
+    """
+    Initialize the database and warm caches before accepting traffic
+    
+    Uvicorn only starts accepting connections once this hook returns, so
+    requests on the shared socket go to workers that are already warm.
+    """
+    start = time.perf_counter()
+    # backend.server migrates once before forking workers
+    if os.environ.get("SUBSMART_SKIP_INIT_DB"):
+        load_models()
+    else:
+        init_db()
+        print("✅ Database initialized")
+    STARTUP_SECONDS.set(time.perf_counter() - start, phase="init_db")
+
+    await run_in_threadpool(warm_up)
+
+
+def warm_up():
+    """
+    Warm this worker's caches and mark it ready
+
+    A failed warmup leaves the worker running but not ready, so the
+    readiness gate keeps answering 503 instead of serving cold.
+    """
+    start = time.perf_counter()
+    try:
+        warmed = warm_caches()
+    except Exception as e:
+        app.state.warmup_error = str(e)
+        print(f"❌ Warmup failed (pid {os.getpid()}): {e}")
+        return
+    STARTUP_SECONDS.set(time.perf_counter() - start, phase="warmup")
+
+    app.state.ready = True
+    WORKER_READY.set(1)
+    ready_after = time.time() - LAUNCH_TIME
+    STARTUP_SECONDS.set(ready_after, phase="total")
+    print(
+        f"🚀 SubSmart API is ready in {ready_after:.2f}s "
+        f"(pid {os.getpid()}, {warmed['descriptions']} descriptors warmed)"
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Mark the worker as no longer ready"""
+    app.state.ready = False
+    WORKER_READY.set(0)
 
 
 @app.get("/")
@@ -43,6 +116,8 @@ def root():
             "upload": "/api/upload",
             "subscriptions": "/api/subscriptions",
             "insights": "/api/insights",
+            "events": "/api/events",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -50,10 +125,30 @@ def root():
 
 @app.get("/health")
 def health_check():
-    """Health check endpoint"""
+    """Liveness check: the process is up and serving"""
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness check: the worker has finished startup and warmup"""
+    if app.state.warmup_error:
+        return ORJSONResponse({"status": "warmup failed", "error": app.state.warmup_error}, status_code=503)
+    if not app.state.ready:
+        return ORJSONResponse({"status": "warming up"}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus metrics endpoint"""
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 if __name__ == "__main__":
+    # Development server; use `python -m backend.server` in production
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("backend.app:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,139 @@
+"""
+Detection accuracy and speed evaluation
+
+Runs every detector implementation over the same labeled synthetic
+histories and reports precision, recall (overall and per frequency) and
+throughput, so a change to detection can be checked for both speed and
+unchanged results. A detection counts as correct when both the merchant
+and the frequency match a label.
+
+Usage:
+    python -m backend.benchmarks.detection_eval --rows 200000 --users 200
+    python -m backend.benchmarks.detection_eval --detector records --output eval.json
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Set, Tuple
+from backend.benchmarks.synthetic import generate_dataset
+from backend.utils.detect_recurring import detect_recurring_subscriptions, normalize_merchant
+
+
+def _prepare_records(transactions: List[Dict]):
+    return transactions
+
+
+def _prepare_snapshot(transactions: List[Dict]):
+    # Imported lazily: snapshots needs NumPy
+    from backend.utils.snapshots import Snapshot
+    return Snapshot.from_transactions(transactions)
+
+
+def _detect_snapshot(snapshot) -> List[Dict]:
+    from backend.utils.snapshots import detect_from_snapshot
+    return detect_from_snapshot(snapshot)
+
+
+# name -> (prepare, detect). prepare converts a user's transactions into the
+# detector's input and is not timed (snapshots are built at upload time).
+DETECTORS: Dict[str, Tuple[Callable, Callable[..., List[Dict]]]] = {
+    'records': (_prepare_records, detect_recurring_subscriptions),
+    'snapshot': (_prepare_snapshot, _detect_snapshot),
+}
+
+
+def _ratio(numerator: int, denominator: int):
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def evaluate(detector: str, rows: int, users: int, seed: int) -> Dict:
+    """
+    Evaluate one detector over a synthetic dataset
+
+    Args:
+        detector: Key in DETECTORS
+        rows: Total transactions
+        users: Number of users
+        seed: Random seed
+
+    Returns:
+        Dictionary with counts, precision, recall, per-frequency recall
+        and throughput
+    """
+    prepare, detect = DETECTORS[detector]
+    true_positive = false_positive = false_negative = 0
+    labeled = Counter()
+    found = Counter()
+    seconds = 0.0
+    total_rows = 0
+
+    for _, transactions, labels in generate_dataset(rows, users, seed):
+        prepared = prepare(transactions)
+        start = time.perf_counter()
+        detected = detect(prepared)
+        seconds += time.perf_counter() - start
+        total_rows += len(transactions)
+
+        got: Set[Tuple[str, str]] = {
+            (normalize_merchant(sub['merchant_name']), sub['frequency']) for sub in detected
+        }
+        want = {(label['merchant_key'], label['frequency']) for label in labels}
+        true_positive += len(got & want)
+        false_positive += len(got - want)
+        false_negative += len(want - got)
+        labeled.update(frequency for _, frequency in want)
+        found.update(frequency for _, frequency in got & want)
+
+    return {
+        'detector': detector,
+        'true_positive': true_positive,
+        'false_positive': false_positive,
+        'false_negative': false_negative,
+        'precision': _ratio(true_positive, true_positive + false_positive),
+        'recall': _ratio(true_positive, true_positive + false_negative),
+        'recall_by_frequency': {
+            frequency: _ratio(found[frequency], count)
+            for frequency, count in sorted(labeled.items())
+        },
+        'seconds': round(seconds, 6),
+        'rows_per_second': round(total_rows / seconds, 1) if seconds else None,
+    }
+
+
+def report(results: List[Dict]) -> List[str]:
+    """Format evaluation results as a table"""
+    lines = [f"{'detector':<10} {'precision':>9} {'recall':>7} {'fp':>5} {'fn':>5} {'rows/s':>12}"]
+    for result in results:
+        lines.append(
+            f"{result['detector']:<10} {result['precision'] or 0:>9.4f} {result['recall'] or 0:>7.4f} "
+            f"{result['false_positive']:>5} {result['false_negative']:>5} {result['rows_per_second'] or 0:>12,.0f}"
+        )
+    for result in results:
+        recall = ', '.join(f"{freq} {value}" for freq, value in result['recall_by_frequency'].items())
+        lines.append(f"{result['detector']} recall by frequency: {recall}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--detector', action='append', choices=sorted(DETECTORS),
+                        help='Detector to evaluate (repeatable; default all)')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    results = [
+        evaluate(detector, args.rows, args.users, args.seed)
+        for detector in args.detector or DETECTORS
+    ]
+    print('\n'.join(report(results)))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(results, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
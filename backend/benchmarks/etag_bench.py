@@ -0,0 +1,106 @@
+"""
+Measure bytes and CPU saved by conditional GETs on the read endpoints
+
+Seeds a temporary database, then fetches each endpoint repeatedly with and
+without If-None-Match and reports response bytes and server CPU time per
+request.
+
+Usage:
+    python -m backend.benchmarks.etag_bench [--transactions N] [--requests N]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from backend.benchmarks.harness import scratch_app
+from backend.models.transaction import Transaction
+from backend.models.subscription import Subscription
+
+
+ENDPOINTS = [
+    "/api/subscriptions?user_id=1",
+    "/api/insights?user_id=1",
+    "/api/transactions?user_id=1&limit=1000",
+]
+
+
+def seed(session_factory, transaction_count: int) -> None:
+    """Fill the database with transactions and subscriptions for user 1"""
+    rng = random.Random(42)
+    merchants = [f"Merchant {i}" for i in range(50)]
+    start = date(2023, 1, 1)
+    
+    db = session_factory()
+    db.add_all([
+        Transaction(
+            date=start + timedelta(days=rng.randrange(700)),
+            description=rng.choice(merchants),
+            amount=round(rng.uniform(1, 100), 2),
+            user_id=1
+        )
+        for _ in range(transaction_count)
+    ])
+    db.add_all([
+        Subscription(
+            merchant_name=name,
+            amount=round(rng.uniform(5, 50), 2),
+            frequency=rng.choice(["monthly", "yearly", "weekly"]),
+            start_date=start,
+            next_billing_date=date.today() + timedelta(days=rng.randrange(40)),
+            user_id=1
+        )
+        for name in merchants
+    ])
+    db.commit()
+    db.close()
+
+
+def measure(client: TestClient, url: str, requests: int, etag: str = None) -> dict:
+    """Fetch url repeatedly and return bytes and CPU time per request"""
+    headers = {"If-None-Match": etag} if etag else {}
+    total_bytes = 0
+    status = None
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    
+    for _ in range(requests):
+        response = client.get(url, headers=headers)
+        total_bytes += len(response.content)
+        status = response.status_code
+    
+    return {
+        "status": status,
+        "bytes_per_request": total_bytes / requests,
+        "cpu_ms_per_request": (time.process_time() - cpu_start) * 1000 / requests,
+        "wall_ms_per_request": (time.perf_counter() - wall_start) * 1000 / requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transactions", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    
+    with scratch_app() as (client, session_factory):
+        seed(session_factory, args.transactions)
+        
+        print(f"{'endpoint':<42} {'mode':<6} {'status':>6} {'bytes/req':>10} {'cpu ms':>8} {'wall ms':>8}")
+        for url in ENDPOINTS:
+            etag = client.get(url).headers["etag"]
+            full = measure(client, url, args.requests)
+            cached = measure(client, url, args.requests, etag)
+            for mode, result in (("full", full), ("304", cached)):
+                print(
+                    f"{url:<42} {mode:<6} {result['status']:>6} "
+                    f"{result['bytes_per_request']:>10.0f} "
+                    f"{result['cpu_ms_per_request']:>8.2f} "
+                    f"{result['wall_ms_per_request']:>8.2f}"
+                )
+            saved = 1 - cached["cpu_ms_per_request"] / full["cpu_ms_per_request"]
+            print(f"{'':<42} saved {full['bytes_per_request'] - cached['bytes_per_request']:.0f} bytes, {saved:.0%} CPU per request")
+
+
+if __name__ == "__main__":
+    main()
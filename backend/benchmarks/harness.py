@@ -0,0 +1,41 @@
+"""Shared helpers for benchmarks that exercise the API against a scratch database"""
+import os
+import tempfile
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.app import app
+from backend.database import Base, get_db
+from backend.models import user, transaction, subscription, data_version
+
+
+@contextmanager
+def scratch_app():
+    """
+    Run the app against a temporary SQLite database
+    
+    Yields:
+        Tuple of (TestClient, session factory)
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            yield TestClient(app), session_factory
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            engine.dispose()
@@ -0,0 +1,128 @@
+"""
+Benchmark multi-plan separation on merchants with many interleaved plans
+
+Builds one merchant (an app store) billing many concurrent plans at
+different prices and cadences, some with a price change halfway, plus
+one-off purchases. Measures amount clustering alone, single-group
+analysis (the detector before plan separation) and plan-aware analysis,
+and how many plans each recovers.
+
+Usage:
+    python -m backend.benchmarks.plan_split_bench [--plans N] [--years N] [--repeat N]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+from backend.utils.amount_clusters import split_plans
+from backend.utils.detect_recurring import analyze_merchant, analyze_merchant_plans
+from backend.utils.txn_record import TxnRecord
+
+MERCHANT = "app store"
+CADENCES = (("weekly", 7), ("bi-weekly", 14), ("monthly", 30))
+
+# Plans are priced this factor apart; a price change raises a plan by
+# PRICE_STEP, still short of the next plan's price
+PRICE_FACTOR = 1.4
+PRICE_STEP = 1.2
+
+
+def generate_merchant(
+    plans: int,
+    years: int,
+    one_off_share: float = 0.02,
+    seed: int = 0
+) -> Tuple[List[TxnRecord], List[Dict]]:
+    """
+    Charges of one merchant billing many plans
+
+    Args:
+        plans: Concurrent plans
+        years: Length of the history
+        one_off_share: One-off purchases per plan charge
+        seed: Random seed
+
+    Returns:
+        Tuple of (date-sorted charges, plan labels with frequency and
+        final amount)
+    """
+    rng = random.Random(seed)
+    start = date(2000, 1, 1)
+    end = start + timedelta(days=365 * years)
+    charges: List[TxnRecord] = []
+    labels: List[Dict] = []
+    for index in range(plans):
+        frequency, cycle = CADENCES[index % len(CADENCES)]
+        amount = round(0.99 * PRICE_FACTOR ** index, 2)
+        change = start + (end - start) / 2 if index % 3 == 0 else None
+        current = start + timedelta(days=rng.randrange(cycle))
+        price = amount
+        while current <= end:
+            if change and current >= change:
+                price = round(amount * PRICE_STEP, 2)
+            charges.append(TxnRecord(
+                current + timedelta(days=rng.randint(-1, 1)),
+                MERCHANT,
+                round(price * rng.uniform(0.99, 1.01), 2)
+            ))
+            current += timedelta(days=cycle)
+        labels.append({"frequency": frequency, "amount": price})
+
+    span = (end - start).days
+    for _ in range(int(len(charges) * one_off_share)):
+        charges.append(TxnRecord(
+            start + timedelta(days=rng.randrange(span)),
+            MERCHANT,
+            round(rng.lognormvariate(2, 1.5), 2)
+        ))
+    charges.sort(key=lambda r: r.date)
+    return charges, labels
+
+
+def recovered(detected: List[Dict], labels: List[Dict]) -> int:
+    """Plans matched by a detected subscription of the same frequency and price"""
+    remaining = list(detected)
+    count = 0
+    for label in labels:
+        for sub in remaining:
+            if sub["frequency"] == label["frequency"] and abs(sub["amount"] - label["amount"]) <= 0.03 * label["amount"]:
+                remaining.remove(sub)
+                count += 1
+                break
+    return count
+
+
+def best_of(repeat: int, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plans", type=int, default=16)
+    parser.add_argument("--years", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    charges, labels = generate_merchant(args.plans, args.years, seed=args.seed)
+    print(f"{len(charges)} charges, {len(labels)} plans")
+
+    elapsed, plans = best_of(args.repeat, lambda: split_plans(charges))
+    print(f"  {'split_plans':<22} {elapsed * 1000:8.1f} ms  {len(plans)} plans")
+
+    elapsed, whole = best_of(args.repeat, lambda: analyze_merchant(MERCHANT, charges))
+    whole = [whole] if whole else []
+    print(f"  {'single group':<22} {elapsed * 1000:8.1f} ms  {recovered(whole, labels)}/{len(labels)} recovered, {len(whole)} detected")
+
+    elapsed, found = best_of(args.repeat, lambda: analyze_merchant_plans(MERCHANT, charges))
+    print(f"  {'plan separation':<22} {elapsed * 1000:8.1f} ms  {recovered(found, labels)}/{len(labels)} recovered, {len(found)} detected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare the ORM and column-projected read paths feeding detection
+
+Seeds a scratch database with synthetic transactions for one user, then
+measures time and peak memory for loading them as ORM objects copied into
+dicts (the old detect path) versus selecting (date, description, amount)
+tuples streamed into TxnRecords.
+
+Usage:
+    python -m backend.benchmarks.read_path_bench [--rows N]
+"""
+import argparse
+import time
+import tracemalloc
+from backend.benchmarks.harness import scratch_app
+from backend.benchmarks.synthetic import generate_dataset
+from backend.models.transaction import Transaction
+from backend.utils.detect_recurring import detect_recurring_subscriptions, detect_recurring_records
+from backend.utils.txn_record import TxnRecord
+
+
+def orm_path(db):
+    transactions = db.query(Transaction).filter(Transaction.user_id == 1).all()
+    txn_list = [
+        {'date': t.date, 'description': t.description, 'amount': t.amount}
+        for t in transactions
+    ]
+    return detect_recurring_subscriptions(txn_list)
+
+
+def lean_path(db):
+    rows = db.query(
+        Transaction.date, Transaction.description, Transaction.amount
+    ).filter(Transaction.user_id == 1).yield_per(5000)
+    return detect_recurring_records([TxnRecord(d, desc, a) for d, desc, a in rows])
+
+
+def measure(session_factory, path):
+    db = session_factory()
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = path(db)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak, len(result)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+    
+    with scratch_app() as (_, session_factory):
+        _, transactions, _ = next(generate_dataset(args.rows, 1, seed=3))
+        db = session_factory()
+        db.bulk_insert_mappings(Transaction, [dict(t, user_id=1) for t in transactions])
+        db.commit()
+        db.close()
+        
+        print(f"{args.rows} rows")
+        for name, path in (("orm + dicts", orm_path), ("columns + records", lean_path)):
+            elapsed, peak, detected = measure(session_factory, path)
+            print(f"  {name:<18} {elapsed * 1000:8.1f} ms  peak {peak / 2**20:7.1f} MiB  {detected} detected")
+
+
+if __name__ == "__main__":
+    main()
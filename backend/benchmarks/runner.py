@@ -0,0 +1,183 @@
+"""
+End-to-end benchmark runner
+
+Generates a seeded synthetic dataset and times the main pipeline stages:
+parse_csv, detect_recurring_subscriptions, the upload endpoint and the
+insights endpoint. Results are written as JSON so runs from different
+versions can be compared.
+
+Usage:
+    python -m backend.benchmarks.runner run --rows 100000 --users 100 --output before.json
+    python -m backend.benchmarks.runner compare before.json after.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+from backend.benchmarks.synthetic import generate_dataset, to_csv
+from backend.utils.detect_recurring import detect_recurring_subscriptions
+from backend.utils.parser import parse_csv
+
+RESULTS_VERSION = 1
+
+
+class Stage:
+    """Accumulates wall time and row counts for one pipeline stage"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.rows = 0
+        self.calls = 0
+
+    def add(self, seconds: float, rows: int) -> None:
+        self.seconds += seconds
+        self.rows += rows
+        self.calls += 1
+
+    def to_dict(self) -> Dict:
+        return {
+            'seconds': round(self.seconds, 6),
+            'rows': self.rows,
+            'calls': self.calls,
+            'rows_per_second': round(self.rows / self.seconds, 1) if self.seconds else None,
+            'ms_per_call': round(self.seconds * 1000 / self.calls, 3) if self.calls else None,
+        }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def run(rows: int, users: int, seed: int, endpoint_users: int) -> Dict:
+    """
+    Run all stages over a synthetic dataset
+
+    Args:
+        rows: Total transactions
+        users: Number of users
+        seed: Random seed
+        endpoint_users: How many users to push through the HTTP endpoints
+
+    Returns:
+        Results dictionary
+    """
+    stages = {name: Stage() for name in ('parse_csv', 'detect', 'upload', 'insights')}
+    uploads: List = []
+
+    for user_id, transactions, _ in generate_dataset(rows, users, seed):
+        content = to_csv(transactions, seed=seed + user_id)
+
+        start = time.perf_counter()
+        parsed = parse_csv(content)
+        stages['parse_csv'].add(time.perf_counter() - start, len(parsed))
+
+        start = time.perf_counter()
+        detect_recurring_subscriptions(parsed)
+        stages['detect'].add(time.perf_counter() - start, len(parsed))
+
+        if len(uploads) < endpoint_users:
+            uploads.append((user_id, content, len(parsed)))
+
+    if uploads:
+        # Imported lazily so the pure-algorithm stages run without the app
+        from backend.benchmarks.harness import scratch_app
+
+        with scratch_app() as (client, _):
+            for user_id, content, parsed_count in uploads:
+                start = time.perf_counter()
+                response = client.post(
+                    f'/api/upload?user_id={user_id}',
+                    files={'file': ('statement.csv', content.encode(), 'text/csv')}
+                )
+                stages['upload'].add(time.perf_counter() - start, parsed_count)
+                response.raise_for_status()
+
+                client.post(f'/api/subscriptions/detect?user_id={user_id}')
+
+                start = time.perf_counter()
+                response = client.get(f'/api/insights?user_id={user_id}')
+                stages['insights'].add(time.perf_counter() - start, 1)
+                response.raise_for_status()
+
+    return {
+        'version': RESULTS_VERSION,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_revision': _git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'params': {
+            'rows': rows,
+            'users': users,
+            'seed': seed,
+            'endpoint_users': endpoint_users,
+        },
+        'stages': {name: stage.to_dict() for name, stage in stages.items()},
+    }
+
+
+def compare(baseline: Dict, candidate: Dict) -> List[str]:
+    """
+    Compare two result files stage by stage
+
+    Returns:
+        Report lines; ratios above 1.0 mean the candidate is slower
+    """
+    lines = []
+    if baseline.get('params') != candidate.get('params'):
+        lines.append('warning: runs used different parameters')
+    lines.append(f"{'stage':<10} {'baseline s':>11} {'candidate s':>12} {'ratio':>7}")
+    for name, base in baseline['stages'].items():
+        other = candidate['stages'].get(name)
+        if not other or not base['seconds']:
+            continue
+        ratio = other['seconds'] / base['seconds']
+        lines.append(f"{name:<10} {base['seconds']:>11.3f} {other['seconds']:>12.3f} {ratio:>7.2f}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmark')
+    run_parser.add_argument('--rows', type=int, default=10000)
+    run_parser.add_argument('--users', type=int, default=10)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--endpoint-users', type=int, default=10,
+                            help='Users pushed through the upload/insights endpoints')
+    run_parser.add_argument('--output', help='Write JSON results to this file')
+
+    compare_parser = commands.add_parser('compare', help='Compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.candidate) as f:
+            candidate = json.load(f)
+        print('\n'.join(compare(baseline, candidate)))
+        return
+
+    results = run(args.rows, args.users, args.seed, args.endpoint_users)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare serialization time and payload size for large transaction responses
+
+Builds N TransactionResponse-compatible ORM rows in memory and times the
+FastAPI default path (model validation + jsonable_encoder + json.dumps)
+against orjson and direct Pydantic-to-bytes serialization, then reports
+raw, gzip and brotli payload sizes.
+
+Usage:
+    python -m backend.benchmarks.serialization_bench [--rows N] [--repeat N]
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import date, timedelta
+import orjson
+from fastapi.encoders import jsonable_encoder
+from backend.models import user, transaction, subscription, data_version
+from backend.models.transaction import Transaction, TransactionResponse
+from backend.utils.serialization import dump_models
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_rows(count: int) -> list:
+    """Build transient Transaction ORM instances"""
+    rng = random.Random(7)
+    start = date(2022, 1, 1)
+    return [
+        Transaction(
+            id=i + 1,
+            date=start + timedelta(days=rng.randrange(1000)),
+            description=f"CARD PURCHASE MERCHANT {rng.randrange(500)} REF {rng.randrange(10**6)}",
+            amount=round(rng.uniform(1, 500), 2),
+            currency="USD",
+            user_id=1
+        )
+        for i in range(count)
+    ]
+
+
+def fastapi_default(rows) -> bytes:
+    """What FastAPI does for response_model=List[...] with JSONResponse"""
+    validated = [TransactionResponse.model_validate(r, from_attributes=True) for r in rows]
+    return json.dumps(
+        jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fastapi_orjson(rows) -> bytes:
+    """FastAPI's encoder pass with ORJSONResponse rendering"""
+    validated = [TransactionResponse.model_validate(r, from_attributes=True) for r in rows]
+    return orjson.dumps(jsonable_encoder(validated))
+
+
+def pydantic_bytes(rows) -> bytes:
+    """Validation and serialization entirely in pydantic-core"""
+    return dump_models(TransactionResponse, rows)
+
+
+STRATEGIES = {
+    "fastapi_default": fastapi_default,
+    "fastapi_orjson": fastapi_orjson,
+    "pydantic_bytes": pydantic_bytes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    rows = make_rows(args.rows)
+    
+    print(f"{args.rows} rows, best of {args.repeat}")
+    body = None
+    for name, strategy in STRATEGIES.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            body = strategy(rows)
+            timings.append(time.perf_counter() - start)
+        print(f"  {name:<16} {min(timings) * 1000:8.1f} ms  {len(body):>9} bytes")
+    
+    print("payload size")
+    print(f"  {'raw':<16} {len(body):>9} bytes")
+    start = time.perf_counter()
+    gzipped = gzip.compress(body, compresslevel=6)
+    print(f"  {'gzip-6':<16} {len(gzipped):>9} bytes  {(time.perf_counter() - start) * 1000:6.1f} ms")
+    if brotli is not None:
+        start = time.perf_counter()
+        compressed = brotli.compress(body, quality=4)
+        print(f"  {'brotli-4':<16} {len(compressed):>9} bytes  {(time.perf_counter() - start) * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
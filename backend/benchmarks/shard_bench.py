@@ -0,0 +1,122 @@
+"""
+Measure write throughput as the shard count grows
+
+Concurrent writer processes each insert transaction batches for their
+own users, committing per batch the way the upload endpoint does. With
+one shard every commit contends for the same SQLite lock; with N shards
+writers for users on different shards proceed independently.
+
+Writers are processes, like uvicorn workers, so they share no GIL and
+scaling is bounded by SQLite locks and disk (and the CPU count). Run with
+--threads to see the single-process case, where the GIL serializes the
+Python side of every insert and extra shards buy little.
+
+Usage:
+    python -m backend.benchmarks.shard_bench [--shards 1 2 4] [--writers 8] [--threads]
+"""
+import argparse
+import functools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+from sqlalchemy.exc import OperationalError
+from backend.database import Base, ShardRouter, shard_urls
+from backend.models import user, transaction, subscription, data_version
+from backend.models.transaction import Transaction
+
+
+def write_user(router: ShardRouter, user_id: int, batches: int, batch_size: int) -> int:
+    """Insert batches for one user, retrying when the shard is locked"""
+    start = date(2023, 1, 1)
+    written = 0
+    for batch in range(batches):
+        rows = [
+            {
+                'date': start + timedelta(days=i % 365),
+                'description': f'MERCHANT {i % 40} *{1000 + i}',
+                'amount': 9.99,
+                'user_id': user_id
+            }
+            for i in range(batch_size)
+        ]
+        while True:
+            db = router.session_for(user_id)
+            try:
+                db.bulk_insert_mappings(Transaction, rows)
+                db.commit()
+                break
+            except OperationalError:
+                db.rollback()
+                time.sleep(0.001)
+            finally:
+                db.close()
+        written += batch_size
+    return written
+
+
+def write_user_process(urls: list, user_id: int, batches: int, batch_size: int) -> int:
+    """write_user in a worker process, with that process's own engines"""
+    router = ShardRouter(urls)
+    try:
+        return write_user(router, user_id, batches, batch_size)
+    finally:
+        router.dispose()
+
+
+def run(shard_count: int, writers: int, batches: int, batch_size: int, threads: bool = False) -> float:
+    """Return rows written per second for one shard count"""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        urls = shard_urls(base, shard_count)
+        router = ShardRouter(urls)
+        for engine in router.engines:
+            Base.metadata.create_all(bind=engine)
+        
+        # Pick one user per writer, spread over shards round-robin
+        users, candidate = [], 1
+        while len(users) < writers:
+            if router.shard_for(candidate) == len(users) % shard_count:
+                users.append(candidate)
+            candidate += 1
+        
+        router.dispose()
+        
+        if threads:
+            router = ShardRouter(urls)
+            pool = ThreadPoolExecutor(max_workers=writers)
+            task = lambda u: write_user(router, u, batches, batch_size)
+        else:
+            pool = ProcessPoolExecutor(max_workers=writers)
+            task = functools.partial(write_user_process, urls, batches=batches, batch_size=batch_size)
+            # Start the workers (imports included) before timing
+            list(pool.map(time.sleep, [0.2] * writers))
+        
+        start = time.perf_counter()
+        with pool:
+            total = sum(pool.map(task, users))
+        elapsed = time.perf_counter() - start
+        if threads:
+            router.dispose()
+        return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--threads", action="store_true", help="Writer threads in one process instead of processes")
+    args = parser.parse_args()
+    
+    baseline = None
+    for count in args.shards:
+        rate = run(count, args.writers, args.batches, args.batch_size, args.threads)
+        baseline = baseline or rate
+        print(f"  {count:>2} shard(s)  {rate:>10.0f} rows/s  x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,264 @@
-from sqlalchemy import create_engine
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, TypeVar
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.schema import CreateTable, Table
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./subsmart.db"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+SQLALCHEMY_DATABASE_URL = os.environ.get(
+    "SUBSMART_DATABASE_URL", "sqlite:///./subsmart.db"
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Number of SQLite files users are spread across. 1 keeps the single
+# subsmart.db layout; N > 1 uses subsmart-shard-0.db ... subsmart-shard-{N-1}.db
+SHARD_COUNT = max(1, int(os.environ.get("SUBSMART_SHARDS", "1")))
+
+# Directory for optional memory-mapped columnar transaction snapshots
+# (backend.utils.snapshots); empty disables them
+SNAPSHOT_DIR = os.environ.get("SUBSMART_SNAPSHOT_DIR", "")
+
+# How long a SQLite connection waits on a locked database before failing.
+# Matters once several worker processes write to the same files.
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SUBSMART_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+T = TypeVar("T")
 
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency for FastAPI routes to get database session"""
-    db = SessionLocal()
+def shard_urls(base_url: str, count: int) -> List[str]:
+    """
+    Derive one database URL per shard from the base URL
+
+    Args:
+        base_url: SQLite URL of the unsharded database
+        count: Number of shards
+
+    Returns:
+        List of shard URLs (just base_url when count is 1)
+    """
+    if count == 1:
+        return [base_url]
+    stem = base_url[:-3] if base_url.endswith(".db") else base_url
+    return [f"{stem}-shard-{i}.db" for i in range(count)]
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    Configure every new SQLite connection for concurrent access
+
+    WAL lets readers run alongside a writer (including writers in other
+    worker processes), busy_timeout makes writers queue on the lock instead
+    of failing immediately, and synchronous=NORMAL is durable under WAL.
+    auto_vacuum=INCREMENTAL only takes effect on new database files; it
+    lets retention return freed pages without a full VACUUM.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+class ShardRouter:
+    """
+    Routes users to per-shard engines and session factories
+
+    Each shard is its own SQLite file with its own engine and connection
+    pool, so writes for users on different shards do not contend for the
+    same database lock.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.engines: List[Engine] = [
+            create_engine(url, connect_args={"check_same_thread": False})
+            for url in urls
+        ]
+        for engine in self.engines:
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", _set_sqlite_pragmas)
+        self.session_factories = [
+            sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            for engine in self.engines
+        ]
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def shard_for(self, user_id: int) -> int:
+        """Map a user to a shard index (stable across processes)"""
+        if len(self.engines) == 1:
+            return 0
+        # Fibonacci (multiply-shift) hashing spreads sequential IDs evenly
+        return (((user_id * 2654435761) & 0xFFFFFFFF) * len(self.engines)) >> 32
+
+    def session_for(self, user_id: int) -> Session:
+        """Open a session on the user's shard"""
+        return self.session_factories[self.shard_for(user_id)]()
+
+    def for_each_shard(
+        self,
+        fn: Callable[[int, Session], T],
+        parallel: bool = True
+    ) -> List[T]:
+        """
+        Run fn(shard_index, session) on every shard
+
+        Each call gets its own session, closed afterwards. With parallel=True
+        shards are processed concurrently in a thread pool.
+
+        Args:
+            fn: Callable receiving the shard index and a session
+            parallel: Run shards concurrently
+
+        Returns:
+            Results in shard order
+        """
+        def run(index: int) -> T:
+            db = self.session_factories[index]()
+            try:
+                return fn(index, db)
+            finally:
+                db.close()
+
+        indexes = range(len(self.engines))
+        if not parallel or len(self.engines) == 1:
+            return [run(i) for i in indexes]
+        with ThreadPoolExecutor(max_workers=len(self.engines)) as pool:
+            return list(pool.map(run, indexes))
+
+    def dispose(self) -> None:
+        """Close all pooled connections"""
+        for engine in self.engines:
+            engine.dispose()
+
+
+shards = ShardRouter(shard_urls(SQLALCHEMY_DATABASE_URL, SHARD_COUNT))
+
+# Shard 0; the only database in single-shard mode
+engine = shards.engines[0]
+SessionLocal = shards.session_factories[0]
+
+
+def get_db(user_id: int = 1):
+    """
+    Dependency for FastAPI routes to get database session
+
+    The session is opened on the shard owning user_id, taken from the
+    request's user_id query parameter. Routes addressing a row by ID
+    declare user_id as required, since IDs are only unique per shard.
+    """
+    db = shards.session_for(user_id)
     try:
         yield db
     finally:
         db.close()
 
 
+def load_models():
+    """Import every model module so mappers and relationships resolve"""
+    from backend.models import (
+        user, transaction, subscription, subscription_event, merchant_activity,
+        detection_cache, data_version, merchant_rollup
+    )
+
+
 def init_db():
-    """Initialize database tables"""
-    from backend.models import user, transaction, subscription
-    Base.metadata.create_all(bind=engine)
+    """Initialize database tables on every shard"""
+    load_models()
+
+    def init_shard(index: int, db: Session) -> None:
+        Base.metadata.create_all(bind=shards.engines[index])
+        upgrade_schema(shards.engines[index], db)
+
+    shards.for_each_shard(init_shard)
+
+
+def upgrade_schema(bind: Engine = None, db: Session = None):
+    """
+    Bring tables created by older versions up to date
+
+    create_all() only creates missing tables, so columns added to existing
+    models are added here and derived columns are backfilled. Tables whose
+    primary key changed are rebuilt (see rebuild_table).
+
+    Args:
+        bind: Engine of the database to upgrade (defaults to shard 0)
+        db: Session on that database used for backfills
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        primary_key = inspector.get_pk_constraint(table.name)["constrained_columns"]
+        if primary_key != [column.name for column in table.primary_key.columns]:
+            rebuild_table(bind, table)
+            inspector = inspect(bind)
+    added = set()
+
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                default = column.default.arg if column.default is not None else None
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                if default is not None and not callable(default):
+                    ddl += f' DEFAULT {default!r}'
+                conn.execute(text(ddl))
+                added.add((table.name, column.name))
+
+        for index in (i for t in Base.metadata.sorted_tables for i in t.indexes):
+            index.create(bind=conn, checkfirst=True)
+
+    if ('subscriptions', 'monthly_cost') in added:
+        from backend.models.subscription import Subscription
+        owns_session = db is None
+        db = db or sessionmaker(bind=bind)()
+        try:
+            for sub in db.query(Subscription).all():
+                # before_update recomputes monthly_cost from amount/frequency
+                sub.monthly_cost = None
+            db.commit()
+        finally:
+            if owns_session:
+                db.close()
+
+
+def rebuild_table(bind: Engine, table: Table) -> None:
+    """
+    Recreate a table from its model, keeping the rows
+
+    SQLite cannot alter a primary key, so the table is created under a
+    temporary name, the columns it shares with the old one are copied,
+    and it replaces the old table. A model can list SQL expressions in
+    its table info under "rebuild_from" to convert columns whose storage
+    changed. Indexes are recreated by upgrade_schema.
+
+    Args:
+        bind: Engine of the database
+        table: Model table to rebuild
+    """
+    temporary = f"{table.name}__rebuild"
+    ddl = str(CreateTable(table).compile(dialect=bind.dialect))
+    ddl = ddl.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {temporary} ", 1)
+    existing = {c['name'] for c in inspect(bind).get_columns(table.name)}
+    expressions = table.info.get("rebuild_from", {})
+    copied = [c.name for c in table.columns if c.name in existing]
+    columns = ", ".join(copied)
+    values = ", ".join(expressions.get(name, name) for name in copied)
+
+    with bind.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {temporary}"))
+        conn.execute(text(ddl))
+        conn.execute(text(f"INSERT INTO {temporary} ({columns}) SELECT {values} FROM {table.name}"))
+        conn.execute(text(f"DROP TABLE {table.name}"))
+        conn.execute(text(f"ALTER TABLE {temporary} RENAME TO {table.name}"))
@@ -0,0 +1,209 @@
+"""
+Batch jobs that fan out across all database shards
+
+Usage:
+    python -m backend.jobs detect-all [--serial]
+    python -m backend.jobs snapshot-rebuild [--user-id ID]
+    python -m backend.jobs snapshot-check [--user-id ID]
+    python -m backend.jobs compact [--days N] [--user-id ID] [--dry-run] [--no-vacuum]
+"""
+import argparse
+import json
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from backend.database import SNAPSHOT_DIR, init_db, shards
+from backend.models.merchant_rollup import MerchantMonthlyRollup
+from backend.models.transaction import Transaction
+from backend.utils.detection import detect_for_user
+from backend.utils.retention import (
+    RETENTION_DAYS, compact_user, database_space, incremental_vacuum, retention_cutoff
+)
+
+
+def shard_user_ids(db: Session) -> List[int]:
+    """List users with transactions (raw or folded into rollups) on a shard"""
+    return sorted(
+        {user_id for (user_id,) in db.query(Transaction.user_id).distinct()}
+        | {user_id for (user_id,) in db.query(MerchantMonthlyRollup.user_id).distinct()}
+    )
+
+
+def detect_all_users(parallel: bool = True) -> Dict:
+    """
+    Run subscription detection for every user on every shard
+    
+    Shards are processed concurrently; users within a shard run in order
+    on that shard's session.
+    
+    Args:
+        parallel: Process shards concurrently
+        
+    Returns:
+        Summary with per-shard user and subscription counts
+    """
+    def detect_shard(index: int, db: Session) -> Dict:
+        start = time.perf_counter()
+        users = shard_user_ids(db)
+        created = 0
+        for user_id in users:
+            result = detect_for_user(db, user_id)
+            if result:
+                created += result['created_count']
+        return {
+            "shard": index,
+            "users": len(users),
+            "created_count": created,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+    
+    start = time.perf_counter()
+    per_shard = shards.for_each_shard(detect_shard, parallel=parallel)
+    return {
+        "shards": per_shard,
+        "users": sum(s["users"] for s in per_shard),
+        "created_count": sum(s["created_count"] for s in per_shard),
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+
+def snapshot_all_users(action: Callable[[Session, int], Dict], user_id: Optional[int] = None) -> List[Dict]:
+    """
+    Apply a snapshot action to one user or every user on every shard
+    
+    Args:
+        action: Called with (db, user_id), returns a per-user report
+        user_id: Only this user
+        
+    Returns:
+        Per-user reports
+    """
+    if user_id is not None:
+        db = shards.session_for(user_id)
+        try:
+            return [action(db, user_id)]
+        finally:
+            db.close()
+    
+    def run_shard(index: int, db: Session) -> List[Dict]:
+        return [action(db, uid) for uid in shard_user_ids(db)]
+    
+    return [report for reports in shards.for_each_shard(run_shard) for report in reports]
+
+
+def compact_all_users(
+    cutoff: date,
+    user_id: Optional[int] = None,
+    dry_run: bool = False,
+    vacuum: bool = True
+) -> Dict:
+    """
+    Fold transactions older than cutoff into rollups on every shard
+    
+    Shards are compacted concurrently and each is vacuumed afterwards,
+    with a full VACUUM if the file would otherwise end up larger.
+    
+    Args:
+        cutoff: Month start; earlier transactions are folded
+        user_id: Only this user (and only their shard is vacuumed)
+        dry_run: Report what would be folded without writing
+        vacuum: Return freed pages to the filesystem
+        
+    Returns:
+        Per-shard space before and after, and per-user reports
+    """
+    def compact_shard(index: int, db: Session) -> Dict:
+        start = time.perf_counter()
+        bind = shards.engines[index]
+        before = database_space(bind)
+        users = [user_id] if user_id is not None else shard_user_ids(db)
+        reports = [compact_user(db, uid, cutoff, dry_run=dry_run) for uid in users]
+        db.close()
+        vacuumed = None
+        if vacuum and not dry_run:
+            vacuumed = incremental_vacuum(bind, max_bytes=before["bytes"] if before else None)
+        after = database_space(bind)
+        return {
+            "shard": index,
+            "before": before,
+            "after": after,
+            "reclaimed_bytes": before["bytes"] - after["bytes"] if before else None,
+            "vacuum": vacuumed,
+            "rows_folded": sum(r["rows_folded"] for r in reports),
+            "users": reports,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+    
+    if user_id is not None:
+        index = shards.shard_for(user_id)
+        db = shards.session_factories[index]()
+        try:
+            per_shard = [compact_shard(index, db)]
+        finally:
+            db.close()
+    else:
+        per_shard = shards.for_each_shard(compact_shard)
+    return {
+        "cutoff": cutoff.isoformat(),
+        "dry_run": dry_run,
+        "shards": per_shard,
+        "rows_folded": sum(s["rows_folded"] for s in per_shard),
+        "reclaimed_bytes": sum(s["reclaimed_bytes"] or 0 for s in per_shard),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SubSmart batch jobs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    detect_parser = commands.add_parser("detect-all", help="Detect subscriptions for all users")
+    detect_parser.add_argument("--serial", action="store_true", help="Process shards one at a time")
+    for name, help_text in (
+        ("snapshot-rebuild", "Rebuild columnar transaction snapshots from the database"),
+        ("snapshot-check", "Compare columnar transaction snapshots with the database"),
+    ):
+        snapshot_parser = commands.add_parser(name, help=help_text)
+        snapshot_parser.add_argument("--user-id", type=int, help="Only this user")
+    compact_parser = commands.add_parser(
+        "compact", help="Fold old transactions into monthly rollups and vacuum"
+    )
+    compact_parser.add_argument(
+        "--days", type=int, default=RETENTION_DAYS,
+        help=f"Keep this many days of raw transactions (default {RETENTION_DAYS})"
+    )
+    compact_parser.add_argument("--user-id", type=int, help="Only this user")
+    compact_parser.add_argument("--dry-run", action="store_true", help="Report without writing")
+    compact_parser.add_argument("--no-vacuum", action="store_true", help="Skip the incremental vacuum")
+    args = parser.parse_args()
+    
+    if args.command.startswith("snapshot-") and not SNAPSHOT_DIR:
+        parser.error("set SUBSMART_SNAPSHOT_DIR to use snapshots")
+    
+    init_db()
+    if args.command == "detect-all":
+        print(json.dumps(detect_all_users(parallel=not args.serial), indent=2))
+    elif args.command == "snapshot-rebuild":
+        from backend.utils.snapshots import rebuild_snapshot
+        reports = snapshot_all_users(
+            lambda db, uid: {"user_id": uid, "rows": rebuild_snapshot(db, uid)},
+            args.user_id
+        )
+        print(json.dumps(reports, indent=2))
+    elif args.command == "snapshot-check":
+        from backend.utils.snapshots import check_snapshot
+        reports = snapshot_all_users(check_snapshot, args.user_id)
+        print(json.dumps(reports, indent=2))
+        if not all(report["ok"] for report in reports):
+            raise SystemExit(1)
+    elif args.command == "compact":
+        report = compact_all_users(
+            retention_cutoff(args.days),
+            user_id=args.user_id,
+            dry_run=args.dry_run,
+            vacuum=not args.no_vacuum
+        )
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
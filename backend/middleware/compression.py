@@ -0,0 +1,182 @@
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; fall back to gzip only
+    brotli = None
+
+# Long-lived streams are passed through: compressing them would need a
+# flush per frame and buys nothing for tiny event frames
+UNCOMPRESSED_CONTENT_TYPES = ("text/event-stream", "multipart/x-mixed-replace")
+
+
+class _GzipCompressor:
+    """Incremental gzip stream"""
+    
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+    
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    """Incremental brotli stream"""
+    
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+    
+    def flush(self) -> bytes:
+        return self._obj.flush()
+    
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    """
+    Pick the best supported content coding from an Accept-Encoding header
+    
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+        
+    Returns:
+        "br", "gzip" or "" when the response should not be compressed
+    """
+    accepted = set()
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return ''
+
+
+class CompressionMiddleware:
+    """
+    Compress responses above a size threshold with brotli or gzip
+    
+    Brotli is used when the `brotli` package is installed and the client
+    accepts it, gzip otherwise. Chunked responses are flushed per chunk;
+    event streams (UNCOMPRESSED_CONTENT_TYPES) are never compressed.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+        
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request state machine wrapping the downstream send callable"""
+    
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.initial_message: Message = {}
+        self.passthrough = False
+        self.started = False
+        self.compressor = None
+    
+    def _make_compressor(self):
+        if self.encoding == 'br':
+            return _BrotliCompressor(self.middleware.brotli_quality)
+        return _GzipCompressor(self.middleware.gzip_level)
+    
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        
+        if message_type == "http.response.start":
+            # Hold the start message until the first body chunk tells us
+            # whether compressing is worthwhile
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            self.passthrough = (
+                "content-encoding" in headers
+                or content_type in UNCOMPRESSED_CONTENT_TYPES
+            )
+            return
+        
+        if message_type != "http.response.body":
+            await self._send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        
+        if not self.started:
+            self.started = True
+            if self.passthrough or (len(body) < self.middleware.minimum_size and not more_body):
+                self.passthrough = True
+                await self._send(self.initial_message)
+                await self._send(message)
+                return
+            
+            self.compressor = self._make_compressor()
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            
+            if more_body:
+                del headers["Content-Length"]
+                message["body"] = self.compressor.compress(body) + self.compressor.flush()
+            else:
+                message["body"] = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(message["body"]))
+            
+            await self._send(self.initial_message)
+            await self._send(message)
+            return
+        
+        if self.passthrough:
+            await self._send(message)
+            return
+        
+        if more_body:
+            message["body"] = self.compressor.compress(body) + self.compressor.flush()
+        else:
+            message["body"] = self.compressor.compress(body) + self.compressor.finish()
+        await self._send(message)
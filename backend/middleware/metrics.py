@@ -0,0 +1,41 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from backend.utils.metrics import REQUEST_LATENCY
+
+
+class MetricsMiddleware:
+    """
+    Record per-route request latency
+    
+    Requests are labelled with the matched route template (e.g.
+    /api/subscriptions/{subscription_id}) rather than the raw path so
+    label cardinality stays bounded.
+    """
+    
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code
+            )
@@ -0,0 +1,40 @@
+from typing import Callable, Iterable
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Seconds a client is asked to wait before retrying a cold worker
+RETRY_AFTER_SECONDS = 1
+
+
+class ReadinessGateMiddleware:
+    """
+    Refuse traffic until the worker is ready
+
+    Warmup normally finishes before uvicorn accepts connections, but a
+    worker whose warmup failed, or one shutting down, still shares the
+    listening socket with its siblings. Requests it picks up get 503 with
+    Retry-After instead of being served cold; the probe and metrics paths
+    always pass.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        is_ready: Callable[[], bool],
+        exempt_paths: Iterable[str] = ("/health", "/ready", "/metrics")
+    ) -> None:
+        self.app = app
+        self.is_ready = is_ready
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.is_ready() or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            {"detail": "Worker is warming up"},
+            status_code=503,
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer
+from backend.database import Base
+
+
+class DataVersion(Base):
+    """Per-user counter bumped on every write to the user's data"""
+    __tablename__ = "data_versions"
+    
+    user_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, Text
+from backend.database import Base
+
+
+class DetectionCache(Base):
+    """Last detection output per user, valid while the transaction fingerprint matches"""
+    __tablename__ = "detection_cache"
+    
+    user_id = Column(Integer, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    result = Column(Text, nullable=False)  # JSON-encoded detection output
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Float, Date
+from backend.database import Base
+
+
+class MerchantActivity(Base):
+    """Per-user, per-merchant charge activity, maintained as transactions are ingested"""
+    __tablename__ = "merchant_activity"
+    
+    user_id = Column(Integer, primary_key=True)
+    merchant_key = Column(String, primary_key=True)  # normalize_merchant() of the description
+    first_seen = Column(Date, nullable=False)
+    last_seen = Column(Date, nullable=False)
+    charge_count = Column(Integer, nullable=False, default=0)
+    last_amount = Column(Float, nullable=False, default=0.0)
@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Integer, String
+from backend.database import Base
+from backend.models.types import Cents, DayNumber
+from backend.utils.currency import DEFAULT_CURRENCY
+
+
+def _ordinal(column: str) -> str:
+    """SQL converting an ISO date left by the old layout to a day number"""
+    return (
+        f"CASE WHEN typeof({column}) = 'text' "
+        f"THEN CAST(julianday({column}) - 1721424.5 AS INTEGER) ELSE {column} END"
+    )
+
+
+def _cents(column: str) -> str:
+    """SQL converting a float amount left by the old layout to cents"""
+    return f"CASE WHEN typeof({column}) = 'real' THEN CAST(round({column} * 100) AS INTEGER) ELSE {column} END"
+
+
+class MerchantMonthlyRollup(Base):
+    """
+    Per-user, per-merchant, per-currency monthly summary of transactions folded out by retention
+
+    Stored compactly so that folding even a single charge saves space:
+    dates are day numbers, amounts are cents, and values implied by
+    charge_count are NULL (first_date/first_amount for one charge,
+    amount_total for one or two). Use backend.utils.rollups to read them.
+    """
+    __tablename__ = "merchant_monthly_rollups"
+    # The primary key is the table: no rowid and no separate key index.
+    # rebuild_from converts rows of the earlier layout (ISO dates, float
+    # amounts, no currency in the key) when upgrade_schema rebuilds it.
+    __table_args__ = {
+        "sqlite_with_rowid": False,
+        "info": {"rebuild_from": {
+            "month": _ordinal("month"),
+            "first_date": _ordinal("first_date"),
+            "last_date": _ordinal("last_date"),
+            "first_amount": _cents("first_amount"),
+            "last_amount": _cents("last_amount"),
+            "amount_total": _cents("amount_total"),
+        }},
+    }
+
+    user_id = Column(Integer, primary_key=True)
+    merchant_key = Column(String, primary_key=True)  # normalize_merchant() of the description
+    month = Column(DayNumber, primary_key=True)  # First day of the month
+    currency = Column(String(3), primary_key=True, default=DEFAULT_CURRENCY)  # Of every folded charge
+    description = Column(String, nullable=False)  # Latest raw description
+    charge_count = Column(Integer, nullable=False)  # Charges after duplicate removal
+    duplicate_count = Column(Integer, nullable=False, default=0)
+    first_date = Column(DayNumber, nullable=True)  # NULL when charge_count is 1
+    last_date = Column(DayNumber, nullable=False)
+    first_amount = Column(Cents, nullable=True)  # NULL when charge_count is 1
+    last_amount = Column(Cents, nullable=False)
+    amount_total = Column(Cents, nullable=True)  # NULL when charge_count is 1 or 2
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from datetime import date
 from typing import Optional
 from backend.database import Base
+from backend.utils.cost import monthly_cost
+from backend.utils.currency import DEFAULT_CURRENCY
 
 
 class Subscription(Base):
@@ -13,19 +15,36 @@ class Subscription(Base):
     id = Column(Integer, primary_key=True, index=True)
     merchant_name = Column(String, nullable=False, index=True)
     amount = Column(Float, nullable=False)
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY)  # ISO 4217
     frequency = Column(String, nullable=False)  # e.g., "monthly", "yearly"
     start_date = Column(Date, nullable=False)
     next_billing_date = Column(Date, nullable=True)
     status = Column(String, default="active")  # "active" or "cancelled"
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Monthly-equivalent cost, kept in sync with amount/frequency on write
+    monthly_cost = Column(Float, nullable=False, default=0.0)
     
     user = relationship("User")
+    
+    __table_args__ = (
+        Index("ix_subscriptions_user_monthly_cost", "user_id", "monthly_cost"),
+        Index("ix_subscriptions_user_next_billing", "user_id", "next_billing_date"),
+        Index("ix_subscriptions_user_merchant", "user_id", "merchant_name"),
+    )
+
+
+@event.listens_for(Subscription, "before_insert")
+@event.listens_for(Subscription, "before_update")
+def _sync_monthly_cost(mapper, connection, target):
+    """Recompute the stored monthly cost whenever a subscription is written"""
+    target.monthly_cost = monthly_cost(target.amount, target.frequency)
 
 
 # Pydantic schemas
 class SubscriptionCreate(BaseModel):
     merchant_name: str
     amount: float
+    currency: str = Field(DEFAULT_CURRENCY, pattern="^[A-Z]{3}$")
     frequency: str
     start_date: date
     next_billing_date: Optional[date] = None
@@ -36,21 +55,32 @@ class SubscriptionCreate(BaseModel):
 class SubscriptionUpdate(BaseModel):
     merchant_name: Optional[str] = None
     amount: Optional[float] = None
+    currency: Optional[str] = Field(None, pattern="^[A-Z]{3}$")
     frequency: Optional[str] = None
     start_date: Optional[date] = None
     next_billing_date: Optional[date] = None
     status: Optional[str] = None
+    
+    @field_validator("merchant_name", "amount", "currency", "frequency", "start_date", "status")
+    @classmethod
+    def not_null(cls, value):
+        """Fields stored as NOT NULL may be left out, but not set to null"""
+        if value is None:
+            raise ValueError("cannot be null; omit the field to keep it unchanged")
+        return value
 
 
 class SubscriptionResponse(BaseModel):
     id: int
     merchant_name: str
     amount: float
+    currency: str
     frequency: str
     start_date: date
     next_billing_date: Optional[date]
     status: str
     user_id: int
+    monthly_cost: float
     
     class Config:
         from_attributes = True
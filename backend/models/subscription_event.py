@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
+from backend.database import Base
+
+
+class SubscriptionEvent(Base):
+    """Billing anomaly found during detection (price change, duplicate, missed cycle)"""
+    __tablename__ = "subscription_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    merchant_name = Column(String, nullable=False)
+    event_type = Column(String, nullable=False)  # "price_change", "duplicate_charge", "missed_cycle"
+    event_date = Column(Date, nullable=False)
+    amount = Column(Float, nullable=False)
+    previous_amount = Column(Float, nullable=True)
+    expected_date = Column(Date, nullable=True)  # First skipped billing date for missed cycles
+    
+    __table_args__ = (
+        Index("ix_subscription_events_user_date", "user_id", "event_date"),
+    )
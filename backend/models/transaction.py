@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel
 from datetime import date
 from backend.database import Base
+from backend.utils.currency import DEFAULT_CURRENCY
 
 
 class Transaction(Base):
@@ -13,9 +14,16 @@ class Transaction(Base):
     date = Column(Date, nullable=False)
     description = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY)  # ISO 4217
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     user = relationship("User")
+    
+    __table_args__ = (
+        # Covers the per-user filter and the detection fingerprint
+        # (count/max/sum of id and amount) without touching the table
+        Index("ix_transactions_user_amount", "user_id", "amount"),
+    )
 
 
 # Pydantic schemas
@@ -23,6 +31,7 @@ class TransactionCreate(BaseModel):
     date: date
     description: str
     amount: float
+    currency: str = DEFAULT_CURRENCY
     user_id: int
 
 
@@ -31,6 +40,7 @@ class TransactionResponse(BaseModel):
     date: date
     description: str
     amount: float
+    currency: str
     user_id: int
     
     class Config:
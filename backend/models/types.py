@@ -0,0 +1,27 @@
+from datetime import date
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+
+class DayNumber(TypeDecorator):
+    """Date stored as its proleptic Gregorian ordinal (3 bytes instead of 10)"""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return value.toordinal() if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return date.fromordinal(value) if value is not None else None
+
+
+class Cents(TypeDecorator):
+    """Money amount stored as whole cents (1-4 bytes instead of 8)"""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return round(value * 100) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return value / 100 if value is not None else None
@@ -0,0 +1,79 @@
+import asyncio
+import os
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from backend.utils.events import RESYNC_FRAME, broker, stored_version
+
+router = APIRouter(
+    prefix="/api",
+    tags=["events"]
+)
+
+# Comment frame sent when a stream has been idle this long, so proxies
+# keep the connection open and dead clients are noticed
+HEARTBEAT_SECONDS = 15
+
+# Client reconnect delay sent to EventSource
+RETRY_MS = 3000
+
+# How often a stream checks the user's data version for changes made
+# through other workers
+VERSION_POLL_SECONDS = float(os.environ.get("SUBSMART_EVENTS_POLL_SECONDS", "2"))
+
+
+@router.get("/events")
+async def stream_events(user_id: int = 1):
+    """
+    Stream change events for a user (Server-Sent Events)
+
+    Events:
+        upload: upload progress (stage: received, parsed, stored)
+        detection: detection finished, with counts
+        subscriptions: subscriptions created, updated or deleted
+        resync: events were dropped; refetch everything
+
+    Change events carry the user's refreshed insight totals under
+    "insights". Changes made through another worker are sent as resync
+    within VERSION_POLL_SECONDS.
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        text/event-stream response
+    """
+    async def frames():
+        loop = asyncio.get_running_loop()
+        async with broker.subscribe(user_id) as queue:
+            seen = await run_in_threadpool(stored_version, user_id)
+            yield b"retry: %d\n: connected\n\n" % RETRY_MS
+            last_frame = next_poll = loop.time()
+            while True:
+                out = []
+                try:
+                    out.append(await asyncio.wait_for(
+                        queue.get(), timeout=max(0.0, next_poll - loop.time())
+                    ))
+                except asyncio.TimeoutError:
+                    pass
+                if loop.time() >= next_poll:
+                    next_poll = loop.time() + VERSION_POLL_SECONDS
+                    version = await run_in_threadpool(stored_version, user_id)
+                    if version > max(seen, broker.announced_version(user_id)):
+                        out.append(RESYNC_FRAME)
+                    seen = max(seen, version)
+                if not out and loop.time() - last_frame >= HEARTBEAT_SECONDS:
+                    out.append(b": ping\n\n")
+                for frame in out:
+                    last_frame = loop.time()
+                    yield frame
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
@@ -1,30 +1,138 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from backend.database import get_db
+from backend.database import SNAPSHOT_DIR, get_db
 from backend.models.subscription import Subscription
-from backend.utils.proration import estimate_annual_savings
+from backend.models.subscription_event import SubscriptionEvent
+from backend.utils.profiling import ProfiledRoute
+from backend.utils.versioning import get_version
+from backend.utils.metrics import timed
+from backend.utils.activity import load_activity, rank_lapsed
+from backend.utils.categories import CATEGORY_CATALOG, category_for
+from backend.utils.currency import DEFAULT_CURRENCY, rates_version
+from backend.utils.etag import (
+    compute_etag,
+    is_not_modified,
+    not_modified_response,
+    cache_headers
+)
 from datetime import date, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-router = APIRouter(prefix="/api/insights", tags=["insights"])
+router = APIRouter(
+    prefix="/api/insights",
+    tags=["insights"],
+    route_class=ProfiledRoute
+)
+
+
+class ForecastScenario(BaseModel):
+    name: str = ""
+    cancel: List[int] = []
+
+
+class ForecastRequest(BaseModel):
+    scenarios: List[ForecastScenario] = Field(default=[], max_length=500)
+    months: int = Field(default=12, ge=1, le=36)
 
 
 @router.get("", response_model=dict)
 def get_insights(
+    request: Request,
+    response: Response,
     user_id: int = 1,
+    currency: Optional[str] = Query(None, pattern="^[A-Z]{3}$"),
     db: Session = Depends(get_db)
 ):
     """
     Get subscription insights and analytics
     
     Args:
+        request: Incoming request (used for conditional GET)
+        response: Outgoing response (used for the ETag header)
         user_id: User ID
+        currency: Display currency for totals (default
+            SUBSMART_DEFAULT_CURRENCY)
         db: Database session
         
     Returns:
         Dictionary with insights data
     """
+    from backend.utils.fx import supported_currencies
+    if currency and currency not in supported_currencies():
+        raise HTTPException(status_code=400, detail=f"Unsupported currency {currency}")
+    
+    # Upcoming payments and lapsed flags are relative to today; converted
+    # totals also depend on the FX table
+    etag = compute_etag(request, get_version(db, user_id), date.today(), rates_version())
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
+    with timed("insights"):
+        result = compute_insights(db, user_id, currency or DEFAULT_CURRENCY)
+    response.headers.update(cache_headers(etag))
+    return result
+
+
+@router.post("/forecast", response_model=dict)
+def forecast_spending(
+    request: ForecastRequest,
+    user_id: int = 1,
+    currency: Optional[str] = Query(None, pattern="^[A-Z]{3}$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Project the next months of spending, optionally for cancellation scenarios
+    
+    Args:
+        request: Scenarios (subscription IDs to cancel) and forecast length
+        user_id: User ID
+        currency: Currency of the projections (default
+            SUBSMART_DEFAULT_CURRENCY)
+        db: Database session
+        
+    Returns:
+        Month labels, the current-plan projection and one projection per
+        scenario with savings
+    """
+    # NumPy is only needed here; keep it out of app startup
+    from backend.utils.forecast import forecast_scenarios
+    from backend.utils.fx import supported_currencies
+    
+    if currency and currency not in supported_currencies():
+        raise HTTPException(status_code=400, detail=f"Unsupported currency {currency}")
+    
+    active_subs = db.query(Subscription).filter(
+        Subscription.user_id == user_id,
+        Subscription.status == "active"
+    ).all()
+    
+    with timed("forecast"):
+        return forecast_scenarios(
+            active_subs,
+            [scenario.model_dump() for scenario in request.scenarios],
+            date.today(),
+            request.months,
+            currency or DEFAULT_CURRENCY
+        )
+
+
+def compute_insights(db: Session, user_id: int, currency: str = DEFAULT_CURRENCY) -> Dict:
+    """
+    Compute the insights payload for a user
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        currency: Display currency for totals, categories and the trend;
+            must be in the FX rate table
+        
+    Returns:
+        Dictionary with insights data. Subscriptions in currencies without
+        FX rates are left out of converted totals and listed under
+        unconverted_currencies.
+    """
     # Get all active subscriptions
     active_subs = db.query(Subscription).filter(
         Subscription.user_id == user_id,
@@ -37,59 +145,55 @@ def get_insights(
             "total_yearly_cost": 0,
             "subscription_count": 0,
             "highest_spend": None,
-            "unused_subscriptions": [],
+            "lapsed_subscriptions": [],
             "predicted_upcoming_payments": [],
             "category_breakdown": [],
-            "spending_trend": []
+            "spending_trend": [],
+            "billing_events": [],
+            "currency": currency,
+            "unconverted_currencies": []
         }
     
-    # Calculate total monthly cost
-    total_monthly = 0
-    for sub in active_subs:
-        if sub.frequency == 'monthly':
-            total_monthly += sub.amount
-        elif sub.frequency == 'yearly':
-            total_monthly += sub.amount / 12
-        elif sub.frequency == 'weekly':
-            total_monthly += sub.amount * 4.33
-        elif sub.frequency == 'bi-weekly':
-            total_monthly += sub.amount * 2.17
-    
-    # Calculate annual savings estimate
-    savings_data = estimate_annual_savings([
-        {
-            'amount': s.amount,
-            'frequency': s.frequency
-        }
-        for s in active_subs
-    ])
-    
-    # Find highest spend subscription
-    highest_spend = max(
-        active_subs,
-        key=lambda s: s.amount if s.frequency == 'monthly' else (
-            s.amount / 12 if s.frequency == 'yearly' else s.amount
+    today = date.today()
+    unconverted = []
+    if all(sub.currency == currency for sub in active_subs):
+        # Totals and highest spend come straight from the stored monthly_cost
+        active_filter = (
+            Subscription.user_id == user_id,
+            Subscription.status == "active"
         )
-    )
+        total_monthly = db.query(
+            func.total(Subscription.monthly_cost)
+        ).filter(*active_filter).scalar()
+        
+        highest_spend = db.query(Subscription).filter(
+            *active_filter
+        ).order_by(Subscription.monthly_cost.desc()).first()
+        highest_monthly = highest_spend.monthly_cost
+        monthly_costs = [sub.monthly_cost for sub in active_subs]
+    else:
+        # Mixed currencies: convert all monthly costs at today's rates in
+        # one vectorized pass
+        from backend.utils.fx import convert, supported_currencies
+        converted = convert(
+            [sub.monthly_cost for sub in active_subs],
+            [sub.currency for sub in active_subs],
+            currency,
+            today,
+            missing=0.0
+        )
+        unconverted = sorted({sub.currency for sub in active_subs} - supported_currencies())
+        monthly_costs = converted.tolist()
+        total_monthly = float(converted.sum())
+        highest = int(converted.argmax())
+        highest_spend = active_subs[highest]
+        highest_monthly = monthly_costs[highest]
     
-    # Identify unused subscriptions (no recent activity)
-    # For demo purposes, mark subscriptions with start_date > 60 days ago as potentially unused
-    sixty_days_ago = date.today() - timedelta(days=60)
-    unused = [
-        {
-            "id": sub.id,
-            "merchant_name": sub.merchant_name,
-            "amount": sub.amount,
-            "frequency": sub.frequency,
-            "start_date": sub.start_date.isoformat(),
-            "reason": "No recent activity detected"
-        }
-        for sub in active_subs
-        if sub.start_date < sixty_days_ago
-    ][:3]  # Limit to top 3
+    # Active subscriptions that stopped charging, from the merchant
+    # activity index
+    lapsed = rank_lapsed(active_subs, load_activity(db, user_id), date.today())
     
     # Predict upcoming payments (next 30 days)
-    today = date.today()
     thirty_days = today + timedelta(days=30)
     
     upcoming = []
@@ -99,6 +203,7 @@ def get_insights(
                 "id": sub.id,
                 "merchant_name": sub.merchant_name,
                 "amount": sub.amount,
+                "currency": sub.currency,
                 "billing_date": sub.next_billing_date.isoformat(),
                 "days_until": (sub.next_billing_date - today).days
             })
@@ -107,74 +212,63 @@ def get_insights(
     upcoming.sort(key=lambda x: x['days_until'])
     
     # Category breakdown (simplified categorization)
-    categories = categorize_subscriptions(active_subs)
+    categories = categorize_subscriptions(active_subs, monthly_costs)
+    
+    # Spending trend for the last 6 months: actual charges from the
+    # columnar snapshot when enabled, otherwise estimated
+    if SNAPSHOT_DIR:
+        spending_trend = snapshot_spending_trend(db, user_id, active_subs, currency, total_monthly)
+    else:
+        spending_trend = generate_spending_trend(active_subs, total_monthly)
     
-    # Spending trend (mock data for last 6 months)
-    spending_trend = generate_spending_trend(active_subs)
+    billing_events = recent_billing_events(
+        db, user_id, {sub.merchant_name: sub.currency for sub in active_subs}
+    )
     
     return {
         "total_monthly_cost": round(total_monthly, 2),
-        "total_yearly_cost": round(savings_data['total_yearly_cost'], 2),
+        "total_yearly_cost": round(total_monthly * 12, 2),
         "subscription_count": len(active_subs),
         "highest_spend": {
             "id": highest_spend.id,
             "merchant_name": highest_spend.merchant_name,
             "amount": highest_spend.amount,
-            "frequency": highest_spend.frequency
+            "currency": highest_spend.currency,
+            "frequency": highest_spend.frequency,
+            "monthly_cost": round(highest_monthly, 2)
         },
-        "unused_subscriptions": unused,
+        "lapsed_subscriptions": lapsed,
         "predicted_upcoming_payments": upcoming,
         "category_breakdown": categories,
         "spending_trend": spending_trend,
-        "average_per_subscription": round(
-            savings_data['average_per_subscription'], 2
-        )
+        "billing_events": billing_events,
+        "average_per_subscription": round(total_monthly / len(active_subs), 2),
+        "currency": currency,
+        "unconverted_currencies": unconverted
     }
 
 
-def categorize_subscriptions(subscriptions: List[Subscription]) -> List[Dict]:
+def categorize_subscriptions(
+    subscriptions: List[Subscription],
+    monthly_costs: Optional[List[float]] = None
+) -> List[Dict]:
     """
     Categorize subscriptions by type
     
     Args:
         subscriptions: List of subscriptions
+        monthly_costs: Monthly cost of each subscription in the display
+            currency (defaults to the stored monthly_cost)
         
     Returns:
         List of category breakdowns
     """
-    categories = {
-        "Streaming": ["netflix", "spotify", "disney", "hulu", "prime", "youtube"],
-        "Productivity": ["microsoft", "adobe", "dropbox", "notion", "slack"],
-        "Fitness": ["gym", "peloton", "fitness", "yoga"],
-        "News": ["nytimes", "washington", "journal", "news"],
-        "Other": []
-    }
-    
-    category_totals = {cat: 0 for cat in categories.keys()}
+    category_totals = {cat: 0 for cat in CATEGORY_CATALOG.keys()}
+    if monthly_costs is None:
+        monthly_costs = [sub.monthly_cost for sub in subscriptions]
     
-    for sub in subscriptions:
-        merchant_lower = sub.merchant_name.lower()
-        categorized = False
-        
-        for category, keywords in categories.items():
-            if category == "Other":
-                continue
-            for keyword in keywords:
-                if keyword in merchant_lower:
-                    if sub.frequency == 'monthly':
-                        category_totals[category] += sub.amount
-                    elif sub.frequency == 'yearly':
-                        category_totals[category] += sub.amount / 12
-                    categorized = True
-                    break
-            if categorized:
-                break
-        
-        if not categorized:
-            if sub.frequency == 'monthly':
-                category_totals["Other"] += sub.amount
-            elif sub.frequency == 'yearly':
-                category_totals["Other"] += sub.amount / 12
+    for sub, cost in zip(subscriptions, monthly_costs):
+        category_totals[category_for(sub.merchant_name)] += cost
     
     return [
         {"category": cat, "amount": round(amount, 2)}
@@ -183,12 +277,52 @@ def categorize_subscriptions(subscriptions: List[Subscription]) -> List[Dict]:
     ]
 
 
-def generate_spending_trend(subscriptions: List[Subscription]) -> List[Dict]:
+def recent_billing_events(
+    db: Session,
+    user_id: int,
+    merchant_currencies: Dict[str, str],
+    limit: int = 10
+) -> List[Dict]:
+    """
+    Most recent price changes, duplicate charges and missed cycles
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        merchant_currencies: Currency of each active subscription's
+            merchant; event amounts are in that currency
+        limit: Maximum number of events
+        
+    Returns:
+        List of events, newest first
+    """
+    events = db.query(SubscriptionEvent).filter(
+        SubscriptionEvent.user_id == user_id,
+        SubscriptionEvent.merchant_name.in_(list(merchant_currencies))
+    ).order_by(SubscriptionEvent.event_date.desc()).limit(limit).all()
+    
+    return [
+        {
+            "merchant_name": event.merchant_name,
+            "event_type": event.event_type,
+            "event_date": event.event_date.isoformat(),
+            "amount": event.amount,
+            "previous_amount": event.previous_amount,
+            "currency": merchant_currencies[event.merchant_name],
+            "expected_date": event.expected_date.isoformat() if event.expected_date else None
+        }
+        for event in events
+    ]
+
+
+def generate_spending_trend(subscriptions: List[Subscription], total: Optional[float] = None) -> List[Dict]:
     """
     Generate spending trend for last 6 months
     
     Args:
         subscriptions: List of subscriptions
+        total: Current monthly total in the display currency (defaults to
+            the sum of stored monthly costs)
         
     Returns:
         List of monthly spending data
@@ -196,22 +330,64 @@ def generate_spending_trend(subscriptions: List[Subscription]) -> List[Dict]:
     months = []
     today = date.today()
     
+    # For demo, we'll use current total (in real app, would query historical data)
+    if total is None:
+        total = sum(sub.monthly_cost for sub in subscriptions)
+    
     for i in range(6, 0, -1):
         month_date = today - timedelta(days=30 * i)
         month_name = month_date.strftime("%b %Y")
         
-        # Calculate spending for that month
-        # For demo, we'll use current total (in real app, would query historical data)
-        total = sum(
-            sub.amount if sub.frequency == 'monthly' else (
-                sub.amount / 12 if sub.frequency == 'yearly' else sub.amount
-            )
-            for sub in subscriptions
-        )
-        
         months.append({
             "month": month_name,
             "amount": round(total, 2)
         })
     
     return months
+
+
+def snapshot_spending_trend(
+    db: Session,
+    user_id: int,
+    subscriptions: List[Subscription],
+    currency: str = DEFAULT_CURRENCY,
+    total: Optional[float] = None
+) -> List[Dict]:
+    """
+    Spending trend for last 6 months from the user's transaction snapshot
+    
+    Sums the actual charges from the subscriptions' merchants per month,
+    each converted at the FX rate of its date.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        subscriptions: List of subscriptions
+        currency: Display currency
+        total: Current monthly total in currency, for the estimate used
+            when the user has no snapshot
+        
+    Returns:
+        List of monthly spending data
+    """
+    from backend.utils.detect_recurring import normalize_merchant
+    from backend.utils.snapshots import load_snapshot, monthly_totals
+    
+    snapshot = load_snapshot(db, user_id)
+    if snapshot is None:
+        return generate_spending_trend(subscriptions, total)
+    
+    today = date.today()
+    month_dates = [today - timedelta(days=30 * i) for i in range(6, 0, -1)]
+    with timed("spending_trend"):
+        totals = monthly_totals(
+            snapshot,
+            {normalize_merchant(sub.merchant_name) for sub in subscriptions},
+            month_dates,
+            currency
+        )
+    
+    return [
+        {"month": month_date.strftime("%b %Y"), "amount": amount}
+        for month_date, amount in zip(month_dates, totals)
+    ]
@@ -0,0 +1,78 @@
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from backend.utils import profiling
+from typing import List
+
+router = APIRouter(prefix="/api/admin/profiles", tags=["admin"])
+
+
+def require_admin(x_admin_token: str = Header(None)):
+    """Only allow requests carrying the profiling admin token"""
+    if not profiling.PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling admin is disabled")
+    if x_admin_token != profiling.PROFILE_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("", response_model=List[dict], dependencies=[Depends(require_admin)])
+def list_profiles(limit: int = 50):
+    """
+    List saved request profiles, newest first
+    
+    Args:
+        limit: Maximum number of profiles to return
+        
+    Returns:
+        List of profile summaries (without the function table)
+    """
+    summaries = []
+    for profile_id in profiling.list_profile_ids()[:limit]:
+        path = profiling.profile_path(profile_id, ".json")
+        if not path:
+            continue
+        with open(path) as f:
+            summary = json.load(f)
+        summary.pop("top_functions", None)
+        summary.pop("sql", None)
+        summaries.append(summary)
+    return summaries
+
+
+@router.get("/{profile_id}", response_model=dict, dependencies=[Depends(require_admin)])
+def get_profile(profile_id: str):
+    """
+    Get the full summary of a saved profile
+    
+    Args:
+        profile_id: Profile ID (from X-Profile-Id or the listing)
+        
+    Returns:
+        Profile summary including SQL statistics and top functions
+    """
+    path = profiling.profile_path(profile_id, ".json")
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    with open(path) as f:
+        return json.load(f)
+
+
+@router.get("/{profile_id}/download", dependencies=[Depends(require_admin)])
+def download_profile(profile_id: str):
+    """
+    Download the raw cProfile stats file for a saved profile
+    
+    Args:
+        profile_id: Profile ID
+        
+    Returns:
+        .prof file readable by pstats, snakeviz, etc.
+    """
+    path = profiling.profile_path(profile_id, ".prof")
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=f"{profile_id}.prof"
+    )
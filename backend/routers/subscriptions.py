@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete, insert, update
 from sqlalchemy.orm import Session
 from backend.database import get_db
 from backend.models.subscription import (
@@ -7,49 +9,217 @@ from backend.models.subscription import (
     SubscriptionUpdate,
     SubscriptionResponse
 )
-from backend.models.transaction import Transaction
-from backend.utils.detect_recurring import detect_recurring_subscriptions
+from backend.utils.cost import monthly_cost
+from backend.utils.detection import detect_for_user
+from backend.utils.events import publish_change
 from backend.utils.proration import calculate_proration
-from typing import List
+from backend.utils.serialization import models_response
+from backend.utils.metrics import timed_commit
+from backend.utils.pagination import encode_cursor, decode_cursor, keyset_filter
+from backend.utils.profiling import ProfiledRoute
+from backend.utils.versioning import get_version, bump_version
+from backend.utils.etag import (
+    compute_etag,
+    is_not_modified,
+    not_modified_response,
+    cache_headers
+)
+from typing import Annotated, Dict, List, Literal, Optional, Union
 from datetime import date
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+router = APIRouter(
+    prefix="/api/subscriptions",
+    tags=["subscriptions"],
+    route_class=ProfiledRoute
+)
 
-router = APIRouter(prefix="/api/subscriptions", tags=["subscriptions"])
+# Sortable columns for the listing endpoint, each backed by a (user_id, column) index
+SORT_COLUMNS = {
+    "monthly_cost": Subscription.monthly_cost,
+    "next_billing_date": Subscription.next_billing_date,
+    "merchant_name": Subscription.merchant_name,
+}
+
+RESPONSE_FIELDS = list(SubscriptionResponse.model_fields)
+
+# Operations accepted by one /batch request
+MAX_BATCH_OPERATIONS = 500
 
 
 class ProrationRequest(BaseModel):
     cancellation_date: date
 
 
+class BatchCreate(BaseModel):
+    op: Literal["create"]
+    subscription: SubscriptionCreate
+
+
+class BatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    changes: SubscriptionUpdate
+
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+class BatchRequest(BaseModel):
+    operations: List[Annotated[Union[BatchCreate, BatchUpdate, BatchDelete], Field(discriminator="op")]] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_OPERATIONS
+    )
+
+
+def unsupported_currency(currency: Optional[str]) -> Optional[str]:
+    """Error message if the FX rate table cannot convert currency, else None"""
+    # NumPy comes with the FX table; keep it out of app startup
+    from backend.utils.fx import supported_currencies
+    
+    if currency is None or currency in supported_currencies():
+        return None
+    return f"Unsupported currency {currency}"
+
+
+def owned_subscription(db: Session, subscription_id: int, user_id: int) -> Subscription:
+    """
+    Load a subscription owned by user_id
+    
+    Subscription IDs are only unique within a shard, so by-id routes
+    always check the owner as well.
+    
+    Raises:
+        HTTPException: 404 if there is no such subscription for the user
+    """
+    subscription = db.query(Subscription).filter(
+        Subscription.id == subscription_id,
+        Subscription.user_id == user_id
+    ).first()
+    
+    if not subscription:
+        raise HTTPException(status_code=404, detail="Subscription not found")
+    
+    return subscription
+
+
 @router.get("", response_model=List[SubscriptionResponse])
 def get_subscriptions(
+    request: Request,
     user_id: int = 1,
     status: str = None,
+    sort: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Get all subscriptions for a user
+    Get subscriptions for a user
     
     Args:
+        request: Incoming request (used for conditional GET)
         user_id: User ID
         status: Filter by status (active/cancelled)
+        sort: Sort column (monthly_cost, next_billing_date, merchant_name)
+        order: Sort direction (asc/desc)
+        limit: Maximum number of subscriptions to return
+        cursor: Cursor from a previous page's X-Next-Cursor header
+        fields: Comma-separated subset of fields to return
         db: Database session
         
     Returns:
         List of subscriptions
     """
-    query = db.query(Subscription).filter(Subscription.user_id == user_id)
+    if sort is not None and sort not in SORT_COLUMNS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort field. Allowed: {', '.join(SORT_COLUMNS)}"
+        )
+    
+    selected = None
+    if fields:
+        selected = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in selected if f not in RESPONSE_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+    
+    if cursor and limit is None:
+        raise HTTPException(status_code=400, detail="cursor requires limit")
+    
+    etag = compute_etag(request, get_version(db, user_id))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
+    sort_column = SORT_COLUMNS[sort] if sort else Subscription.id
+    descending = order == "desc"
+    
+    # Sparse selection skips ORM hydration; id and the sort key are always
+    # fetched so the next cursor can be built
+    if selected:
+        names = list(dict.fromkeys(selected + ["id", sort or "id"]))
+        query = db.query(*(getattr(Subscription, f) for f in names))
+    else:
+        query = db.query(Subscription)
+    
+    query = query.filter(Subscription.user_id == user_id)
     
     if status:
         query = query.filter(Subscription.status == status)
     
-    subscriptions = query.all()
-    return subscriptions
+    if cursor:
+        try:
+            value, last_id = decode_cursor(
+                cursor, is_date=sort == "next_billing_date"
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if sort:
+            query = query.filter(
+                keyset_filter(sort_column, Subscription.id, value, last_id, descending)
+            )
+        else:
+            query = query.filter(
+                Subscription.id < last_id if descending else Subscription.id > last_id
+            )
+    
+    if descending:
+        query = query.order_by(sort_column.desc(), Subscription.id.desc())
+    else:
+        query = query.order_by(sort_column, Subscription.id)
+    
+    if limit is not None:
+        # Fetch one extra row to know whether another page exists
+        query = query.limit(limit + 1)
+    
+    rows = query.all()
+    
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort or "id"), last.id)
+    
+    headers = cache_headers(etag)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    
+    if selected:
+        content = [{f: getattr(row, f) for f in selected} for row in rows]
+        return ORJSONResponse(content=content, headers=headers)
+    
+    return models_response(SubscriptionResponse, rows, headers)
 
 
 @router.get("/{subscription_id}", response_model=SubscriptionResponse)
 def get_subscription(
     subscription_id: int,
+    user_id: int,
     db: Session = Depends(get_db)
 ):
     """
@@ -57,19 +227,13 @@ def get_subscription(
     
     Args:
         subscription_id: Subscription ID
+        user_id: Owner of the subscription (also selects the shard)
         db: Database session
         
     Returns:
         Subscription details
     """
-    subscription = db.query(Subscription).filter(
-        Subscription.id == subscription_id
-    ).first()
-    
-    if not subscription:
-        raise HTTPException(status_code=404, detail="Subscription not found")
-    
-    return subscription
+    return owned_subscription(db, subscription_id, user_id)
 
 
 @router.post("/detect", response_model=dict)
@@ -87,59 +251,140 @@ def detect_subscriptions(
     Returns:
         Dictionary with detection results
     """
-    # Get all transactions for user
-    transactions = db.query(Transaction).filter(
-        Transaction.user_id == user_id
-    ).all()
+    result = detect_for_user(db, user_id)
     
-    if not transactions:
+    if result is None:
         raise HTTPException(
             status_code=404, 
             detail="No transactions found for user"
         )
     
-    # Convert to list of dicts for algorithm
-    txn_list = [
-        {
-            'date': t.date,
-            'description': t.description,
-            'amount': t.amount
-        }
-        for t in transactions
-    ]
-    
-    # Detect recurring patterns
-    detected = detect_recurring_subscriptions(txn_list)
-    
-    # Store detected subscriptions
-    created_count = 0
-    for sub_data in detected:
-        # Check if subscription already exists
-        existing = db.query(Subscription).filter(
-            Subscription.user_id == user_id,
-            Subscription.merchant_name == sub_data['merchant_name']
-        ).first()
+    publish_change(db, user_id, "detection", {
+        "detected_count": result["detected_count"],
+        "created_count": result["created_count"],
+        "cached": result["cached"]
+    })
+    return result
+
+
+@router.post("/batch", response_model=dict)
+def batch_subscriptions(
+    request: BatchRequest,
+    user_id: int = 1,
+    db: Session = Depends(get_db)
+):
+    """
+    Apply mixed create, update and delete operations in one transaction
+    
+    Every operation is validated first; if any is invalid nothing is
+    applied. Operations are then executed as one bulk statement per kind
+    and committed together, and the user's data version is bumped once.
+    
+    Args:
+        request: Operations to apply
+        user_id: User ID owning every subscription in the batch
+        db: Database session
         
-        if not existing:
-            subscription = Subscription(
-                merchant_name=sub_data['merchant_name'],
-                amount=sub_data['amount'],
-                frequency=sub_data['frequency'],
-                start_date=sub_data['start_date'],
-                next_billing_date=sub_data.get('next_billing_date'),
-                status=sub_data['status'],
-                user_id=user_id
+    Returns:
+        Dictionary with one result per operation, in request order
+    """
+    operations = request.operations
+    target_ids = [op.id for op in operations if op.op != "create"]
+    existing = {
+        row.id: row
+        for row in db.query(
+            Subscription.id,
+            Subscription.user_id,
+            Subscription.amount,
+            Subscription.frequency
+        ).filter(Subscription.id.in_(target_ids))
+    } if target_ids else {}
+    
+    errors = []
+    seen = set()
+    for index, op in enumerate(operations):
+        if op.op == "create":
+            if op.subscription.user_id != user_id:
+                errors.append({"index": index, "error": "subscription.user_id must match user_id"})
+            elif unsupported_currency(op.subscription.currency):
+                errors.append({"index": index, "error": unsupported_currency(op.subscription.currency)})
+            continue
+        if op.op == "update" and unsupported_currency(op.changes.currency):
+            errors.append({"index": index, "error": unsupported_currency(op.changes.currency)})
+            continue
+        row = existing.get(op.id)
+        if row is None or row.user_id != user_id:
+            errors.append({"index": index, "error": f"Subscription {op.id} not found"})
+        elif op.id in seen:
+            errors.append({"index": index, "error": f"Subscription {op.id} appears more than once"})
+        seen.add(op.id)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+    
+    # Bulk statements bypass ORM events, so monthly_cost is computed here
+    creates = [op for op in operations if op.op == "create"]
+    created_ids = []
+    if creates:
+        rows = []
+        for op in creates:
+            data = op.subscription.dict()
+            data["monthly_cost"] = monthly_cost(data["amount"], data["frequency"])
+            rows.append(data)
+        created_ids = list(db.scalars(
+            insert(Subscription).returning(Subscription.id, sort_by_parameter_order=True),
+            rows
+        ))
+    
+    updates = [op for op in operations if op.op == "update"]
+    if updates:
+        rows = []
+        for op in updates:
+            changes = op.changes.dict(exclude_unset=True)
+            current = existing[op.id]
+            changes["monthly_cost"] = monthly_cost(
+                changes.get("amount", current.amount),
+                changes.get("frequency", current.frequency)
             )
-            db.add(subscription)
-            created_count += 1
+            rows.append({"id": op.id, **changes})
+        db.execute(update(Subscription), rows)
+    
+    deleted_ids = [op.id for op in operations if op.op == "delete"]
+    if deleted_ids:
+        db.execute(
+            delete(Subscription).where(Subscription.id.in_(deleted_ids)),
+            execution_options={"synchronize_session": False}
+        )
+    
+    bump_version(db, user_id)
+    timed_commit(db, "batch")
+    publish_change(db, user_id, "subscriptions", {
+        "action": "batch",
+        "created": created_ids,
+        "updated": [op.id for op in updates],
+        "deleted": deleted_ids
+    })
     
-    db.commit()
+    written = {
+        row.id: SubscriptionResponse.model_validate(row).model_dump()
+        for row in db.query(Subscription).filter(
+            Subscription.id.in_(created_ids + [op.id for op in updates])
+        )
+    }
+    new_ids = iter(created_ids)
+    results: List[Dict] = []
+    for index, op in enumerate(operations):
+        sub_id = next(new_ids) if op.op == "create" else op.id
+        result = {"index": index, "op": op.op, "id": sub_id, "status": f"{op.op}d"}
+        if op.op != "delete":
+            result["subscription"] = written[sub_id]
+        results.append(result)
     
     return {
         "status": "success",
-        "detected_count": len(detected),
-        "created_count": created_count,
-        "subscriptions": detected
+        "created_count": len(created_ids),
+        "updated_count": len(updates),
+        "deleted_count": len(deleted_ids),
+        "results": results
     }
 
 
@@ -147,6 +392,7 @@ def detect_subscriptions(
 def calculate_subscription_proration(
     subscription_id: int,
     request: ProrationRequest,
+    user_id: int,
     db: Session = Depends(get_db)
 ):
     """
@@ -155,17 +401,13 @@ def calculate_subscription_proration(
     Args:
         subscription_id: Subscription ID
         request: Proration request with cancellation date
+        user_id: Owner of the subscription (also selects the shard)
         db: Database session
         
     Returns:
         Proration calculation details
     """
-    subscription = db.query(Subscription).filter(
-        Subscription.id == subscription_id
-    ).first()
-    
-    if not subscription:
-        raise HTTPException(status_code=404, detail="Subscription not found")
+    subscription = owned_subscription(db, subscription_id, user_id)
     
     # Calculate proration
     result = calculate_proration(
@@ -184,6 +426,7 @@ def calculate_subscription_proration(
 @router.post("", response_model=SubscriptionResponse)
 def create_subscription(
     subscription: SubscriptionCreate,
+    user_id: int = 1,
     db: Session = Depends(get_db)
 ):
     """
@@ -191,15 +434,28 @@ def create_subscription(
     
     Args:
         subscription: Subscription data
+        user_id: User ID the request is routed by; must be the
+            subscription's user_id
         db: Database session
         
     Returns:
         Created subscription
     """
+    if subscription.user_id != user_id:
+        raise HTTPException(
+            status_code=400,
+            detail="subscription.user_id must match user_id"
+        )
+    error = unsupported_currency(subscription.currency)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    
     db_subscription = Subscription(**subscription.dict())
     db.add(db_subscription)
-    db.commit()
+    bump_version(db, db_subscription.user_id)
+    timed_commit(db, "create")
     db.refresh(db_subscription)
+    publish_change(db, db_subscription.user_id, "subscriptions", {"action": "create", "created": [db_subscription.id]})
     return db_subscription
 
 
@@ -207,6 +463,7 @@ def create_subscription(
 def update_subscription(
     subscription_id: int,
     subscription_update: SubscriptionUpdate,
+    user_id: int,
     db: Session = Depends(get_db)
 ):
     """
@@ -215,31 +472,33 @@ def update_subscription(
     Args:
         subscription_id: Subscription ID
         subscription_update: Updated fields
+        user_id: Owner of the subscription (also selects the shard)
         db: Database session
         
     Returns:
         Updated subscription
     """
-    db_subscription = db.query(Subscription).filter(
-        Subscription.id == subscription_id
-    ).first()
-    
-    if not db_subscription:
-        raise HTTPException(status_code=404, detail="Subscription not found")
+    db_subscription = owned_subscription(db, subscription_id, user_id)
+    error = unsupported_currency(subscription_update.currency)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     
     # Update fields
     update_data = subscription_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_subscription, field, value)
     
-    db.commit()
+    bump_version(db, db_subscription.user_id)
+    timed_commit(db, "update")
     db.refresh(db_subscription)
+    publish_change(db, db_subscription.user_id, "subscriptions", {"action": "update", "updated": [db_subscription.id]})
     return db_subscription
 
 
 @router.delete("/{subscription_id}")
 def delete_subscription(
     subscription_id: int,
+    user_id: int,
     db: Session = Depends(get_db)
 ):
     """
@@ -247,19 +506,17 @@ def delete_subscription(
     
     Args:
         subscription_id: Subscription ID
+        user_id: Owner of the subscription (also selects the shard)
         db: Database session
         
     Returns:
         Success message
     """
-    db_subscription = db.query(Subscription).filter(
-        Subscription.id == subscription_id
-    ).first()
-    
-    if not db_subscription:
-        raise HTTPException(status_code=404, detail="Subscription not found")
+    db_subscription = owned_subscription(db, subscription_id, user_id)
     
     db.delete(db_subscription)
-    db.commit()
+    bump_version(db, user_id)
+    timed_commit(db, "delete")
+    publish_change(db, user_id, "subscriptions", {"action": "delete", "deleted": [subscription_id]})
     
     return {"status": "success", "message": "Subscription deleted"}
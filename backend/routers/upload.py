@@ -1,79 +1,174 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
-from backend.database import get_db
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from backend.database import SNAPSHOT_DIR, get_db
 from backend.models.transaction import Transaction, TransactionResponse
 from backend.utils.parser import parse_csv
-from typing import List
+from backend.utils.activity import record_activity
+from backend.utils.admission import declared_size, upload_admission
+from backend.utils.detection import invalidate_detection
+from backend.utils.events import broker
+from backend.utils.serialization import models_response
+from backend.utils.metrics import timed, timed_commit, count_rows
+from backend.utils.profiling import ProfiledRoute, run_in_threadpool_profiled
+from backend.utils.versioning import get_version, bump_version
+from backend.utils.etag import (
+    compute_etag,
+    is_not_modified,
+    not_modified_response,
+    cache_headers
+)
+from typing import Dict, List, Tuple
 
-router = APIRouter(prefix="/api", tags=["upload"])
+router = APIRouter(
+    prefix="/api",
+    tags=["upload"],
+    route_class=ProfiledRoute
+)
 
 
-@router.post("/upload", response_model=dict)
+@router.post(
+    "/upload",
+    response_model=dict,
+    # The form is read by hand, after admission; describe it for the docs
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"]
+    }}}}}
+)
 async def upload_csv(
-    file: UploadFile = File(...),
+    request: Request,
     user_id: int = 1,  # Default user for demo
     db: Session = Depends(get_db)
 ):
     """
     Upload and parse CSV file containing bank transactions
     
+    The multipart body (field "file") is only read once admission control
+    has accepted its declared Content-Length, so an oversized or
+    unadmitted upload is rejected before any of it is spooled.
+    
     Args:
-        file: CSV file upload
+        request: Request carrying the CSV file upload
         user_id: User ID (default 1 for demo)
         db: Database session
         
     Returns:
-        Dictionary with upload status and transaction count
+        Dictionary with upload status, transaction count and the rows
+        skipped per currency missing from the FX rate table
     """
-    # Validate file type
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
+    # Bound memory and writer contention before the body is read
+    async with upload_admission.admit(user_id, declared_size(request)):
+        form = await request.form()
+        try:
+            file = form.get("file")
+            # Validate file type
+            if not isinstance(file, StarletteUploadFile):
+                raise HTTPException(status_code=400, detail="Missing CSV file in form field 'file'")
+            if not (file.filename or "").endswith('.csv'):
+                raise HTTPException(status_code=400, detail="File must be a CSV")
+            
+            try:
+                # Read file content
+                content = await file.read()
+                file_content = content.decode('utf-8')
+                broker.publish(user_id, "upload", {"stage": "received", "filename": file.filename, "bytes": len(content)})
+                del content
+                
+                # Parsing and database writes block; keep them off the event loop
+                # so read endpoints stay responsive during upload spikes
+                stored_count, skipped_currencies = await run_in_threadpool_profiled(
+                    ingest_csv, db, user_id, file_content
+                )
+                
+            except HTTPException:
+                db.rollback()
+                raise
+            except Exception as e:
+                db.rollback()
+                raise HTTPException(
+                    status_code=500, 
+                    detail=f"Error processing file: {str(e)}"
+                )
+        finally:
+            # Drop the spooled upload now rather than at garbage collection
+            await form.close()
     
-    try:
-        # Read file content
-        content = await file.read()
-        file_content = content.decode('utf-8')
-        
-        # Parse CSV
-        parsed_transactions = parse_csv(file_content)
-        
-        if not parsed_transactions:
-            raise HTTPException(
-                status_code=400, 
-                detail="No valid transactions found in CSV"
-            )
-        
-        # Store transactions in database
-        stored_count = 0
-        for txn_data in parsed_transactions:
-            transaction = Transaction(
-                date=txn_data['date'],
-                description=txn_data['description'],
-                amount=txn_data['amount'],
-                user_id=user_id
-            )
-            db.add(transaction)
-            stored_count += 1
-        
-        db.commit()
-        
-        return {
-            "status": "success",
-            "message": f"Successfully uploaded and parsed {stored_count} transactions",
-            "transaction_count": stored_count,
-            "filename": file.filename
-        }
+    return {
+        "status": "success",
+        "message": f"Successfully uploaded and parsed {stored_count} transactions",
+        "transaction_count": stored_count,
+        "skipped_currencies": skipped_currencies,
+        "filename": file.filename
+    }
+
+
+def ingest_csv(db: Session, user_id: int, file_content: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Parse CSV content and store the transactions
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        file_content: Decoded CSV content
         
-    except Exception as e:
-        db.rollback()
+    Returns:
+        Number of transactions stored, and the number of rows skipped per
+        currency missing from the FX rate table
+    """
+    # Parse CSV
+    skipped_currencies: Dict[str, int] = {}
+    with timed("parse_csv"):
+        parsed_transactions = parse_csv(file_content, skipped_currencies)
+    
+    if not parsed_transactions:
+        detail = "No valid transactions found in CSV"
+        if skipped_currencies:
+            from backend.utils.fx import supported_currencies
+            found = ", ".join(f"{code} ({count} rows)" for code, count in sorted(skipped_currencies.items()))
+            detail += f"; unsupported currencies: {found}. Supported currencies: {', '.join(sorted(supported_currencies()))}"
         raise HTTPException(
-            status_code=500, 
-            detail=f"Error processing file: {str(e)}"
+            status_code=400, 
+            detail=detail
         )
+    broker.publish(user_id, "upload", {"stage": "parsed", "transaction_count": len(parsed_transactions)})
+    
+    # Store transactions in database
+    stored_count = 0
+    for txn_data in parsed_transactions:
+        transaction = Transaction(
+            date=txn_data['date'],
+            description=txn_data['description'],
+            amount=txn_data['amount'],
+            currency=txn_data['currency'],
+            user_id=user_id
+        )
+        db.add(transaction)
+        stored_count += 1
+    
+    # Keep the per-merchant last-seen index current
+    record_activity(db, user_id, parsed_transactions)
+    invalidate_detection(db, user_id)
+    
+    bump_version(db, user_id)
+    timed_commit(db, "upload")
+    count_rows("upload", stored_count)
+    broker.publish(
+        user_id, "upload", {"stage": "stored", "transaction_count": stored_count},
+        version=get_version(db, user_id) if broker.has_listeners(user_id) else None
+    )
+    
+    if SNAPSHOT_DIR:
+        from backend.utils.snapshots import append_snapshot
+        with timed("snapshot_append"):
+            append_snapshot(db, user_id, parsed_transactions)
+    return stored_count, skipped_currencies
 
 
 @router.get("/transactions", response_model=List[TransactionResponse])
 def get_transactions(
+    request: Request,
     user_id: int = 1,
     skip: int = 0,
     limit: int = 100,
@@ -83,6 +178,7 @@ def get_transactions(
     Get all transactions for a user
     
     Args:
+        request: Incoming request (used for conditional GET)
         user_id: User ID
         skip: Number of records to skip
         limit: Maximum number of records to return
@@ -91,8 +187,13 @@ def get_transactions(
     Returns:
         List of transactions
     """
+    etag = compute_etag(request, get_version(db, user_id))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
     transactions = db.query(Transaction).filter(
         Transaction.user_id == user_id
     ).offset(skip).limit(limit).all()
     
-    return transactions
+    count_rows("export", len(transactions))
+    return models_response(TransactionResponse, transactions, cache_headers(etag))
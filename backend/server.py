@@ -0,0 +1,52 @@
+"""
+Production server launcher
+
+Runs uvicorn with several worker processes and no reload. The schema is
+created/upgraded once here, before the workers start, so workers do not race
+on DDL; each worker then only warms its caches (see backend.utils.warmup)
+and reports ready on /ready. The app is passed as an import string, so this
+parent process never imports the routers itself.
+
+Usage:
+    python -m backend.server --workers 4 --port 8000
+"""
+import argparse
+import os
+import time
+
+DEFAULT_WORKERS = int(os.environ.get("SUBSMART_WORKERS", os.cpu_count() or 1))
+
+
+def main():
+    launch_time = time.time()
+
+    parser = argparse.ArgumentParser(description="SubSmart production server")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Worker processes (default: SUBSMART_WORKERS or CPU count)")
+    parser.add_argument("--host", default=os.environ.get("SUBSMART_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SUBSMART_PORT", "8000")))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    from backend.database import init_db, shards
+
+    init_db()
+    # Workers open their own connections; don't carry pooled ones across
+    shards.dispose()
+
+    os.environ["SUBSMART_SKIP_INIT_DB"] = "1"
+    os.environ["SUBSMART_LAUNCH_TIME"] = str(launch_time)
+
+    import uvicorn
+    uvicorn.run(
+        "backend.app:app",
+        host=args.host,
+        port=args.port,
+        workers=max(1, args.workers),
+        log_level=args.log_level,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+# Tests import the backend package from the repository root, so they run
+# both from there and from backend/ (as in the README)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault(
+    "SUBSMART_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='subsmart-tests-'), 'test.db')}"
+)
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The API with its startup hook run (schema created, caches warm)"""
+    from fastapi.testclient import TestClient
+    from backend.app import app
+    
+    with TestClient(app):
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    """Test client on an empty database"""
+    from fastapi.testclient import TestClient
+    from backend.database import Base, shards
+    
+    def clear(index, db):
+        for table in reversed(Base.metadata.sorted_tables):
+            db.execute(table.delete())
+        db.commit()
+    
+    shards.for_each_shard(clear)
+    return TestClient(app)
+
+
+@pytest.fixture
+def db(client):
+    """Session on user 1's shard"""
+    from backend.database import shards
+    
+    session = shards.session_for(1)
+    yield session
+    session.close()
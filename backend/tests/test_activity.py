@@ -0,0 +1,35 @@
+from datetime import date
+from types import SimpleNamespace
+from backend.utils.activity import lapsed_score, rank_lapsed, summarize_activity
+
+
+def subscription(id, merchant_name, frequency="monthly", monthly_cost=10.0):
+    return SimpleNamespace(
+        id=id, merchant_name=merchant_name, amount=monthly_cost, currency="USD",
+        frequency=frequency, monthly_cost=monthly_cost, start_date=date(2023, 1, 1)
+    )
+
+
+def activity(charges):
+    rows = summarize_activity(charges)
+    return {key: SimpleNamespace(**entry) for key, entry in rows.items()}
+
+
+def test_on_schedule_subscription_scores_zero():
+    index = activity([{"description": "NETFLIX", "date": date(2024, 5, 1), "amount": 15.99}])
+    assert lapsed_score("monthly", index["netflix"], date(2024, 5, 20)) == 0.0
+    assert lapsed_score("monthly", None, date(2024, 5, 20)) is None
+
+
+def test_only_subscriptions_that_stopped_charging_are_flagged():
+    index = activity([
+        {"description": "Netflix", "date": date(2024, 5, 1), "amount": 15.99},
+        {"description": "Spotify", "date": date(2024, 1, 3), "amount": 9.99},
+        {"description": "Hulu", "date": date(2024, 2, 3), "amount": 12.99},
+    ])
+    subs = [subscription(1, "Netflix"), subscription(2, "Spotify"), subscription(3, "Hulu")]
+    
+    flagged = rank_lapsed(subs, index, date(2024, 5, 20))
+    
+    assert [sub["id"] for sub in flagged] == [2, 3]
+    assert flagged[0]["reason"].startswith("Stopped charging")
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend.utils.admission import AdmissionController, upload_admission
+
+
+def run_upload(app, headers):
+    """Drive POST /api/upload directly, recording whether the body was read"""
+    body_read = []
+    sent = []
+    
+    async def receive():
+        body_read.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/upload",
+        "raw_path": b"/api/upload",
+        "root_path": "",
+        "query_string": b"user_id=1",
+        "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    return start["status"], bool(body_read)
+
+
+def test_oversized_upload_is_rejected_before_the_body_is_read(app, client):
+    status, body_read = run_upload(app, {
+        "content-type": "multipart/form-data; boundary=x",
+        "content-length": str(upload_admission.budget_bytes + 1),
+    })
+    
+    assert status == 413
+    assert not body_read
+
+
+def test_upload_without_content_length_is_not_admitted(app, client):
+    status, body_read = run_upload(app, {"content-type": "multipart/form-data; boundary=x"})
+    
+    assert status == 411
+    assert not body_read
+
+
+def test_upload_within_budget_is_admitted(client):
+    response = client.post(
+        "/api/upload?user_id=1",
+        files={"file": ("statement.csv", b"date,description,amount\n2024-01-15,Netflix,15.99\n", "text/csv")}
+    )
+    
+    assert response.status_code == 200, response.text
+    assert upload_admission.inflight_bytes == 0
+
+
+def test_user_at_limit_gets_429_with_retry_after():
+    controller = AdmissionController(budget_bytes=100, per_user=1, queue_size=4, queue_timeout=1)
+    
+    async def scenario():
+        async with controller.admit(1, 10):
+            with pytest.raises(HTTPException) as rejected:
+                async with controller.admit(1, 10):
+                    pass
+            # Other users are unaffected
+            async with controller.admit(2, 10):
+                pass
+        return rejected.value
+    
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert int(rejected.headers["Retry-After"]) >= 1
+
+
+def test_full_queue_gets_429_and_waiters_are_admitted_in_turn():
+    controller = AdmissionController(budget_bytes=100, per_user=4, queue_size=1, queue_timeout=5)
+    
+    async def scenario():
+        release = asyncio.Event()
+        
+        async def hold(user_id):
+            async with controller.admit(user_id, 100):
+                await release.wait()
+        
+        holder = asyncio.create_task(hold(1))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold(2))
+        await asyncio.sleep(0)
+        assert controller.waiting == 1
+        
+        with pytest.raises(HTTPException) as rejected:
+            async with controller.admit(3, 100):
+                pass
+        
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return rejected.value
+    
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.detail == "Upload queue is full"
+    assert controller.inflight_bytes == 0 and controller.waiting == 0
+
+
+def test_wait_times_out_with_429():
+    controller = AdmissionController(budget_bytes=100, per_user=4, queue_size=4, queue_timeout=0.05)
+    
+    async def scenario():
+        async with controller.admit(1, 60):
+            with pytest.raises(HTTPException) as rejected:
+                async with controller.admit(2, 60):
+                    pass
+        return rejected.value
+    
+    assert asyncio.run(scenario()).status_code == 429
+    assert controller.inflight_bytes == 0
@@ -0,0 +1,87 @@
+import pytest
+
+from backend.models.subscription import Subscription
+from backend.tests.test_subscriptions import NETFLIX, create
+
+
+def batch(client, operations, user_id=1):
+    return client.post(f"/api/subscriptions/batch?user_id={user_id}", json={"operations": operations})
+
+
+def listing(client, user_id=1):
+    return sorted(
+        (s["merchant_name"], s["amount"])
+        for s in client.get(f"/api/subscriptions?user_id={user_id}").json()
+    )
+
+
+def test_mixed_batch_applies_every_operation(client):
+    keep = create(client, merchant_name="Hulu", amount=7.99)
+    gone = create(client, merchant_name="Disney", amount=8.99)
+    
+    response = batch(client, [
+        {"op": "create", "subscription": {**NETFLIX, "amount": 120.0, "frequency": "yearly"}},
+        {"op": "update", "id": keep["id"], "changes": {"amount": 9.99}},
+        {"op": "delete", "id": gone["id"]},
+    ])
+    
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["created_count"], body["updated_count"], body["deleted_count"]) == (1, 1, 1)
+    assert [r["status"] for r in body["results"]] == ["created", "updated", "deleted"]
+    # Bulk writes compute the normalized monthly cost themselves
+    assert body["results"][0]["subscription"]["monthly_cost"] == 10.0
+    assert body["results"][1]["subscription"]["monthly_cost"] == 9.99
+    assert listing(client) == [("Hulu", 9.99), ("Netflix", 120.0)]
+
+
+@pytest.mark.parametrize("bad_operation", [
+    {"op": "update", "id": 999999, "changes": {"amount": 1.0}},
+    {"op": "create", "subscription": {**NETFLIX, "user_id": 2}},
+    {"op": "create", "subscription": {**NETFLIX, "currency": "SEK"}},
+    {"op": "delete", "id": "KEEP"},
+], ids=["missing id", "other user", "unsupported currency", "duplicate id"])
+def test_one_invalid_operation_rejects_the_whole_batch(client, bad_operation):
+    keep = create(client, merchant_name="Hulu", amount=7.99)
+    if bad_operation.get("id") == "KEEP":
+        bad_operation = {**bad_operation, "id": keep["id"]}
+    before = listing(client)
+    
+    response = batch(client, [
+        {"op": "create", "subscription": {**NETFLIX, "merchant_name": "Spotify"}},
+        {"op": "delete", "id": keep["id"]},
+        bad_operation,
+    ])
+    
+    assert response.status_code == 400
+    assert [error["index"] for error in response.json()["detail"]] == [2]
+    assert listing(client) == before
+
+
+def test_other_users_subscriptions_are_not_found(client):
+    theirs = create(client, user_id=2, merchant_name="Hulu")
+    
+    response = batch(client, [{"op": "delete", "id": theirs["id"]}], user_id=1)
+    
+    assert response.status_code == 400
+    assert listing(client, user_id=2) == [("Hulu", 15.99)]
+
+
+def test_failure_during_writes_rolls_back_everything(client, db, monkeypatch):
+    from backend.routers import subscriptions
+    
+    keep = create(client, merchant_name="Hulu", amount=7.99)
+    
+    def fail(db, user_id):
+        raise RuntimeError("disk full")
+    
+    # Fails after the bulk insert, update and delete have run
+    monkeypatch.setattr(subscriptions, "bump_version", fail)
+    with pytest.raises(RuntimeError):
+        batch(client, [
+            {"op": "create", "subscription": NETFLIX},
+            {"op": "update", "id": keep["id"], "changes": {"amount": 9.99}},
+        ])
+    
+    rows = db.query(Subscription.merchant_name, Subscription.amount).filter(Subscription.user_id == 1).all()
+    assert [tuple(row) for row in rows] == [("Hulu", 7.99)]
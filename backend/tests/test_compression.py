@@ -0,0 +1,37 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from backend.middleware.compression import CompressionMiddleware, choose_encoding
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=10)
+    
+    @app.get("/text")
+    def text():
+        return PlainTextResponse("subscription " * 200)
+    
+    @app.get("/events")
+    def events():
+        frames = (b"event: upload\ndata: {}\n\n" for _ in range(100))
+        return StreamingResponse(frames, media_type="text/event-stream")
+    
+    return app
+
+
+def test_choose_encoding_skips_refused_codings():
+    assert choose_encoding("gzip;q=0, deflate") == ""
+    assert choose_encoding("deflate, gzip") == "gzip"
+
+
+def test_large_bodies_are_gzipped():
+    response = TestClient(make_app()).get("/text", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text == "subscription " * 200
+
+
+def test_event_streams_are_not_compressed():
+    response = TestClient(make_app()).get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.content.count(b"event: upload") == 100
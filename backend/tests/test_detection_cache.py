@@ -0,0 +1,71 @@
+from datetime import date
+
+from backend.models.detection_cache import DetectionCache
+from backend.models.transaction import Transaction
+from backend.utils import detection
+
+
+def statement(merchant, amount, months):
+    rows = "".join(f"2024-{m:02d}-15,{merchant},{amount}\n" for m in months)
+    return "date,description,amount\n" + rows
+
+
+def upload(client, content):
+    response = client.post(
+        "/api/upload?user_id=1",
+        files={"file": ("statement.csv", content.encode(), "text/csv")}
+    )
+    assert response.status_code == 200, response.text
+
+
+def detect(client):
+    response = client.post("/api/subscriptions/detect?user_id=1")
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def merchants(result):
+    return sorted(sub["merchant_name"] for sub in result["subscriptions"])
+
+
+def test_unchanged_transactions_reuse_the_cached_result(client):
+    upload(client, statement("Netflix", 15.99, range(1, 7)))
+    
+    first = detect(client)
+    second = detect(client)
+    
+    assert first["cached"] is False and first["created_count"] == 1
+    assert second["cached"] is True and second["created_count"] == 0
+    assert second["subscriptions"] == first["subscriptions"]
+
+
+def test_upload_invalidates_the_cache(client, db):
+    upload(client, statement("Netflix", 15.99, range(1, 7)))
+    detect(client)
+    
+    upload(client, statement("Spotify", 9.99, range(1, 7)))
+    
+    assert db.get(DetectionCache, 1) is None
+    result = detect(client)
+    assert result["cached"] is False
+    assert len(merchants(result)) == 2
+
+
+def test_writes_that_skip_invalidation_still_miss(client, db):
+    upload(client, statement("Netflix", 15.99, range(1, 7)))
+    detect(client)
+    
+    # A write path that forgets invalidate_detection() changes the fingerprint
+    db.add(Transaction(user_id=1, date=date(2024, 7, 15), description="Netflix", amount=15.99))
+    db.commit()
+    
+    assert detect(client)["cached"] is False
+
+
+def test_detector_version_change_misses(client, monkeypatch):
+    upload(client, statement("Netflix", 15.99, range(1, 7)))
+    detect(client)
+    
+    monkeypatch.setattr(detection, "DETECTOR_VERSION", detection.DETECTOR_VERSION + 1)
+    
+    assert detect(client)["cached"] is False
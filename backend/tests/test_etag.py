@@ -0,0 +1,44 @@
+import pytest
+
+from backend.tests.test_subscriptions import create
+
+
+@pytest.mark.parametrize("path", [
+    "/api/subscriptions?user_id=1",
+    "/api/transactions?user_id=1",
+    "/api/insights?user_id=1",
+])
+def test_unchanged_data_revalidates_with_304(client, path):
+    first = client.get(path)
+    etag = first.headers["ETag"]
+    
+    again = client.get(path, headers={"If-None-Match": etag})
+    
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+    assert client.get(path, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+
+def test_writes_change_the_etag(client):
+    path = "/api/subscriptions?user_id=1"
+    etag = client.get(path).headers["ETag"]
+    
+    create(client, user_id=1)
+    
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 1
+
+
+def test_etag_is_per_user_and_per_query(client):
+    etag = client.get("/api/subscriptions?user_id=2").headers["ETag"]
+    
+    # Another user's write leaves user 2's version alone
+    create(client, user_id=1)
+    
+    assert client.get("/api/subscriptions?user_id=2", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(
+        "/api/subscriptions?user_id=2&status=active", headers={"If-None-Match": etag}
+    ).status_code == 200
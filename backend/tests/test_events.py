@@ -0,0 +1,31 @@
+import asyncio
+from backend.utils.events import RESYNC_FRAME, EventBroker
+
+
+def test_publish_fans_out_and_records_the_announced_version():
+    async def run():
+        broker = EventBroker()
+        async with broker.subscribe(1) as first, broker.subscribe(1) as second:
+            broker.publish(1, "subscriptions", {"action": "create"}, version=4)
+            broker.publish(2, "subscriptions", {"action": "create"}, version=9)
+            frames = [first.get_nowait(), second.get_nowait()]
+            assert frames[0] == frames[1]
+            assert b"event: subscriptions" in frames[0]
+            assert broker.announced_version(1) == 4
+            assert broker.announced_version(2) == 0
+        assert not broker.has_listeners(1)
+        assert broker.announced_version(1) == 0
+    
+    asyncio.run(run())
+
+
+def test_slow_stream_is_told_to_resync():
+    async def run():
+        broker = EventBroker(queue_size=2)
+        async with broker.subscribe(1) as queue:
+            for i in range(3):
+                broker.publish(1, "upload", {"stage": i})
+            assert queue.qsize() == 1
+            assert queue.get_nowait() == RESYNC_FRAME
+    
+    asyncio.run(run())
@@ -0,0 +1,49 @@
+from datetime import date
+from types import SimpleNamespace
+import pytest
+from backend.utils.forecast import forecast_scenarios
+from backend.utils.fx import convert
+from backend.utils.proration import estimate_annual_savings
+
+
+def subscription(id, amount, frequency="monthly", currency="USD"):
+    cost = {"monthly": amount, "yearly": amount / 12, "weekly": amount * 52 / 12}[frequency]
+    return SimpleNamespace(
+        id=id, amount=amount, frequency=frequency, currency=currency, monthly_cost=cost,
+        start_date=date(2023, 1, 10), next_billing_date=None
+    )
+
+
+def test_estimate_annual_savings_converts_and_skips_unknown_currencies():
+    on = date(2024, 3, 1)
+    estimate = estimate_annual_savings([
+        {"amount": 10.0, "frequency": "monthly", "currency": "USD"},
+        {"amount": 120.0, "frequency": "yearly", "currency": "EUR"},
+        {"amount": 5.0, "frequency": "monthly", "currency": "SEK"},
+    ], "USD", on)
+    
+    eur = float(convert([10.0], ["EUR"], "USD", on)[0])
+    assert estimate["total_monthly_cost"] == pytest.approx(10.0 + eur, abs=0.01)
+    assert estimate["total_yearly_cost"] == pytest.approx((10.0 + eur) * 12, abs=0.01)
+    assert estimate["unconverted_currencies"] == ["SEK"]
+
+
+def test_estimate_annual_savings_prefers_stored_monthly_cost():
+    estimate = estimate_annual_savings([{"amount": 10.0, "frequency": "weekly", "monthly_cost": 40.0}])
+    assert estimate["total_yearly_cost"] == 480.0
+    assert estimate_annual_savings([])["average_per_subscription"] == 0
+
+
+def test_scenarios_save_the_cancelled_subscriptions():
+    subs = [subscription(1, 15.99), subscription(2, 120.0, "yearly"), subscription(3, 10.0, "weekly")]
+    result = forecast_scenarios(subs, [{"name": "drop", "cancel": [1, 3]}], date(2024, 5, 1))
+    
+    baseline, scenario = result["baseline"], result["scenarios"][0]
+    expected = estimate_annual_savings([{"amount": 15.99}, {"amount": 10.0, "frequency": "weekly"}])
+    assert scenario["annual_savings"] == expected["total_yearly_cost"]
+    assert scenario["total_monthly_cost"] == 10.0
+    assert baseline["total_yearly_cost"] - scenario["total_yearly_cost"] == pytest.approx(scenario["annual_savings"])
+    # Only the yearly plan is left; it renews once, in January 2025
+    assert scenario["total"] == 120.0
+    assert scenario["monthly"][result["months"].index("Jan 2025")] == 120.0
+    assert len(baseline["monthly"]) == 12
@@ -0,0 +1,52 @@
+import pytest
+
+from backend.utils.frequency_bands import FREQUENCY_BANDS, FrequencyBand, compile_bands
+
+classify = compile_bands()
+
+
+@pytest.mark.parametrize("band", FREQUENCY_BANDS, ids=lambda band: band.frequency)
+def test_band_edges_are_inclusive(band):
+    assert classify([band.min_days] * 4) == (True, band.frequency)
+    assert classify([band.max_days] * 4) == (True, band.frequency)
+    assert classify([band.min_days - 1] * 4)[1] != band.frequency
+    assert classify([band.max_days + 1] * 4)[1] != band.frequency
+
+
+def test_typical_calendar_gaps():
+    assert classify([31, 28, 31, 30, 31]) == (True, "monthly")
+    assert classify([90, 92, 91]) == (True, "quarterly")
+    assert classify([365, 366]) == (True, "yearly")
+    assert classify([7, 7, 14, 14]) == (False, None)
+
+
+def test_share_threshold():
+    # 7 of 10 gaps monthly meets the default 0.7; 6 of 10 does not
+    assert classify([30] * 7 + [60] * 3) == (True, "monthly")
+    assert classify([30] * 6 + [60] * 4) == (False, None)
+
+
+def test_gaps_outside_every_band_and_empty_history():
+    assert classify([]) == (False, None)
+    assert classify([0, 1, 2]) == (False, None)
+    assert classify([1000, 5000]) == (False, None)
+    assert classify([-3]) == (False, None)
+
+
+def test_custom_bands():
+    fortnightly = compile_bands([FrequencyBand("fortnightly", 12, 16)], min_share=0.6)
+    
+    assert fortnightly([14, 14, 30]) == (True, "fortnightly")
+    assert fortnightly([30, 30]) == (False, None)
+
+
+@pytest.mark.parametrize("bands, min_share", [
+    ([FrequencyBand("a", 5, 10), FrequencyBand("b", 10, 20)], 0.7),
+    ([FrequencyBand("a", 10, 5)], 0.7),
+    ([FrequencyBand("a", -1, 5)], 0.7),
+    (FREQUENCY_BANDS, 0.5),
+    (FREQUENCY_BANDS, 1.5),
+])
+def test_invalid_configurations_are_rejected(bands, min_share):
+    with pytest.raises(ValueError):
+        compile_bands(bands, min_share)
@@ -0,0 +1,81 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from backend.utils.fx import convert, load_fx_table, supported_currencies
+
+RATES = """date,currency,usd_rate
+2024-01-01,EUR,1.10
+2024-07-01,EUR,1.20
+2024-01-01,GBP,1.25
+"""
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text(RATES)
+    return load_fx_table(str(path))
+
+
+def test_rate_applies_from_its_date_until_the_next(table):
+    days = [date(2024, 6, 30), date(2024, 7, 1), date(2025, 1, 1)]
+    
+    result = convert([10, 10, 10], ["EUR"] * 3, "USD", days, table=table)
+    
+    np.testing.assert_allclose(result, [11.0, 12.0, 12.0])
+
+
+def test_dates_before_the_first_rate_use_the_first_rate(table):
+    result = convert([10], ["EUR"], "USD", date(2020, 1, 1), table=table)
+    
+    np.testing.assert_allclose(result, [11.0])
+
+
+def test_cross_rates_go_through_usd_and_keep_input_order(table):
+    result = convert(
+        [12.5, 11.0, 5.0, 10.0], ["GBP", "EUR", "USD", "GBP"], "EUR", date(2024, 3, 1), table=table
+    )
+    
+    np.testing.assert_allclose(result, [12.5 * 1.25 / 1.10, 11.0, 5.0 / 1.10, 10.0 * 1.25 / 1.10])
+
+
+def test_unknown_currencies_raise_unless_missing_is_given(table):
+    with pytest.raises(ValueError):
+        convert([1.0, 2.0], ["EUR", "SEK"], "USD", date(2024, 3, 1), table=table)
+    with pytest.raises(ValueError):
+        convert([1.0], ["EUR"], "SEK", date(2024, 3, 1), table=table)
+    
+    result = convert([1.0, 2.0], ["EUR", "SEK"], "USD", date(2024, 3, 1), table=table, missing=0.0)
+    np.testing.assert_allclose(result, [1.1, 0.0])
+
+
+def test_supported_currencies_include_the_base_currency(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text(RATES)
+    
+    assert supported_currencies(str(path)) == {"USD", "EUR", "GBP"}
+
+
+def test_insights_totals_in_a_display_currency(client):
+    for merchant, amount, currency in [("Netflix", 11.0, "USD"), ("Spotify", 10.0, "EUR")]:
+        response = client.post("/api/subscriptions?user_id=1", json={
+            "user_id": 1,
+            "merchant_name": merchant,
+            "amount": amount,
+            "currency": currency,
+            "frequency": "monthly",
+            "start_date": "2024-01-01",
+        })
+        assert response.status_code == 200, response.text
+    
+    usd = client.get("/api/insights?user_id=1&currency=USD").json()
+    eur = client.get("/api/insights?user_id=1&currency=EUR").json()
+    
+    # Totals are converted at today's rate from the configured table
+    eur_in_usd = load_fx_table().usd_rates("EUR", np.array([date.today().toordinal()]))[0]
+    assert usd["currency"] == "USD" and eur["currency"] == "EUR"
+    assert usd["total_monthly_cost"] == pytest.approx(11.0 + 10.0 * eur_in_usd, abs=0.01)
+    assert eur["total_monthly_cost"] == pytest.approx(11.0 / eur_in_usd + 10.0, abs=0.01)
+    assert client.get("/api/insights?user_id=1&currency=SEK").status_code == 400
@@ -0,0 +1,86 @@
+import pytest
+
+from backend.utils.pagination import decode_cursor, encode_cursor
+
+# Ties on amount and missing billing dates exercise the id tie-breaker
+# and NULL ordering of the keyset filter
+PLANS = [
+    ("Netflix", 15.99, "2024-03-15"),
+    ("Spotify", 9.99, None),
+    ("Hulu", 9.99, "2024-03-01"),
+    ("Disney", 7.99, None),
+    ("Audible", 14.95, "2024-03-01"),
+    ("iCloud", 9.99, "2024-02-20"),
+    ("Dropbox", 11.99, None),
+]
+
+
+@pytest.fixture
+def subscriptions(client):
+    for name, amount, next_billing in PLANS:
+        response = client.post("/api/subscriptions?user_id=1", json={
+            "user_id": 1,
+            "merchant_name": name,
+            "amount": amount,
+            "frequency": "monthly",
+            "start_date": "2024-01-01",
+            "next_billing_date": next_billing,
+        })
+        assert response.status_code == 200, response.text
+    return client
+
+
+def pages(client, query, limit):
+    """Follow X-Next-Cursor to the end, returning each page's rows"""
+    result, cursor = [], None
+    while True:
+        url = f"/api/subscriptions?user_id=1&limit={limit}&{query}"
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = client.get(url)
+        assert response.status_code == 200, response.text
+        result.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return result
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "order=desc",
+    "sort=monthly_cost",
+    "sort=monthly_cost&order=desc",
+    "sort=next_billing_date",
+    "sort=next_billing_date&order=desc",
+    "sort=merchant_name",
+])
+def test_keyset_pages_match_the_unpaged_listing(subscriptions, query):
+    unpaged = subscriptions.get(f"/api/subscriptions?user_id=1&{query}").json()
+    
+    paged = pages(subscriptions, query, limit=2)
+    
+    assert [len(page) for page in paged] == [2, 2, 2, 1]
+    assert [s["id"] for page in paged for s in page] == [s["id"] for s in unpaged]
+
+
+def test_field_selection_pages_with_the_sort_key_left_out(subscriptions):
+    paged = pages(subscriptions, "sort=monthly_cost&fields=merchant_name", limit=3)
+    
+    rows = [row for page in paged for row in page]
+    assert all(set(row) == {"merchant_name"} for row in rows)
+    assert [row["merchant_name"] for row in rows] == [
+        "Disney", "Spotify", "Hulu", "iCloud", "Dropbox", "Audible", "Netflix"
+    ]
+
+
+def test_invalid_cursor_and_cursor_without_limit_are_rejected(subscriptions):
+    assert subscriptions.get("/api/subscriptions?user_id=1&limit=2&cursor=not-a-cursor").status_code == 400
+    cursor = encode_cursor(9.99, 1)
+    assert subscriptions.get(f"/api/subscriptions?user_id=1&cursor={cursor}").status_code == 400
+
+
+def test_cursor_round_trip():
+    from datetime import date
+    
+    assert decode_cursor(encode_cursor(date(2024, 3, 1), 7), is_date=True) == (date(2024, 3, 1), 7)
+    assert decode_cursor(encode_cursor(None, 3)) == (None, 3)
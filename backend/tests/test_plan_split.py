@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+from backend.utils.amount_clusters import cluster_amounts, split_plans
+from backend.utils.detect_recurring import detect_recurring_records
+from backend.utils.txn_record import TxnRecord
+
+
+def monthly(description, amount, day, months, year=2024):
+    return [TxnRecord(date(year + (m - 1) // 12, (m - 1) % 12 + 1, day), description, amount) for m in months]
+
+
+def by_date(*charges):
+    return sorted((record for group in charges for record in group), key=lambda r: r.date)
+
+
+def test_cluster_amounts_cuts_on_relative_steps():
+    amounts = [10.0, 15.99, 10.2, 16.0, 10.1, 100.0]
+    
+    clusters = cluster_amounts(amounts, gap=0.03)
+    
+    assert [[amounts[i] for i in cluster] for cluster in clusters] == [
+        [10.0, 10.1, 10.2], [15.99, 16.0], [100.0]
+    ]
+
+
+def test_concurrent_plans_are_split():
+    basic = monthly("SPOTIFY", 9.99, 1, range(1, 13))
+    family = monthly("SPOTIFY", 15.99, 15, range(1, 13))
+    
+    plans = split_plans(by_date(basic, family))
+    
+    assert [{r.amount for r in plan} for plan in plans] == [{9.99}, {15.99}]
+    assert [len(plan) for plan in plans] == [12, 12]
+
+
+def test_price_change_stays_one_plan():
+    charges = by_date(monthly("NETFLIX", 9.99, 5, range(1, 7)), monthly("NETFLIX", 11.99, 5, range(7, 13)))
+    
+    assert split_plans(charges) == [charges]
+
+
+def test_one_off_purchases_are_left_out_of_plans():
+    basic = monthly("APPLE", 2.99, 3, range(1, 13))
+    storage = monthly("APPLE", 9.99, 20, range(1, 13))
+    purchase = [TxnRecord(date(2024, 6, 9), "APPLE", 49.99)]
+    
+    plans = split_plans(by_date(basic, storage, purchase))
+    
+    assert len(plans) == 2
+    assert all(r.amount != 49.99 for plan in plans for r in plan)
+
+
+def test_single_price_history_is_not_split():
+    charges = monthly("HULU", 7.99, 10, range(1, 13))
+    
+    assert split_plans(charges) == [charges]
+    assert split_plans([]) == [[]]
+
+
+def test_detection_reports_each_plan():
+    weekly = [TxnRecord(date(2024, 1, 2) + timedelta(weeks=w), "SPOTIFY", 4.99) for w in range(52)]
+    family = monthly("SPOTIFY", 15.99, 15, range(1, 13))
+    
+    detected = detect_recurring_records(by_date(weekly, family))
+    
+    assert sorted(s["merchant_name"] for s in detected) == ["Spotify", "Spotify #2"]
+    assert sorted((s["frequency"], s["amount"]) for s in detected) == [("monthly", 15.99), ("weekly", 4.99)]
@@ -0,0 +1,21 @@
+import pstats
+
+from backend.utils import profiling
+
+
+def test_upload_profile_includes_threadpool_work(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    
+    response = client.post(
+        "/api/upload?user_id=1",
+        files={"file": ("statement.csv", b"date,description,amount\n2024-01-15,Netflix,15.99\n", "text/csv")},
+        headers={"X-Profile": "secret"}
+    )
+    
+    assert response.status_code == 200, response.text
+    profile_id = response.headers["X-Profile-Id"]
+    stats = pstats.Stats(str(tmp_path / f"{profile_id}.prof"))
+    functions = {name for _, _, name in stats.stats}
+    assert "upload_csv" in functions
+    assert {"ingest_csv", "parse_csv"} <= functions
@@ -0,0 +1,31 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.middleware.readiness import ReadinessGateMiddleware
+
+
+def make_app(state):
+    app = FastAPI()
+    app.add_middleware(ReadinessGateMiddleware, is_ready=lambda: state["ready"])
+    
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+    
+    @app.get("/api/insights")
+    def insights():
+        return {"total_monthly_cost": 0}
+    
+    return app
+
+
+def test_cold_worker_refuses_api_routes():
+    state = {"ready": False}
+    client = TestClient(make_app(state))
+    
+    response = client.get("/api/insights")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/health").status_code == 200
+    
+    state["ready"] = True
+    assert client.get("/api/insights").status_code == 200
@@ -0,0 +1,125 @@
+from datetime import date
+from backend import jobs
+from backend.benchmarks.synthetic import generate_dataset
+from backend.database import Base, ShardRouter, load_models, upgrade_schema
+from backend.models.merchant_rollup import MerchantMonthlyRollup
+from backend.models.transaction import Transaction
+from backend.models.user import User
+from backend.utils.rollups import rollup_totals
+
+
+def load_shard(tmp_path, rows, users):
+    """Shard with a shuffled synthetic history, as real uploads arrive"""
+    load_models()
+    router = ShardRouter([f"sqlite:///{tmp_path / 'compact.db'}"])
+    Base.metadata.create_all(bind=router.engines[0])
+    upgrade_schema(router.engines[0])
+    db = router.session_for(1)
+    for user_id, transactions, _ in generate_dataset(
+        rows, users, seed=7, start=date(2022, 1, 1), months=48
+    ):
+        db.add(User(id=user_id, email=f"user{user_id}@example.com", password="x"))
+        db.bulk_insert_mappings(
+            Transaction, [dict(t, user_id=user_id, currency="USD") for t in transactions]
+        )
+    db.commit()
+    db.close()
+    return router
+
+
+def test_compaction_never_grows_the_database(tmp_path, monkeypatch):
+    router = load_shard(tmp_path, rows=20000, users=10)
+    monkeypatch.setattr(jobs, "shards", router)
+    
+    report = jobs.compact_all_users(date(2024, 1, 1))
+    
+    assert report["rows_folded"] > 0
+    assert report["reclaimed_bytes"] >= 0
+    shard = report["shards"][0]
+    assert shard["after"]["bytes"] <= shard["before"]["bytes"]
+    
+    db = router.session_for(1)
+    try:
+        assert db.query(MerchantMonthlyRollup).count() > 0
+        assert db.query(Transaction).filter(Transaction.date < date(2024, 1, 1)).count() == 0
+    finally:
+        db.close()
+    router.dispose()
+
+
+def test_dry_run_writes_nothing(tmp_path, monkeypatch):
+    router = load_shard(tmp_path, rows=2000, users=2)
+    monkeypatch.setattr(jobs, "shards", router)
+    
+    report = jobs.compact_all_users(date(2024, 1, 1), dry_run=True)
+    
+    assert report["rows_folded"] > 0
+    db = router.session_for(1)
+    try:
+        assert db.query(Transaction).count() == 2000
+        assert db.query(MerchantMonthlyRollup).count() == 0
+    finally:
+        db.close()
+    router.dispose()
+
+
+def test_every_month_is_folded_and_currencies_are_kept_apart(tmp_path, monkeypatch):
+    load_models()
+    router = ShardRouter([f"sqlite:///{tmp_path / 'currencies.db'}"])
+    Base.metadata.create_all(bind=router.engines[0])
+    monkeypatch.setattr(jobs, "shards", router)
+    db = router.session_for(1)
+    db.add(User(id=1, email="user1@example.com", password="x"))
+    db.add_all([
+        Transaction(user_id=1, date=date(2023, 3, 5), description="NETFLIX", amount=15.99, currency="USD"),
+        Transaction(user_id=1, date=date(2023, 3, 9), description="NETFLIX", amount=13.99, currency="EUR"),
+        Transaction(user_id=1, date=date(2023, 4, 5), description="NETFLIX", amount=15.99, currency="USD"),
+    ])
+    db.commit()
+    
+    report = jobs.compact_all_users(date(2024, 1, 1), vacuum=False)
+    
+    assert report["rows_folded"] == 3
+    rollups = {
+        (r.month, r.currency): r
+        for r in db.query(MerchantMonthlyRollup).order_by(MerchantMonthlyRollup.month)
+    }
+    assert set(rollups) == {
+        (date(2023, 3, 1), "USD"), (date(2023, 3, 1), "EUR"), (date(2023, 4, 1), "USD")
+    }
+    single = rollups[(date(2023, 3, 1), "EUR")]
+    assert (single.charge_count, single.last_date, single.last_amount) == (1, date(2023, 3, 9), 13.99)
+    assert single.first_date is None and single.amount_total is None
+    db.close()
+    router.dispose()
+
+
+def test_upgrade_converts_rollups_of_the_earlier_layout(tmp_path):
+    load_models()
+    router = ShardRouter([f"sqlite:///{tmp_path / 'old.db'}"])
+    bind = router.engines[0]
+    with bind.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE merchant_monthly_rollups (user_id INTEGER NOT NULL, "
+            "merchant_key VARCHAR NOT NULL, month DATE NOT NULL, description VARCHAR NOT NULL, "
+            "currency VARCHAR(3) NOT NULL, charge_count INTEGER NOT NULL, "
+            "duplicate_count INTEGER NOT NULL, first_date DATE NOT NULL, last_date DATE NOT NULL, "
+            "first_amount FLOAT NOT NULL, last_amount FLOAT NOT NULL, amount_total FLOAT NOT NULL, "
+            "PRIMARY KEY (user_id, merchant_key, month))"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO merchant_monthly_rollups VALUES (1, 'gym', '2023-03-01', 'GYM', 'USD', "
+            "3, 0, '2023-03-02', '2023-03-30', 10.0, 10.5, 30.75)"
+        )
+    Base.metadata.create_all(bind=bind)
+    upgrade_schema(bind)
+    
+    db = router.session_for(1)
+    rollup = db.query(MerchantMonthlyRollup).one()
+    assert (rollup.month, rollup.first_date, rollup.last_date) == (
+        date(2023, 3, 1), date(2023, 3, 2), date(2023, 3, 30)
+    )
+    assert (rollup.first_amount, rollup.last_amount, rollup.amount_total) == (10.0, 10.5, 30.75)
+    assert rollup_totals(db, 1) == (3, 30.75, date(2023, 3, 2), date(2023, 3, 30))
+    db.close()
+    router.dispose()
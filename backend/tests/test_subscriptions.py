@@ -0,0 +1,32 @@
+NETFLIX = {
+    "user_id": 1,
+    "merchant_name": "Netflix",
+    "amount": 15.99,
+    "currency": "USD",
+    "frequency": "monthly",
+    "start_date": "2024-01-15",
+}
+
+
+def create(client, user_id=1, **fields):
+    response = client.post(
+        f"/api/subscriptions?user_id={user_id}",
+        json={**NETFLIX, "user_id": user_id, **fields}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_create_rejects_another_users_subscription(client):
+    response = client.post("/api/subscriptions?user_id=1", json={**NETFLIX, "user_id": 2})
+    assert response.status_code == 400
+    assert client.get("/api/subscriptions?user_id=2").json() == []
+
+
+def test_by_id_routes_check_ownership(client):
+    sub = create(client, user_id=1)
+    
+    assert client.get(f"/api/subscriptions/{sub['id']}?user_id=1").status_code == 200
+    assert client.get(f"/api/subscriptions/{sub['id']}?user_id=2").status_code == 404
+    assert client.delete(f"/api/subscriptions/{sub['id']}?user_id=2").status_code == 404
+    assert client.get(f"/api/subscriptions/{sub['id']}").status_code == 422
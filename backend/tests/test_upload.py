@@ -0,0 +1,31 @@
+STATEMENT = """date,description,amount,currency
+2024-01-15,Netflix,15.99,USD
+2024-02-15,Netflix,15.99,USD
+2024-01-20,Spotify,109.00,SEK
+2024-02-20,Spotify,109.00,SEK
+2024-01-22,Deliveroo,12.50,EUR
+"""
+
+
+def upload(client, content, user_id=1):
+    return client.post(
+        f"/api/upload?user_id={user_id}",
+        files={"file": ("statement.csv", content.encode(), "text/csv")}
+    )
+
+
+def test_unsupported_currency_rows_are_skipped_and_reported(client):
+    response = upload(client, STATEMENT)
+    
+    assert response.status_code == 200, response.text
+    assert response.json()["transaction_count"] == 3
+    assert response.json()["skipped_currencies"] == {"SEK": 2}
+    stored = client.get("/api/transactions?user_id=1").json()
+    assert sorted({t["currency"] for t in stored}) == ["EUR", "USD"]
+
+
+def test_file_with_only_unsupported_currencies_is_rejected(client):
+    response = upload(client, "date,description,amount,currency\n2024-01-20,Spotify,109.00,SEK\n")
+    
+    assert response.status_code == 400
+    assert "SEK (1 rows)" in response.json()["detail"]
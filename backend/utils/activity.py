@@ -0,0 +1,207 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import case, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from backend.models.merchant_activity import MerchantActivity
+from backend.utils.detect_recurring import normalize_merchant
+from backend.utils.proration import get_billing_cycle_days
+
+# Overdue billing cycles before a subscription is flagged as lapsed
+# (stopped charging). Statements show charges, not usage, so a lapsed
+# subscription is most likely cancelled or failing to bill, not unused.
+LAPSED_SCORE_THRESHOLD = 1.0
+
+# Rows per upsert statement, keeping bound parameters under SQLite's limit
+UPSERT_BATCH_SIZE = 1000
+
+
+def summarize_activity(transactions: Iterable) -> Dict[str, Dict]:
+    """
+    Aggregate transactions per merchant key
+
+    Args:
+        transactions: Objects or dicts with date, description, amount
+
+    Returns:
+        Dictionary of merchant_key -> first_seen, last_seen, charge_count,
+        last_amount
+    """
+    summary: Dict[str, Dict] = {}
+    for txn in transactions:
+        key = normalize_merchant(txn['description'])
+        if not key:
+            continue
+        txn_date = txn['date']
+        entry = summary.get(key)
+        if entry is None:
+            summary[key] = {
+                'first_seen': txn_date,
+                'last_seen': txn_date,
+                'charge_count': 1,
+                'last_amount': txn['amount'],
+            }
+            continue
+        entry['charge_count'] += 1
+        if txn_date < entry['first_seen']:
+            entry['first_seen'] = txn_date
+        if txn_date >= entry['last_seen']:
+            entry['last_seen'] = txn_date
+            entry['last_amount'] = txn['amount']
+    return summary
+
+
+def record_activity(db: Session, user_id: int, transactions: Iterable) -> int:
+    """
+    Merge newly ingested transactions into the activity index
+
+    Runs as part of the caller's transaction; commit afterwards.
+
+    Args:
+        db: Database session
+        user_id: User ID
+        transactions: New transactions (dicts or TxnRecords)
+
+    Returns:
+        Number of merchants touched
+    """
+    summary = summarize_activity(transactions)
+    _upsert(db, user_id, summary)
+    return len(summary)
+
+
+def _upsert(db: Session, user_id: int, summary: Dict[str, Dict]) -> None:
+    """Merge per-merchant summaries into the index, in batches"""
+    rows = [
+        {'user_id': user_id, 'merchant_key': key, **entry}
+        for key, entry in summary.items()
+    ]
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = insert(MerchantActivity).values(rows[start:start + UPSERT_BATCH_SIZE])
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MerchantActivity.user_id, MerchantActivity.merchant_key],
+            set_={
+                'first_seen': func.min(MerchantActivity.first_seen, excluded.first_seen),
+                'last_seen': func.max(MerchantActivity.last_seen, excluded.last_seen),
+                'charge_count': MerchantActivity.charge_count + excluded.charge_count,
+                'last_amount': case(
+                    (excluded.last_seen >= MerchantActivity.last_seen, excluded.last_amount),
+                    else_=MerchantActivity.last_amount
+                ),
+            }
+        )
+        db.execute(stmt)
+
+
+def rebuild_activity(db: Session, user_id: int, summary: Dict[str, Dict]) -> bool:
+    """
+    Resync a user's activity index with their full transaction history
+
+    Nothing is written when the stored index already matches.
+
+    Args:
+        db: Database session
+        user_id: User ID
+        summary: summarize_activity() over all of the user's transactions
+
+    Returns:
+        True if the index changed
+    """
+    stored = {
+        key: {
+            'first_seen': row.first_seen,
+            'last_seen': row.last_seen,
+            'charge_count': row.charge_count,
+            'last_amount': row.last_amount,
+        }
+        for key, row in load_activity(db, user_id).items()
+    }
+    if stored == summary:
+        return False
+
+    db.query(MerchantActivity).filter(
+        MerchantActivity.user_id == user_id
+    ).delete(synchronize_session=False)
+    _upsert(db, user_id, summary)
+    return True
+
+
+def load_activity(db: Session, user_id: int) -> Dict[str, MerchantActivity]:
+    """Activity index rows for a user, keyed by merchant key"""
+    return {
+        row.merchant_key: row
+        for row in db.query(MerchantActivity).filter(MerchantActivity.user_id == user_id)
+    }
+
+
+def lapsed_score(frequency: str, activity: Optional[MerchantActivity], today: date) -> Optional[float]:
+    """
+    Score how far a subscription is behind its billing schedule
+
+    The score is how many billing cycles (fractional) have passed since the
+    charge that should have followed the last one seen, so 0 means the
+    subscription is billing on schedule.
+
+    Args:
+        frequency: Billing frequency
+        activity: Activity row for the subscription's merchant
+        today: Reference date
+
+    Returns:
+        Overdue cycles, or None when there is no activity or the
+        frequency is unknown
+    """
+    cycle = get_billing_cycle_days(frequency or '')
+    if activity is None or not cycle:
+        return None
+    days_since = (today - activity.last_seen).days
+    return max(0.0, (days_since - cycle) / cycle)
+
+
+def rank_lapsed(
+    subscriptions: List,
+    activity: Dict[str, MerchantActivity],
+    today: date,
+    limit: int = 3
+) -> List[Dict]:
+    """
+    Rank subscriptions that have stopped charging from the activity index
+
+    These are marked active but have missed at least
+    LAPSED_SCORE_THRESHOLD billing cycles, so they have likely been
+    cancelled (or the payment method changed) without being updated here.
+
+    Args:
+        subscriptions: Active subscriptions
+        activity: Output of load_activity
+        today: Reference date
+        limit: Maximum number of results
+
+    Returns:
+        Flagged subscriptions, most overdue (then most expensive) first
+    """
+    flagged = []
+    for sub in subscriptions:
+        entry = activity.get(normalize_merchant(sub.merchant_name))
+        score = lapsed_score(sub.frequency, entry, today)
+        if score is None or score < LAPSED_SCORE_THRESHOLD:
+            continue
+        flagged.append((score, sub, entry))
+
+    flagged.sort(key=lambda f: (-f[0], -f[1].monthly_cost))
+    return [
+        {
+            "id": sub.id,
+            "merchant_name": sub.merchant_name,
+            "amount": sub.amount,
+            "currency": sub.currency,
+            "frequency": sub.frequency,
+            "start_date": sub.start_date.isoformat(),
+            "last_seen": entry.last_seen.isoformat(),
+            "charge_count": entry.charge_count,
+            "score": round(score, 2),
+            "reason": f"Stopped charging: no charge since {entry.last_seen.isoformat()}"
+        }
+        for score, sub, entry in flagged[:limit]
+    ]
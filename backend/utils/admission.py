@@ -0,0 +1,167 @@
+"""
+Admission control for ingestion endpoints
+
+Uploads hold the whole decoded file plus parsed rows in memory and contend
+for the SQLite writer, so the number and size of uploads in flight is
+bounded per worker process:
+
+- a global byte budget shared by all in-flight uploads
+- a per-user limit on uploads in flight or queued
+- a bounded wait queue; when it is full, or a request waits too long, the
+  request is rejected with 429 and a Retry-After hint
+
+Requests are admitted on their declared Content-Length, before the body
+is read, so a rejected upload costs no I/O. A body without a declared
+length could be any size and is refused (411).
+"""
+import asyncio
+import math
+import os
+import time
+from collections import Counter as Tally
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import HTTPException, Request
+from backend.utils.metrics import (
+    UPLOAD_INFLIGHT_BYTES,
+    UPLOAD_QUEUE_DEPTH,
+    UPLOAD_QUEUE_WAIT,
+    UPLOAD_REJECTED
+)
+
+UPLOAD_BUDGET_BYTES = int(float(os.environ.get("SUBSMART_UPLOAD_BUDGET_MB", "64")) * 1024 * 1024)
+UPLOAD_PER_USER = int(os.environ.get("SUBSMART_UPLOAD_PER_USER", "1"))
+UPLOAD_QUEUE_SIZE = int(os.environ.get("SUBSMART_UPLOAD_QUEUE", "16"))
+UPLOAD_QUEUE_TIMEOUT = float(os.environ.get("SUBSMART_UPLOAD_QUEUE_TIMEOUT", "30"))
+
+
+def declared_size(request: Request) -> Optional[int]:
+    """
+    Body size declared by the request's Content-Length header
+
+    Returns:
+        Size in bytes, or None when the header is missing or invalid
+        (for example a chunked upload)
+    """
+    try:
+        size = int(request.headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+    return size if size >= 0 else None
+
+
+class AdmissionController:
+    """
+    Byte budget, per-user limit and bounded queue for one kind of work
+
+    Usage:
+        async with controller.admit(user_id, size):
+            ...
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int,
+        per_user: int,
+        queue_size: int,
+        queue_timeout: float
+    ):
+        self.budget_bytes = budget_bytes
+        self.per_user = per_user
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.inflight_bytes = 0
+        self.waiting = 0
+        self._users = Tally()  # in flight + queued, per user
+        self._condition = None
+        # Smoothed time an admitted request holds its slot, for Retry-After
+        self._hold_seconds = 1.0
+
+    def _fits(self, size: int) -> bool:
+        return self.inflight_bytes + size <= self.budget_bytes
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait before retrying"""
+        return max(1, math.ceil(self._hold_seconds * (1 + self.waiting)))
+
+    def _reject(self, reason: str, detail: str) -> HTTPException:
+        UPLOAD_REJECTED.inc(reason=reason)
+        return HTTPException(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after())}
+        )
+
+    @asynccontextmanager
+    async def admit(self, user_id: int, size: Optional[int]):
+        """
+        Wait for room for a request of `size` bytes, then hold it
+
+        Args:
+            user_id: User ID
+            size: Declared body size; None (unknown) is never admitted
+
+        Raises:
+            HTTPException: 411 if size is unknown, 413 if it exceeds the
+                whole budget, 429 if the user is at their limit, the queue
+                is full or the wait times out
+        """
+        if size is None:
+            UPLOAD_REJECTED.inc(reason="no_length")
+            raise HTTPException(status_code=411, detail="Content-Length is required for uploads")
+        if size > self.budget_bytes:
+            UPLOAD_REJECTED.inc(reason="too_large")
+            raise HTTPException(
+                status_code=413,
+                detail=f"File exceeds the {self.budget_bytes // (1024 * 1024)} MB upload limit"
+            )
+        if self._users[user_id] >= self.per_user:
+            raise self._reject("per_user", "Too many uploads in progress for this user")
+        if self._condition is None:
+            # Created lazily so it binds to the running event loop
+            self._condition = asyncio.Condition()
+
+        self._users[user_id] += 1
+        try:
+            start = time.perf_counter()
+            async with self._condition:
+                if not self._fits(size):
+                    if self.waiting >= self.queue_size:
+                        raise self._reject("queue_full", "Upload queue is full")
+                    self.waiting += 1
+                    UPLOAD_QUEUE_DEPTH.set(self.waiting)
+                    try:
+                        await asyncio.wait_for(
+                            self._condition.wait_for(lambda: self._fits(size)),
+                            timeout=self.queue_timeout
+                        )
+                    except asyncio.TimeoutError:
+                        raise self._reject("timeout", "Timed out waiting for upload capacity")
+                    finally:
+                        self.waiting -= 1
+                        UPLOAD_QUEUE_DEPTH.set(self.waiting)
+                self.inflight_bytes += size
+                UPLOAD_INFLIGHT_BYTES.set(self.inflight_bytes)
+            UPLOAD_QUEUE_WAIT.observe(time.perf_counter() - start)
+
+            held = time.perf_counter()
+            try:
+                yield
+            finally:
+                self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * (time.perf_counter() - held)
+                async with self._condition:
+                    self.inflight_bytes -= size
+                    UPLOAD_INFLIGHT_BYTES.set(self.inflight_bytes)
+                    self._condition.notify_all()
+        finally:
+            self._users[user_id] -= 1
+            if not self._users[user_id]:
+                del self._users[user_id]
+
+
+upload_admission = AdmissionController(
+    UPLOAD_BUDGET_BYTES,
+    UPLOAD_PER_USER,
+    UPLOAD_QUEUE_SIZE,
+    UPLOAD_QUEUE_TIMEOUT
+)
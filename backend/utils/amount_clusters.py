@@ -0,0 +1,133 @@
+"""
+Separate plans billed under one merchant by amount
+
+Several plans at one merchant (two Spotify accounts, apps billed through
+an app store) interleave into one charge history with irregular gaps.
+Charges are clustered by amount with a sort-based 1-D pass: the sorted
+amounts are cut wherever one is more than AMOUNT_CLUSTER_GAP above the
+previous. A plan repeats the same price, so the cut is tight, and
+clusters with fewer than MIN_PLAN_CHARGES charges are one-off purchases
+rather than plans. The remaining clusters are chained in time. A cluster
+that starts after a plan has stopped billing continues it (a price
+change), while clusters that overlap in time are separate plans.
+Chaining is greedy interval partitioning over a heap of plan end
+positions; a continuing cluster picks the ended plan nearest in price
+by bisection. The whole stage is O(n log n).
+"""
+import bisect
+import heapq
+from typing import List, Optional, Sequence, Tuple
+from backend.utils.txn_record import TxnRecord
+
+# Relative step between consecutive sorted amounts that starts a new cluster
+AMOUNT_CLUSTER_GAP = 0.03
+
+# Charges an amount cluster needs to take part in a plan
+MIN_PLAN_CHARGES = 3
+
+# Share of a cluster's charges ignored at either end of its time span, so
+# a stray one-off at the same price does not make clusters overlap
+SPAN_TRIM = 0.05
+
+# Largest relative price change that continues an ended plan
+MAX_PRICE_STEP = 0.5
+
+
+def _apart(low: float, high: float, gap: float) -> bool:
+    return high - low > gap * max(abs(low), 0.01)
+
+
+def cluster_amounts(amounts: Sequence[float], gap: float = AMOUNT_CLUSTER_GAP) -> List[List[int]]:
+    """
+    Group positions by amount
+
+    Args:
+        amounts: Charge amounts
+        gap: Relative step that separates two clusters
+
+    Returns:
+        Clusters of positions into amounts, cheapest first
+    """
+    clusters: List[List[int]] = []
+    previous = None
+    for index in sorted(range(len(amounts)), key=amounts.__getitem__):
+        amount = amounts[index]
+        if previous is None or _apart(previous, amount, gap):
+            clusters.append([])
+        clusters[-1].append(index)
+        previous = amount
+    return clusters
+
+
+def _nearest(ended: List[Tuple[float, int]], amount: float) -> Optional[int]:
+    """Index in ended (sorted by price) of the plan nearest amount, if close enough"""
+    at = bisect.bisect_left(ended, (amount,))
+    best = None
+    for index in (at - 1, at):
+        if 0 <= index < len(ended):
+            price = ended[index][0]
+            step = abs(amount - price) / max(abs(price), 0.01)
+            if step <= MAX_PRICE_STEP and (best is None or step < best[0]):
+                best = (step, index)
+    return best[1] if best else None
+
+
+def split_plans(
+    records: List[TxnRecord],
+    gap: float = AMOUNT_CLUSTER_GAP,
+    min_charges: int = MIN_PLAN_CHARGES
+) -> List[List[TxnRecord]]:
+    """
+    Split one merchant's charges into concurrently billed plans
+
+    Args:
+        records: The merchant's charges, sorted by date
+        gap: Relative amount step that separates two clusters
+        min_charges: Charges a cluster needs to take part in a plan
+
+    Returns:
+        Plans as date-sorted charge lists, ordered by first charge, with
+        one-off purchases left out; just [records] when no two amount
+        clusters overlap in time
+    """
+    amounts = [record.amount for record in records]
+    if not amounts or not _apart(min(amounts), max(amounts), gap):
+        return [records]
+    clusters = [
+        members for members in cluster_amounts(amounts, gap)
+        if len(members) >= min_charges
+    ]
+    if len(clusters) <= 1:
+        return [records]
+
+    # Records are date-sorted, so positions order clusters in time
+    spans = []
+    for members in clusters:
+        price = amounts[members[len(members) // 2]]
+        members.sort()
+        trim = int(len(members) * SPAN_TRIM)
+        spans.append((members[trim], members[-1 - trim], price, members))
+    spans.sort()
+
+    plans: List[List[int]] = []
+    prices: List[float] = []
+    billing: List[Tuple[int, int]] = []  # heap of (last position, plan)
+    ended: List[Tuple[float, int]] = []  # (price, plan), sorted
+    for first, last, price, members in spans:
+        while billing and billing[0][0] < first:
+            plan = heapq.heappop(billing)[1]
+            bisect.insort(ended, (prices[plan], plan))
+        index = _nearest(ended, price)
+        if index is None:
+            plan = len(plans)
+            plans.append([])
+            prices.append(price)
+        else:
+            plan = ended.pop(index)[1]
+        plans[plan].extend(members)
+        prices[plan] = price
+        heapq.heappush(billing, (last, plan))
+
+    if len(plans) == 1:
+        return [records]
+    return [[records[index] for index in sorted(plan)] for plan in plans]
@@ -0,0 +1,32 @@
+from functools import lru_cache
+from typing import Dict, List
+
+# Category -> merchant keywords, checked in order; unmatched merchants are "Other"
+CATEGORY_CATALOG: Dict[str, List[str]] = {
+    "Streaming": ["netflix", "spotify", "disney", "hulu", "prime", "youtube"],
+    "Productivity": ["microsoft", "adobe", "dropbox", "notion", "slack"],
+    "Fitness": ["gym", "peloton", "fitness", "yoga"],
+    "News": ["nytimes", "washington", "journal", "news"],
+    "Other": []
+}
+
+DEFAULT_CATEGORY = "Other"
+
+
+@lru_cache(maxsize=65536)
+def category_for(merchant_name: str) -> str:
+    """
+    Look up the category of a merchant
+    
+    Args:
+        merchant_name: Merchant name as stored on a subscription
+        
+    Returns:
+        Category name from CATEGORY_CATALOG
+    """
+    merchant_lower = merchant_name.lower()
+    for category, keywords in CATEGORY_CATALOG.items():
+        for keyword in keywords:
+            if keyword in merchant_lower:
+                return category
+    return DEFAULT_CATEGORY
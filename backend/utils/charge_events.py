@@ -0,0 +1,152 @@
+from datetime import timedelta
+from typing import Dict, List, Optional
+from backend.utils.proration import get_billing_cycle_days
+from backend.utils.txn_record import TxnRecord
+
+# A repeat of the previous charge within this many days is a duplicate
+DUPLICATE_WINDOW_DAYS = 3
+# ...if its amount is within this fraction of the previous charge
+DUPLICATE_AMOUNT_TOLERANCE = 0.01
+# Relative departure from the running price level that counts as a step
+PRICE_CHANGE_THRESHOLD = 0.05
+# A gap this many cycles long (or more) contains at least one missed charge
+MISSED_CYCLE_FACTOR = 1.5
+
+
+class ChargeScan:
+    """
+    Result of scanning one merchant's charges
+
+    Attributes:
+        charges: Charges with duplicates removed, in date order
+        gaps: Day gaps between consecutive charges
+        events: Duplicate-charge and price-change events
+        level_start: Index in charges where the current price begins
+        level_amount: Mean amount of the current price level
+    """
+    __slots__ = ('charges', 'gaps', 'events', 'level_start', 'level_amount')
+
+    def __init__(self, charges: List[TxnRecord], gaps: List[int], events: List[Dict],
+                 level_start: int, level_amount: float):
+        self.charges = charges
+        self.gaps = gaps
+        self.events = events
+        self.level_start = level_start
+        self.level_amount = level_amount
+
+    def recent_amounts(self, count: int = 3) -> List[float]:
+        """Amounts of the latest charges at the current price, outliers skipped"""
+        amounts = [
+            r.amount for r in self.charges[self.level_start:]
+            if _close(r.amount, self.level_amount, PRICE_CHANGE_THRESHOLD)
+        ]
+        return amounts[-count:]
+
+
+def _event(event_type: str, record: TxnRecord, previous_amount: float = None,
+           expected_date=None) -> Dict:
+    return {
+        'event_type': event_type,
+        'event_date': record.date,
+        'amount': record.amount,
+        'previous_amount': previous_amount,
+        'expected_date': expected_date,
+    }
+
+
+def _close(a: float, b: float, tolerance: float) -> bool:
+    return abs(a - b) <= tolerance * max(abs(a), abs(b), 0.01)
+
+
+def scan_charges(records: List[TxnRecord]) -> ChargeScan:
+    """
+    Single pass over one merchant's date-sorted charges
+
+    Drops duplicate charges (same amount within DUPLICATE_WINDOW_DAYS of the
+    previous charge), collects the day gaps between the remaining charges
+    and tracks the running price level. A charge that
+    departs from the level by more than PRICE_CHANGE_THRESHOLD is a price
+    change once the next charge confirms the new amount; an unconfirmed
+    departure is treated as noise.
+
+    Args:
+        records: Charges sorted by date
+
+    Returns:
+        ChargeScan
+    """
+    charges: List[TxnRecord] = []
+    gaps: List[int] = []
+    events: List[Dict] = []
+    level_start = 0
+    level_sum = 0.0
+    level_count = 0
+    level = 0.0
+    pending: Optional[int] = None
+    last_amount = 0.0
+    last_day = None
+    duplicate_window = DUPLICATE_WINDOW_DAYS
+    duplicate_tolerance = DUPLICATE_AMOUNT_TOLERANCE
+    price_threshold = PRICE_CHANGE_THRESHOLD
+
+    # Hot loop: comparisons are inlined rather than going through _close
+    for record in records:
+        amount = record.amount
+        day = record.date.toordinal()
+        if last_day is not None:
+            gap = day - last_day
+            if gap <= duplicate_window and abs(amount - last_amount) <= duplicate_tolerance * (
+                    amount if amount > last_amount else last_amount):
+                events.append(_event('duplicate_charge', record, last_amount))
+                continue
+            gaps.append(gap)
+        charges.append(record)
+        last_amount = amount
+        last_day = day
+
+        if abs(amount - level) <= price_threshold * (amount if amount > level else level):
+            level_sum += amount
+            level_count += 1
+            level = level_sum / level_count
+            pending = None
+        elif not level_count:
+            level_sum = level = amount
+            level_count = 1
+        elif pending is not None and _close(amount, charges[pending].amount, price_threshold):
+            # Two charges in a row at the new amount: a step change
+            events.append(_event('price_change', charges[pending], round(level, 2)))
+            level_start = pending
+            level_sum = charges[pending].amount + amount
+            level_count = 2
+            level = level_sum / 2
+            pending = None
+        else:
+            pending = len(charges) - 1
+
+    return ChargeScan(charges, gaps, events, level_start, level)
+
+
+def missed_cycles(charges: List[TxnRecord], frequency: str) -> List[Dict]:
+    """
+    Find gaps that skip one or more billing cycles
+
+    Args:
+        charges: Deduplicated charges sorted by date
+        frequency: Detected billing frequency
+
+    Returns:
+        List of missed_cycle events, dated at the charge after the gap
+        with expected_date set to the first skipped billing date
+    """
+    cycle = get_billing_cycle_days(frequency) if frequency else None
+    if not cycle:
+        return []
+
+    events = []
+    for previous, record in zip(charges, charges[1:]):
+        if (record.date - previous.date).days >= cycle * MISSED_CYCLE_FACTOR:
+            events.append(_event(
+                'missed_cycle', record, previous.amount,
+                expected_date=previous.date + timedelta(days=cycle)
+            ))
+    return events
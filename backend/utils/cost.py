@@ -0,0 +1,57 @@
+from typing import Optional
+
+
+# Number of billing cycles per year for each supported frequency.
+# Every monthly/yearly conversion in the app is derived from this table.
+PERIODS_PER_YEAR = {
+    'weekly': 52,
+    'bi-weekly': 26,
+    'monthly': 12,
+    'quarterly': 4,
+    'semi-annual': 2,
+    'yearly': 1,
+    'annual': 1
+}
+
+
+def periods_per_year(frequency: Optional[str]) -> float:
+    """
+    Get number of billing cycles per year for a frequency
+
+    Args:
+        frequency: Billing frequency (monthly, yearly, weekly, ...)
+
+    Returns:
+        Cycles per year, or 0 for unknown frequencies
+    """
+    if not frequency:
+        return 0
+    return PERIODS_PER_YEAR.get(frequency.lower(), 0)
+
+
+def yearly_cost(amount: float, frequency: Optional[str]) -> float:
+    """
+    Convert a billed amount to its yearly equivalent
+
+    Args:
+        amount: Amount charged per billing cycle
+        frequency: Billing frequency
+
+    Returns:
+        Yearly cost (0 for unknown frequencies)
+    """
+    return (amount or 0) * periods_per_year(frequency)
+
+
+def monthly_cost(amount: float, frequency: Optional[str]) -> float:
+    """
+    Convert a billed amount to its monthly equivalent
+
+    Args:
+        amount: Amount charged per billing cycle
+        frequency: Billing frequency
+
+    Returns:
+        Monthly cost (0 for unknown frequencies)
+    """
+    return (amount or 0) * (periods_per_year(frequency) / 12)
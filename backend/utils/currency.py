@@ -0,0 +1,58 @@
+import hashlib
+import os
+import re
+from functools import lru_cache
+from typing import Optional
+
+# Currency assumed for amounts that carry no symbol, code or currency column
+DEFAULT_CURRENCY = os.environ.get("SUBSMART_DEFAULT_CURRENCY", "USD").upper()
+
+# Offline FX rate table used for conversions (see backend.utils.fx)
+FX_RATES_PATH = os.environ.get(
+    "SUBSMART_FX_RATES",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "fx_rates.csv")
+)
+
+CURRENCY_SYMBOLS = {
+    '$': 'USD',
+    '£': 'GBP',
+    '€': 'EUR',
+    '¥': 'JPY',
+    '₹': 'INR',
+}
+
+# ISO 4217 code written next to an amount ("EUR 12.00", "12.00 gbp")
+_CURRENCY_CODE = re.compile(r'(?<![A-Za-z])([A-Za-z]{3})(?![A-Za-z])')
+_ISO_CODE = re.compile(r'^[A-Za-z]{3}$')
+
+
+def detect_currency(amount_str: str, column: Optional[str] = None) -> str:
+    """
+    Work out the currency of a statement amount
+
+    An explicit currency column wins, then an ISO code in the amount, then
+    a currency symbol.
+
+    Args:
+        amount_str: Raw amount cell
+        column: Value of the row's currency column, if the file has one
+
+    Returns:
+        Upper-case ISO 4217 code (DEFAULT_CURRENCY when nothing is found)
+    """
+    if column and _ISO_CODE.match(column.strip()):
+        return column.strip().upper()
+    match = _CURRENCY_CODE.search(amount_str)
+    if match:
+        return match.group(1).upper()
+    for symbol, code in CURRENCY_SYMBOLS.items():
+        if symbol in amount_str:
+            return code
+    return DEFAULT_CURRENCY
+
+
+@lru_cache(maxsize=1)
+def rates_version() -> str:
+    """Digest of the FX rate file, for ETags of converted responses"""
+    with open(FX_RATES_PATH, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=6).hexdigest()
@@ -1,13 +1,40 @@
 import re
 from datetime import timedelta
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional
 from collections import defaultdict
+from functools import lru_cache
+from backend.utils.amount_clusters import split_plans
+from backend.utils.charge_events import scan_charges, missed_cycles
+from backend.utils.frequency_bands import compile_bands
+from backend.utils.proration import get_billing_cycle_days
+from backend.utils.txn_record import TxnRecord, as_records
 
 
+# Bump whenever detection can produce different output for the same
+# transactions; cached detection results from other versions are ignored
+DETECTOR_VERSION = 5
+
+# Descriptor noise stripped before matching, compiled once
+_NOISE_PATTERNS = [
+    re.compile(r'\d{2}/\d{2}'),  # Dates
+    re.compile(r'#\d+'),  # Reference numbers
+    re.compile(r'\*+\d+'),  # Card numbers
+    re.compile(r'ref\s*:?\s*\w+'),  # Reference codes
+]
+_NON_ALNUM = re.compile(r'[^a-z0-9\s]')
+
+# Gap classifier compiled from frequency_bands.FREQUENCY_BANDS
+_classify = compile_bands()
+
+
+@lru_cache(maxsize=65536)
 def normalize_merchant(description: str) -> str:
     """
     Normalize merchant name for matching
     
+    Results are memoized: statements repeat the same few descriptors many
+    times, so most calls are cache hits.
+    
     Args:
         description: Raw transaction description
         
@@ -18,18 +45,11 @@ def normalize_merchant(description: str) -> str:
     normalized = description.lower()
     
     # Remove common patterns
-    patterns = [
-        r'\d{2}/\d{2}',  # Dates
-        r'#\d+',  # Reference numbers
-        r'\*+\d+',  # Card numbers
-        r'ref\s*:?\s*\w+',  # Reference codes
-    ]
-    
-    for pattern in patterns:
-        normalized = re.sub(pattern, '', normalized)
+    for pattern in _NOISE_PATTERNS:
+        normalized = pattern.sub('', normalized)
     
     # Remove special characters except spaces
-    normalized = re.sub(r'[^a-z0-9\s]', ' ', normalized)
+    normalized = _NON_ALNUM.sub(' ', normalized)
     
     # Remove extra whitespace
     normalized = ' '.join(normalized.split())
@@ -42,12 +62,26 @@ def normalize_merchant(description: str) -> str:
     return normalized.strip()
 
 
-def detect_recurring_subscriptions(transactions: List[Dict]) -> List[Dict]:
+def detect_recurring_subscriptions(transactions: Iterable) -> List[Dict]:
     """
     Detect recurring subscriptions from transaction list
     
     Args:
-        transactions: List of transaction dictionaries with date, description, amount
+        transactions: Transactions with date, description, amount, as
+            dicts, TxnRecords or (date, description, amount) tuples
+        
+    Returns:
+        List of detected subscription dictionaries
+    """
+    return detect_recurring_records(as_records(transactions))
+
+
+def detect_recurring_records(records: Iterable[TxnRecord]) -> List[Dict]:
+    """
+    Detect recurring subscriptions from compact transaction records
+    
+    Args:
+        records: TxnRecord instances
         
     Returns:
         List of detected subscription dictionaries
@@ -55,10 +89,10 @@ def detect_recurring_subscriptions(transactions: List[Dict]) -> List[Dict]:
     # Group transactions by normalized merchant name
     merchant_groups = defaultdict(list)
     
-    for transaction in transactions:
-        merchant = normalize_merchant(transaction['description'])
+    for record in records:
+        merchant = normalize_merchant(record.description)
         if merchant:
-            merchant_groups[merchant].append(transaction)
+            merchant_groups[merchant].append(record)
     
     subscriptions = []
     
@@ -68,40 +102,103 @@ def detect_recurring_subscriptions(transactions: List[Dict]) -> List[Dict]:
             continue
         
         # Sort by date
-        txns_sorted = sorted(txns, key=lambda x: x['date'])
+        txns.sort(key=lambda r: r.date)
         
-        # Check for recurring pattern
-        is_recurring, frequency = check_recurring_pattern(txns_sorted)
-        
-        if is_recurring:
-            # Calculate next billing date
-            last_txn = txns_sorted[-1]
-            
-            if frequency == 'monthly':
-                # Estimate next billing (30 days from last)
-                next_billing = last_txn['date'] + timedelta(days=30)
-            elif frequency == 'yearly':
-                next_billing = last_txn['date'] + timedelta(days=365)
-            else:
-                next_billing = None
-            
-            # Get most recent amount (handle slight variations)
-            recent_amounts = [t['amount'] for t in txns_sorted[-3:]]
-            avg_amount = sum(recent_amounts) / len(recent_amounts)
-            
-            subscriptions.append({
-                'merchant_name': merchant.title(),
-                'amount': round(avg_amount, 2),
-                'frequency': frequency,
-                'start_date': txns_sorted[0]['date'],
-                'next_billing_date': next_billing,
-                'status': 'active',
-                'transaction_count': len(txns_sorted)
-            })
+        subscriptions.extend(analyze_merchant_plans(merchant, txns))
     
     return subscriptions
 
 
+def analyze_merchant_plans(merchant: str, txns: List[TxnRecord]) -> List[Dict]:
+    """
+    Detect one or more subscriptions in one merchant's charges
+    
+    The charges are analyzed as one plan unless splitting them into
+    concurrent amount clusters (amount_clusters.split_plans) finds more
+    recurring plans. Plans after the first are named "<Merchant> #2",
+    "#3", ... in order of their first charge; the suffix is stripped by
+    normalize_merchant, so every plan keeps the merchant key.
+    
+    Args:
+        merchant: Normalized merchant key
+        txns: The merchant's charges, sorted by date
+        
+    Returns:
+        Detected subscription dictionaries
+    """
+    whole = analyze_merchant(merchant, txns)
+    plans = split_plans(txns)
+    if len(plans) > 1:
+        found = [
+            subscription for subscription in (
+                analyze_merchant(merchant, plan) for plan in plans if len(plan) >= 2
+            ) if subscription
+        ]
+        if len(found) > (1 if whole else 0):
+            for number, subscription in enumerate(found[1:], start=2):
+                subscription['merchant_name'] += f" #{number}"
+            return found
+    return [whole] if whole else []
+
+
+def analyze_merchant(merchant: str, txns: List[TxnRecord]) -> Optional[Dict]:
+    """
+    Detect a subscription in one merchant's charges
+    
+    Args:
+        merchant: Normalized merchant key
+        txns: The merchant's charges, sorted by date
+        
+    Returns:
+        Detected subscription dictionary, or None if not recurring
+    """
+    # Drop duplicate charges, collect gaps and track price changes in one pass
+    scan = scan_charges(txns)
+    
+    # Check for recurring pattern
+    is_recurring, frequency = classify_gaps(scan.gaps)
+    
+    if not is_recurring:
+        return None
+    
+    # Estimate next billing one cycle after the last charge
+    last_txn = scan.charges[-1]
+    next_billing = last_txn.date + timedelta(days=get_billing_cycle_days(frequency))
+    
+    # Average the most recent amounts at the current price
+    recent_amounts = scan.recent_amounts(3)
+    avg_amount = sum(recent_amounts) / len(recent_amounts)
+    
+    events = scan.events + missed_cycles(scan.charges, frequency)
+    events.sort(key=lambda e: e['event_date'])
+    
+    return {
+        'merchant_name': merchant.title(),
+        'amount': round(avg_amount, 2),
+        'currency': last_txn.currency,
+        'frequency': frequency,
+        'start_date': txns[0].date,
+        'next_billing_date': next_billing,
+        'status': 'active',
+        'transaction_count': len(txns),
+        'events': events
+    }
+
+
+def gaps_between(records: List[TxnRecord]) -> List[int]:
+    """
+    Day gaps between consecutive records
+    
+    Args:
+        records: Records sorted by date
+        
+    Returns:
+        List of gaps in days
+    """
+    dates = [r.date for r in records]
+    return [(b - a).days for a, b in zip(dates, dates[1:])]
+
+
 def check_recurring_pattern(transactions: List[Dict]) -> tuple[bool, str]:
     """
     Check if transactions show recurring pattern
@@ -121,24 +218,20 @@ def check_recurring_pattern(transactions: List[Dict]) -> tuple[bool, str]:
         gap = (transactions[i]['date'] - transactions[i-1]['date']).days
         gaps.append(gap)
     
-    # Check for monthly pattern (28-35 days, allowing for variation)
-    monthly_gaps = [g for g in gaps if 25 <= g <= 35]
-    if len(monthly_gaps) >= len(gaps) * 0.7:  # 70% of gaps are monthly
-        return True, 'monthly'
-    
-    # Check for yearly pattern (350-380 days)
-    yearly_gaps = [g for g in gaps if 350 <= g <= 380]
-    if len(yearly_gaps) >= len(gaps) * 0.7:
-        return True, 'yearly'
-    
-    # Check for weekly pattern (6-8 days)
-    weekly_gaps = [g for g in gaps if 6 <= g <= 8]
-    if len(weekly_gaps) >= len(gaps) * 0.7:
-        return True, 'weekly'
+    return classify_gaps(gaps)
+
+
+def classify_gaps(gaps: List[int]) -> tuple[bool, str]:
+    """
+    Classify a sequence of day gaps into a billing frequency
     
-    # Check for bi-weekly pattern (13-15 days)
-    biweekly_gaps = [g for g in gaps if 13 <= g <= 15]
-    if len(biweekly_gaps) >= len(gaps) * 0.7:
-        return True, 'bi-weekly'
+    The bands and the share of gaps required are configured in
+    frequency_bands.
     
-    return False, None
+    Args:
+        gaps: Day gaps between consecutive transactions
+        
+    Returns:
+        Tuple of (is_recurring, frequency)
+    """
+    return _classify(gaps)
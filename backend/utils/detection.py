@@ -0,0 +1,247 @@
+from typing import Dict, List, Optional, Tuple
+import orjson
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.database import SNAPSHOT_DIR
+from backend.models.detection_cache import DetectionCache
+from backend.models.subscription import Subscription
+from backend.models.subscription_event import SubscriptionEvent
+from backend.models.transaction import Transaction
+from backend.utils.activity import rebuild_activity, summarize_activity
+from backend.utils.detect_recurring import DETECTOR_VERSION, detect_recurring_records
+from backend.utils.metrics import DETECTION_CACHE, timed, timed_commit, count_rows
+from backend.utils.rollups import load_rollup_records, rollup_totals
+from backend.utils.txn_record import TxnRecord
+from backend.utils.versioning import bump_version
+
+
+def load_records(db: Session, user_id: int) -> List[TxnRecord]:
+    """
+    Load a user's transactions as compact records
+    
+    Only the columns detection needs are selected and rows are streamed,
+    so no ORM instances are built. Charges folded into monthly rollups by
+    retention are expanded and come first.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        
+    Returns:
+        List of TxnRecord
+    """
+    records = load_rollup_records(db, user_id)
+    rows = db.query(
+        Transaction.date,
+        Transaction.description,
+        Transaction.amount,
+        Transaction.currency
+    ).filter(
+        Transaction.user_id == user_id
+    ).yield_per(5000)
+    records.extend(TxnRecord(d, desc, amount, currency) for d, desc, amount, currency in rows)
+    return records
+
+
+def transaction_fingerprint(db: Session, user_id: int) -> Optional[str]:
+    """
+    Cheap fingerprint of a user's transaction set
+    
+    Row count, max id and the id and amount sums, computed from the
+    (user_id, amount) index, the rollup charge count and total, plus the
+    detector version. Any insert, delete or compaction changes it.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        
+    Returns:
+        Fingerprint string, or None if the user has no transactions
+    """
+    count, max_id, id_sum, amount_sum = db.query(
+        func.count(Transaction.id),
+        func.max(Transaction.id),
+        func.total(Transaction.id),
+        func.total(Transaction.amount)
+    ).filter(
+        Transaction.user_id == user_id
+    ).one()
+    folded, folded_sum, _, _ = rollup_totals(db, user_id)
+    if not count and not folded:
+        return None
+    return f"d{DETECTOR_VERSION}:{count}:{max_id}:{int(id_sum)}:{amount_sum:.2f}:{folded}:{folded_sum:.2f}"
+
+
+def invalidate_detection(db: Session, user_id: int) -> None:
+    """
+    Drop a user's cached detection result
+    
+    Call (before commit) wherever the user's transactions are added or
+    removed.
+    """
+    db.query(DetectionCache).filter(
+        DetectionCache.user_id == user_id
+    ).delete(synchronize_session=False)
+
+
+def detect_for_user(db: Session, user_id: int) -> Optional[Dict]:
+    """
+    Run detection for a user and store newly found subscriptions
+    
+    When the transaction fingerprint matches the cached run, the cached
+    output is returned and reconciliation is skipped.
+    
+    Args:
+        db: Database session on the user's shard
+        user_id: User ID
+        
+    Returns:
+        Dictionary with detection results, or None if the user has no
+        transactions
+    """
+    fingerprint = transaction_fingerprint(db, user_id)
+    if fingerprint is None:
+        return None
+    
+    cached = db.get(DetectionCache, user_id)
+    if cached is not None and cached.fingerprint == fingerprint:
+        DETECTION_CACHE.inc(result="hit")
+        result = orjson.loads(cached.result)
+        result.update(created_count=0, cached=True)
+        return result
+    DETECTION_CACHE.inc(result="miss")
+    
+    if SNAPSHOT_DIR:
+        # Columnar snapshot: grouping and sorting run on the mapped arrays
+        from backend.utils.snapshots import activity_summary, detect_from_snapshot, load_snapshot
+        snapshot = load_snapshot(db, user_id)
+        if snapshot is None or not snapshot.count:
+            return None
+        with timed("detect_recurring_subscriptions"):
+            detected = detect_from_snapshot(snapshot)
+        count_rows("detect", snapshot.count)
+        summary = activity_summary(snapshot)
+    else:
+        records = load_records(db, user_id)
+        
+        if not records:
+            return None
+        
+        # Detect recurring patterns
+        with timed("detect_recurring_subscriptions"):
+            detected = detect_recurring_records(records)
+        count_rows("detect", len(records))
+        summary = summarize_activity(records)
+    
+    # Store detected subscriptions
+    existing_names = {
+        name for (name,) in db.query(Subscription.merchant_name).filter(
+            Subscription.user_id == user_id
+        )
+    }
+    
+    created_count = 0
+    for sub_data in detected:
+        if sub_data['merchant_name'] in existing_names:
+            continue
+        
+        subscription = Subscription(
+            merchant_name=sub_data['merchant_name'],
+            amount=sub_data['amount'],
+            currency=sub_data['currency'],
+            frequency=sub_data['frequency'],
+            start_date=sub_data['start_date'],
+            next_billing_date=sub_data.get('next_billing_date'),
+            status=sub_data['status'],
+            user_id=user_id
+        )
+        db.add(subscription)
+        existing_names.add(sub_data['merchant_name'])
+        created_count += 1
+    
+    events_changed = replace_events(db, user_id, detected)
+    
+    # Detection has the full history at hand; resync the activity index
+    # (also backfills users whose data predates it)
+    activity_changed = rebuild_activity(db, user_id, summary)
+    
+    if created_count or events_changed or activity_changed:
+        bump_version(db, user_id)
+    
+    result = {
+        "status": "success",
+        "detected_count": len(detected),
+        "created_count": created_count,
+        "event_count": sum(len(sub['events']) for sub in detected),
+        "subscriptions": detected,
+        "cached": False
+    }
+    db.merge(DetectionCache(
+        user_id=user_id,
+        fingerprint=fingerprint,
+        result=orjson.dumps(result).decode()
+    ))
+    timed_commit(db, "detect")
+    
+    return result
+
+
+def _event_key(merchant_name: str, event: Dict) -> Tuple:
+    return (
+        merchant_name,
+        event['event_type'],
+        event['event_date'],
+        event['amount'],
+        event['previous_amount'],
+        event['expected_date']
+    )
+
+
+def replace_events(db: Session, user_id: int, detected: List[Dict]) -> bool:
+    """
+    Replace a user's stored billing events with freshly detected ones
+    
+    Detection always sees the full transaction history, so the new set
+    supersedes the old one. Nothing is written when the set is unchanged.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        detected: Output of detect_recurring_records
+        
+    Returns:
+        True if stored events changed
+    """
+    new_keys = {
+        _event_key(sub['merchant_name'], event)
+        for sub in detected for event in sub['events']
+    }
+    old_keys = set(db.query(
+        SubscriptionEvent.merchant_name,
+        SubscriptionEvent.event_type,
+        SubscriptionEvent.event_date,
+        SubscriptionEvent.amount,
+        SubscriptionEvent.previous_amount,
+        SubscriptionEvent.expected_date
+    ).filter(SubscriptionEvent.user_id == user_id).all())
+    
+    if new_keys == old_keys:
+        return False
+    
+    db.query(SubscriptionEvent).filter(
+        SubscriptionEvent.user_id == user_id
+    ).delete(synchronize_session=False)
+    db.add_all([
+        SubscriptionEvent(
+            user_id=user_id,
+            merchant_name=merchant_name,
+            event_type=event_type,
+            event_date=event_date,
+            amount=amount,
+            previous_amount=previous_amount,
+            expected_date=expected_date
+        )
+        for merchant_name, event_type, event_date, amount, previous_amount, expected_date
+        in new_keys
+    ])
+    return True
@@ -0,0 +1,55 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+
+
+def compute_etag(request: Request, version: int, *extra) -> str:
+    """
+    Derive a strong ETag for a read endpoint
+    
+    The tag combines the user's data version with the request path and
+    query parameters, so different pages/filters of the same data get
+    different tags.
+    
+    Args:
+        request: Incoming request
+        version: User data version
+        *extra: Additional values the response depends on (e.g. today's date)
+        
+    Returns:
+        Quoted ETag value
+    """
+    params = '&'.join(f'{k}={v}' for k, v in sorted(request.query_params.multi_items()))
+    key = '|'.join([request.url.path, params, *map(str, extra)])
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return f'"v{version}-{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Check whether the client's If-None-Match matches the current ETag
+    
+    Args:
+        request: Incoming request
+        etag: Current ETag value
+        
+    Returns:
+        True if a 304 can be returned
+    """
+    header: Optional[str] = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header.split(',')]
+    return etag in candidates or f'W/{etag}' in candidates
+
+
+def not_modified_response(etag: str) -> Response:
+    """Build an empty 304 response carrying the ETag"""
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def cache_headers(etag: str) -> dict:
+    """Headers telling clients to cache but always revalidate"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
@@ -0,0 +1,194 @@
+"""
+In-process per-user event broker for the /api/events stream
+
+Request handlers publish small change events (upload progress, detection
+finished, subscriptions changed); every open event stream of that user
+receives them. Each event is encoded as an SSE frame once and the same
+bytes are queued for all of the user's connections.
+
+Handlers that run in the threadpool publish through
+loop.call_soon_threadsafe, so publishing never blocks and never touches
+the queues off the event loop. Publishing for a user with no open streams
+is a dictionary lookup.
+
+The broker is per worker process. Changes made through another worker
+(or by a batch job) are picked up by each stream polling the user's
+data_versions row (stored_version): a version this worker never announced
+makes the stream send resync, so clients refetch instead of missing it.
+"""
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Dict, Optional, Set
+import orjson
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.database import shards
+from backend.models.subscription import Subscription
+from backend.utils.currency import DEFAULT_CURRENCY
+from backend.utils.metrics import EVENT_STREAMS, EVENTS_DROPPED, EVENTS_PUBLISHED
+from backend.utils.versioning import get_version
+
+# Frames buffered per connection before a slow client is told to resync
+STREAM_QUEUE_SIZE = 64
+
+# Sent instead of the dropped frames when a client falls behind
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+
+
+class EventBroker:
+    """Fan out per-user events to connected streams"""
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._streams: Dict[int, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+        # Latest data version per user whose change this worker published
+        self._versions: Dict[int, int] = {}
+
+    def has_listeners(self, user_id: int) -> bool:
+        return bool(self._streams.get(user_id))
+
+    def announced_version(self, user_id: int) -> int:
+        """Latest data version this worker published an event for"""
+        return self._versions.get(user_id, 0)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int):
+        """
+        Register a stream for a user
+
+        Yields:
+            Queue of encoded SSE frames
+        """
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._streams.setdefault(user_id, set()).add(queue)
+        EVENT_STREAMS.inc()
+        try:
+            yield queue
+        finally:
+            streams = self._streams.get(user_id)
+            if streams is not None:
+                streams.discard(queue)
+                if not streams:
+                    del self._streams[user_id]
+                    self._versions.pop(user_id, None)
+            EVENT_STREAMS.dec()
+
+    def publish(self, user_id: int, event: str, data: Dict, version: Optional[int] = None) -> None:
+        """
+        Send an event to every stream of a user
+
+        Safe to call from the event loop or from worker threads.
+
+        Args:
+            user_id: User ID
+            event: Event name (upload, detection, subscriptions)
+            data: JSON-serializable payload
+            version: User's data version after the change, so streams do
+                not also report it as a change from another worker
+        """
+        if not self.has_listeners(user_id) or self._loop is None:
+            return
+        if version is not None:
+            self._versions[user_id] = max(version, self.announced_version(user_id))
+        frame = b"id: %d\nevent: %s\ndata: %s\n\n" % (
+            next(self._ids), event.encode(), orjson.dumps(data)
+        )
+        EVENTS_PUBLISHED.inc(event=event)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._dispatch(user_id, frame)
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._dispatch, user_id, frame)
+            except RuntimeError:
+                # Loop already closed (shutdown)
+                pass
+
+    def _dispatch(self, user_id: int, frame: bytes) -> None:
+        for queue in self._streams.get(user_id, ()):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Drop the backlog; the client refetches on resync
+                EVENTS_DROPPED.inc(queue.qsize())
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC_FRAME)
+
+
+broker = EventBroker()
+
+
+def insight_totals(db: Session, user_id: int) -> Dict:
+    """
+    Headline insight figures attached to change events
+
+    One aggregate query, so clients can update totals without refetching
+    /api/insights. Totals are in DEFAULT_CURRENCY; per-currency sums are
+    converted at today's rates when the user has foreign subscriptions,
+    leaving out currencies without rates.
+    """
+    rows = db.query(
+        Subscription.currency,
+        func.count(Subscription.id),
+        func.total(Subscription.monthly_cost)
+    ).filter(
+        Subscription.user_id == user_id,
+        Subscription.status == "active"
+    ).group_by(Subscription.currency).all()
+    count = sum(row[1] for row in rows)
+    if all(row[0] == DEFAULT_CURRENCY for row in rows):
+        total_monthly = sum(row[2] for row in rows)
+    else:
+        from backend.utils.fx import convert
+        total_monthly = float(convert(
+            [row[2] for row in rows],
+            [row[0] for row in rows],
+            DEFAULT_CURRENCY,
+            date.today(),
+            missing=0.0
+        ).sum())
+    return {
+        "subscription_count": count,
+        "total_monthly_cost": round(total_monthly, 2),
+        "total_yearly_cost": round(total_monthly * 12, 2),
+        "currency": DEFAULT_CURRENCY,
+    }
+
+
+def stored_version(user_id: int) -> int:
+    """Read a user's data version on a fresh session (blocking)"""
+    db = shards.session_for(user_id)
+    try:
+        return get_version(db, user_id)
+    finally:
+        db.close()
+
+
+def publish_change(db: Session, user_id: int, event: str, data: Dict) -> None:
+    """
+    Publish a change event with the user's refreshed insight totals
+
+    Call after commit. The totals query only runs when the user has an
+    open stream; if it fails, the event is sent without totals.
+    """
+    if not broker.has_listeners(user_id):
+        return
+    try:
+        version = get_version(db, user_id)
+        totals = insight_totals(db, user_id)
+    except Exception:
+        # The change is already committed; never fail the request over the
+        # push. Without totals the client refetches /api/insights.
+        db.rollback()
+        broker.publish(user_id, event, data)
+        return
+    broker.publish(user_id, event, {**data, "insights": totals}, version=version)
@@ -0,0 +1,189 @@
+"""
+Vectorized spending forecast and cancellation scenarios
+
+Every subscription's billing schedule over the horizon is expanded into a
+subscriptions x months cost matrix in one NumPy pass. A scenario is a 0/1
+keep-mask over subscriptions, so projecting many scenarios at once is a
+single (scenarios x subscriptions) @ (subscriptions x months) product.
+
+Billing cycles are 365 / periods_per_year days, so a subscription charges
+exactly periods_per_year times a year and totals match yearly_cost().
+Amounts are converted into one currency at the forecast start's FX rates.
+"""
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from backend.utils.cost import periods_per_year
+from backend.utils.currency import DEFAULT_CURRENCY
+from backend.utils.fx import convert, supported_currencies
+from backend.utils.proration import estimate_annual_savings
+
+
+def month_starts(start: date, months: int) -> List[date]:
+    """First day of the month containing start and of the following months"""
+    firsts = []
+    year, month = start.year, start.month
+    for _ in range(months + 1):
+        firsts.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return firsts
+
+
+def cost_matrix(subscriptions: Sequence, start: date, months: int = 12) -> np.ndarray:
+    """
+    Expand billing schedules into a per-month cost matrix
+
+    Month 0 is the rest of start's calendar month; charges before start are
+    not included.
+
+    Args:
+        subscriptions: Objects with amount, frequency, start_date and
+            next_billing_date
+        start: First day of the forecast
+        months: Number of calendar months
+
+    Returns:
+        Array of shape (len(subscriptions), months) with the amount billed
+        per subscription per month
+    """
+    n = len(subscriptions)
+    matrix = np.zeros((n, months))
+    if not n:
+        return matrix
+
+    firsts = month_starts(start, months)
+    origin = start.toordinal()
+    horizon = firsts[-1].toordinal() - origin
+
+    # Month bucket of every day offset in [0, horizon)
+    day_month = np.zeros(horizon, dtype=np.int64)
+    for m in range(1, months):
+        day_month[firsts[m].toordinal() - origin:] = m
+
+    amounts = np.array([sub.amount or 0.0 for sub in subscriptions], dtype=float)
+    per_year = np.array([periods_per_year(sub.frequency) for sub in subscriptions], dtype=float)
+    anchors = np.array([
+        (sub.next_billing_date or sub.start_date).toordinal() - origin
+        for sub in subscriptions
+    ], dtype=float)
+
+    billed = per_year > 0
+    cycle = np.divide(365.0, per_year, out=np.zeros(n), where=billed)
+
+    # First charge on or after start: roll past anchors forward whole cycles
+    behind = np.divide(-anchors, cycle, out=np.zeros(n), where=billed & (anchors < 0))
+    first = anchors + np.ceil(behind) * cycle
+
+    # Up to max_charges charges per subscription inside the horizon
+    max_charges = int(np.ceil(horizon / cycle[billed].min())) + 1 if billed.any() else 0
+    if not max_charges:
+        return matrix
+    offsets = np.floor(first[:, None] + cycle[:, None] * np.arange(max_charges)[None, :])
+    inside = billed[:, None] & (offsets >= 0) & (offsets < horizon)
+
+    rows = np.nonzero(inside)[0]
+    buckets = day_month[offsets[inside].astype(np.int64)]
+    np.add.at(matrix, (rows, buckets), amounts[rows])
+    return matrix
+
+
+def keep_masks(subscription_ids: Sequence[int], scenarios: Sequence[Dict]) -> np.ndarray:
+    """
+    Build keep-masks for cancellation scenarios
+
+    Args:
+        subscription_ids: IDs in cost-matrix row order
+        scenarios: Dicts with a "cancel" list of subscription IDs
+
+    Returns:
+        Array of shape (len(scenarios), len(subscription_ids)); 0 marks a
+        cancelled subscription
+    """
+    index = {sub_id: i for i, sub_id in enumerate(subscription_ids)}
+    masks = np.ones((len(scenarios), len(subscription_ids)))
+    for s, scenario in enumerate(scenarios):
+        cancelled = [index[sub_id] for sub_id in scenario.get('cancel', ()) if sub_id in index]
+        masks[s, cancelled] = 0
+    return masks
+
+
+def forecast_scenarios(
+    subscriptions: Sequence,
+    scenarios: Sequence[Dict],
+    start: date,
+    months: int = 12,
+    currency: str = DEFAULT_CURRENCY
+) -> Dict:
+    """
+    Project monthly spending for the current plan and each scenario
+
+    Args:
+        subscriptions: Active subscriptions (with id, amount, currency,
+            frequency, monthly_cost, start_date, next_billing_date)
+        scenarios: Dicts with "name" and "cancel" (subscription IDs)
+        start: First day of the forecast
+        months: Number of calendar months
+        currency: Currency of every projected amount
+
+    Returns:
+        Dictionary with month labels, the baseline projection, one
+        projection per scenario including savings against the baseline,
+        and the currencies left out for lack of FX rates
+    """
+    ids = [sub.id for sub in subscriptions]
+    matrix = cost_matrix(subscriptions, start, months)
+
+    # One rate per subscription scales both its billed amounts and its
+    # monthly equivalent; currencies without rates count as zero
+    currencies = [sub.currency for sub in subscriptions]
+    rates = np.ones(len(ids))
+    unconverted: List[str] = []
+    if any(code != currency for code in currencies):
+        rates = convert(rates, currencies, currency, start, missing=0.0)
+        unconverted = sorted(set(currencies) - supported_currencies())
+    matrix *= rates[:, None]
+    masks = np.vstack([np.ones((1, len(ids))), keep_masks(ids, scenarios)])
+
+    projections = masks @ matrix                      # (1 + scenarios, months)
+    totals = projections.sum(axis=1)
+
+    # Savings are estimate_annual_savings over the cancelled subscriptions
+    # (stored monthly_cost, already converted here); kept totals are the
+    # baseline minus those savings
+    monthly_equivalent = np.array([sub.monthly_cost or 0.0 for sub in subscriptions], dtype=float) * rates
+    converted = [{"monthly_cost": float(cost), "currency": currency} for cost in monthly_equivalent]
+    baseline = estimate_annual_savings(converted, currency, start)
+    savings = [
+        estimate_annual_savings([converted[i] for i in np.flatnonzero(mask == 0)], currency, start)
+        for mask in masks
+    ]
+    kept_count = masks.sum(axis=1)
+
+    def summarize(row: int, name: str, cancel: Optional[List[int]]) -> Dict:
+        kept_monthly = float(monthly_equivalent.sum()) - savings[row]["total_monthly_cost"]
+        return {
+            "name": name,
+            "cancelled": cancel or [],
+            "monthly": [round(float(v), 2) for v in projections[row]],
+            "total": round(float(totals[row]), 2),
+            "savings": round(float(totals[0] - totals[row]), 2),
+            "total_monthly_cost": round(kept_monthly, 2),
+            "total_yearly_cost": round(baseline["total_yearly_cost"] - savings[row]["total_yearly_cost"], 2),
+            "annual_savings": savings[row]["total_yearly_cost"],
+            "average_per_subscription": (
+                round(kept_monthly / kept_count[row], 2) if kept_count[row] else 0
+            ),
+            "currency": currency,
+        }
+
+    return {
+        "start": start.isoformat(),
+        "months": [first.strftime("%b %Y") for first in month_starts(start, months)[:months]],
+        "baseline": summarize(0, "current", None),
+        "scenarios": [
+            summarize(i + 1, scenario.get('name') or f"scenario {i + 1}", list(scenario.get('cancel', [])))
+            for i, scenario in enumerate(scenarios)
+        ],
+        "currency": currency,
+        "unconverted_currencies": unconverted,
+    }
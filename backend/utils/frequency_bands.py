@@ -0,0 +1,82 @@
+"""
+Declarative billing-frequency bands
+
+Detection labels a merchant's charges with a frequency when enough of the
+day gaps between them fall inside one band. Bands are plain data; the
+classifier is compiled from them once into a gap -> band lookup table, so
+classifying a history is a single pass over its gaps however many bands
+there are.
+"""
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class FrequencyBand(NamedTuple):
+    """Gaps from min_days to max_days (inclusive) count towards frequency"""
+    frequency: str
+    min_days: int
+    max_days: int
+
+
+FREQUENCY_BANDS: Tuple[FrequencyBand, ...] = (
+    FrequencyBand('weekly', 6, 8),
+    FrequencyBand('bi-weekly', 13, 15),
+    FrequencyBand('monthly', 25, 35),
+    FrequencyBand('quarterly', 85, 97),
+    FrequencyBand('semi-annual', 173, 193),
+    FrequencyBand('yearly', 350, 380),
+)
+
+# Share of gaps that must fall in one band for the history to be recurring
+MIN_BAND_SHARE = 0.7
+
+GapClassifier = Callable[[List[int]], Tuple[bool, Optional[str]]]
+
+
+def compile_bands(
+    bands: Sequence[FrequencyBand] = FREQUENCY_BANDS,
+    min_share: float = MIN_BAND_SHARE
+) -> GapClassifier:
+    """
+    Compile frequency bands into a gap classifier
+
+    Args:
+        bands: Non-overlapping frequency bands
+        min_share: Share of gaps one band needs; above 0.5 so at most one
+            band can qualify
+
+    Returns:
+        Function mapping a list of day gaps to (is_recurring, frequency)
+
+    Raises:
+        ValueError: If bands overlap or min_share is not in (0.5, 1]
+    """
+    if not 0.5 < min_share <= 1:
+        raise ValueError(f"min_share must be in (0.5, 1], got {min_share}")
+    ordered = sorted(bands, key=lambda band: band.min_days)
+    for band in ordered:
+        if band.min_days < 0 or band.max_days < band.min_days:
+            raise ValueError(f"Invalid band {band}")
+    for previous, band in zip(ordered, ordered[1:]):
+        if band.min_days <= previous.max_days:
+            raise ValueError(f"Bands {previous.frequency} and {band.frequency} overlap")
+
+    frequencies = [band.frequency for band in bands]
+    # Slot len(bands) collects gaps outside every band
+    outside = len(bands)
+    table = [outside] * (max((band.max_days for band in bands), default=-1) + 1)
+    for index, band in enumerate(bands):
+        table[band.min_days:band.max_days + 1] = [index] * (band.max_days - band.min_days + 1)
+    size = len(table)
+
+    def classify(gaps: List[int]) -> Tuple[bool, Optional[str]]:
+        if not gaps:
+            return False, None
+        counts = [0] * (outside + 1)
+        for gap in gaps:
+            counts[table[gap] if 0 <= gap < size else outside] += 1
+        best = max(range(outside), key=counts.__getitem__, default=None)
+        if best is not None and counts[best] >= len(gaps) * min_share:
+            return True, frequencies[best]
+        return False, None
+
+    return classify
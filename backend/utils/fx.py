@@ -0,0 +1,149 @@
+"""
+Offline FX rates and vectorized currency conversion
+
+Rates come from a local CSV (backend/data/fx_rates.csv, or the file named
+by SUBSMART_FX_RATES) with one row per currency per effective date:
+
+    date,currency,usd_rate
+    2024-01-01,EUR,1.10
+
+usd_rate is the value of one unit in US dollars; a rate applies from its
+date until the currency's next row. The table is loaded once per process
+and kept as per-currency NumPy arrays, so converting a whole result set is
+a searchsorted per distinct currency rather than a lookup per row.
+"""
+import csv
+from datetime import date
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Union
+import numpy as np
+from backend.utils.currency import FX_RATES_PATH
+
+# Currency the table's rates are quoted in
+BASE_CURRENCY = "USD"
+
+Dates = Union[date, Sequence[date], np.ndarray]
+
+
+class FxTable:
+    """
+    Per-currency rate history
+
+    Attributes:
+        dates: currency -> sorted effective dates (ordinals)
+        rates: currency -> US dollars per unit, aligned with dates
+    """
+    __slots__ = ('dates', 'rates')
+
+    def __init__(self, dates: Dict[str, np.ndarray], rates: Dict[str, np.ndarray]):
+        self.dates = dates
+        self.rates = rates
+
+    def currencies(self) -> List[str]:
+        return sorted({BASE_CURRENCY, *self.rates})
+
+    def has(self, currency: str) -> bool:
+        return currency == BASE_CURRENCY or currency in self.rates
+
+    def usd_rates(self, currency: str, ordinals: np.ndarray) -> np.ndarray:
+        """
+        US dollars per unit of currency on each date
+
+        Dates before a currency's first row use its first rate.
+
+        Raises:
+            ValueError: If the table has no rates for currency
+        """
+        if currency == BASE_CURRENCY:
+            return np.ones(ordinals.shape)
+        if currency not in self.rates:
+            raise ValueError(f"No FX rates for {currency}")
+        index = np.searchsorted(self.dates[currency], ordinals, side="right") - 1
+        return self.rates[currency][np.maximum(index, 0)]
+
+
+@lru_cache(maxsize=4)
+def load_fx_table(path: str = FX_RATES_PATH) -> FxTable:
+    """
+    Load and cache an FX rate file
+
+    Args:
+        path: CSV with date, currency and usd_rate columns
+
+    Returns:
+        FxTable
+    """
+    rows: Dict[str, List] = {}
+    with open(path, newline="") as f:
+        records = list(csv.DictReader(f))
+    for row in records:
+        rows.setdefault(row["currency"].strip().upper(), []).append(
+            (date.fromisoformat(row["date"].strip()).toordinal(), float(row["usd_rate"]))
+        )
+    dates = {}
+    rates = {}
+    for currency, history in rows.items():
+        history.sort()
+        dates[currency] = np.array([d for d, _ in history], dtype=np.int64)
+        rates[currency] = np.array([r for _, r in history], dtype=float)
+    return FxTable(dates, rates)
+
+
+def supported_currencies(path: str = FX_RATES_PATH) -> FrozenSet[str]:
+    """Currencies the rate file can convert"""
+    return frozenset(load_fx_table(path).currencies())
+
+
+def _ordinals(on: Dates, size: int) -> np.ndarray:
+    if isinstance(on, date):
+        return np.full(size, on.toordinal(), dtype=np.int64)
+    on = np.asarray(on)
+    if on.dtype == object:
+        return np.fromiter((d.toordinal() for d in on), dtype=np.int64, count=len(on))
+    return on.astype(np.int64)
+
+
+def convert(
+    amounts: Iterable[float],
+    currencies: Iterable[str],
+    to_currency: str,
+    on: Dates,
+    table: FxTable = None,
+    missing: Optional[float] = None
+) -> np.ndarray:
+    """
+    Convert amounts in mixed currencies into one currency
+
+    Args:
+        amounts: Amounts
+        currencies: ISO code of each amount
+        to_currency: Target ISO code
+        on: Conversion date, or one date (or date ordinal) per amount
+        table: Rate table (defaults to the configured file)
+        missing: Result for amounts whose currency has no rates; None
+            raises instead
+
+    Returns:
+        Converted amounts, aligned with the input
+
+    Raises:
+        ValueError: If to_currency has no rates, or an amount's currency
+            has none and missing is None
+    """
+    table = table or load_fx_table()
+    amounts = np.asarray(amounts, dtype=float)
+    currencies = np.asarray(currencies, dtype=object)
+    ordinals = _ordinals(on, len(amounts))
+
+    converted = np.empty(len(amounts))
+    codes, inverse = np.unique(currencies.astype(str), return_inverse=True)
+    for index, code in enumerate(codes):
+        mask = inverse == index
+        if missing is not None and not table.has(code):
+            converted[mask] = np.nan
+            continue
+        converted[mask] = amounts[mask] * table.usd_rates(code, ordinals[mask])
+    converted /= table.usd_rates(to_currency, ordinals)
+    if missing is not None:
+        converted[np.isnan(converted)] = missing
+    return converted
@@ -0,0 +1,255 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Latency buckets in seconds (Prometheus defaults plus a long tail for uploads)
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    """Render a Prometheus label set"""
+    pairs = [
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        )
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """Base class for labelled metrics"""
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}'
+        ]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {value}']
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values"""
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # [per-bucket counts..., +Inf count, sum]
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the enclosed block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_series(self, key, series) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            labels = _format_labels(self.labelnames, key, f'le="{le}"')
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {series[-1]}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    'subsmart_http_request_duration_seconds',
+    'HTTP request latency by route',
+    ('method', 'route', 'status')
+))
+
+OPERATION_LATENCY = REGISTRY.register(Histogram(
+    'subsmart_operation_duration_seconds',
+    'Duration of instrumented hot-path operations',
+    ('operation',)
+))
+
+DB_COMMIT_LATENCY = REGISTRY.register(Histogram(
+    'subsmart_db_commit_duration_seconds',
+    'Duration of database commits by caller',
+    ('operation',)
+))
+
+ROWS_PROCESSED = REGISTRY.register(Counter(
+    'subsmart_rows_total',
+    'Rows processed by upload, detection and export',
+    ('operation',)
+))
+
+STARTUP_SECONDS = REGISTRY.register(Gauge(
+    'subsmart_startup_seconds',
+    'Seconds from launch until this worker was ready (init, warmup)',
+    ('phase',)
+))
+
+WORKER_READY = REGISTRY.register(Gauge(
+    'subsmart_worker_ready',
+    '1 once this worker has warmed up and accepts traffic'
+))
+
+UPLOAD_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'subsmart_upload_queue_depth',
+    'Uploads waiting for admission'
+))
+
+UPLOAD_INFLIGHT_BYTES = REGISTRY.register(Gauge(
+    'subsmart_upload_inflight_bytes',
+    'Bytes of uploads currently admitted'
+))
+
+UPLOAD_QUEUE_WAIT = REGISTRY.register(Histogram(
+    'subsmart_upload_queue_wait_seconds',
+    'Time uploads waited for admission'
+))
+
+UPLOAD_REJECTED = REGISTRY.register(Counter(
+    'subsmart_upload_rejected_total',
+    'Uploads rejected by admission control',
+    ('reason',)
+))
+
+DETECTION_CACHE = REGISTRY.register(Counter(
+    'subsmart_detection_cache_total',
+    'Detection runs answered from the fingerprint cache (hit) or recomputed (miss)',
+    ('result',)
+))
+
+EVENT_STREAMS = REGISTRY.register(Gauge(
+    'subsmart_event_streams',
+    'Open /api/events connections'
+))
+
+EVENTS_PUBLISHED = REGISTRY.register(Counter(
+    'subsmart_events_published_total',
+    'Change events published to at least one open stream',
+    ('event',)
+))
+
+EVENTS_DROPPED = REGISTRY.register(Counter(
+    'subsmart_events_dropped_total',
+    'Queued events discarded because a stream fell behind'
+))
+
+
+def timed(operation: str):
+    """
+    Time a hot-path operation
+
+    Usage:
+        with timed("parse_csv"):
+            parse_csv(content)
+    """
+    return OPERATION_LATENCY.time(operation=operation)
+
+
+def timed_commit(db, operation: str) -> None:
+    """
+    Commit a session and record how long the commit took
+
+    Args:
+        db: Database session
+        operation: Caller label (e.g. "upload", "detect")
+    """
+    with DB_COMMIT_LATENCY.time(operation=operation):
+        db.commit()
+
+
+def count_rows(operation: str, count: int) -> None:
+    """Add to the processed-row counter for an operation"""
+    ROWS_PROCESSED.inc(count, operation=operation)
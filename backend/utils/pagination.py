@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import date
+from typing import Any, Optional, Tuple
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(value: Any, last_id: int) -> str:
+    """
+    Encode the sort key of the last returned row as an opaque cursor
+
+    Args:
+        value: Sort column value of the last row (may be None)
+        last_id: Primary key of the last row (tie-breaker)
+
+    Returns:
+        URL-safe cursor string
+    """
+    if isinstance(value, date):
+        value = value.isoformat()
+    payload = json.dumps([value, last_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, is_date: bool = False) -> Tuple[Any, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor string
+        is_date: Whether the sort value should be parsed as a date
+
+    Returns:
+        Tuple of (value, last_id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        if is_date and value is not None:
+            value = date.fromisoformat(value)
+        return value, int(last_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_filter(column, id_column, value: Optional[Any], last_id: int, descending: bool):
+    """
+    Build the WHERE clause selecting rows after a cursor position
+
+    Rows are ordered by (column, id) in the given direction. SQLite sorts
+    NULLs first ascending and last descending, which is mirrored here so
+    nullable sort columns page correctly.
+
+    Args:
+        column: Sort column
+        id_column: Primary key column used as tie-breaker
+        value: Sort value of the last returned row
+        last_id: Primary key of the last returned row
+        descending: Sort direction
+
+    Returns:
+        SQLAlchemy boolean expression
+    """
+    if descending:
+        if value is None:
+            return and_(column.is_(None), id_column < last_id)
+        return or_(
+            column < value,
+            and_(column == value, id_column < last_id),
+            column.is_(None)
+        )
+
+    if value is None:
+        return or_(
+            and_(column.is_(None), id_column > last_id),
+            column.isnot(None)
+        )
+    return or_(
+        column > value,
+        and_(column == value, id_column > last_id)
+    )
@@ -1,19 +1,36 @@
 import csv
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 import re
+from backend.utils.currency import detect_currency
 
+# Currency symbols and codes, thousands separators and whitespace around amounts
+_AMOUNT_NOISE = re.compile(r'[£$€¥₹,\s]|[A-Za-z]{3}')
 
-def parse_csv(file_content: str) -> List[Dict[str, any]]:
+
+def parse_csv(
+    file_content: str,
+    skipped_currencies: Optional[Dict[str, int]] = None
+) -> List[Dict[str, any]]:
     """
-    Parse CSV content and extract Date, Description, Amount
+    Parse CSV content and extract Date, Description, Amount, Currency
+    
+    The currency comes from a currency column when present, otherwise
+    from a code or symbol in the amount (see currency.detect_currency).
+    Rows in currencies the FX rate table cannot convert are skipped.
     
     Args:
         file_content: CSV file content as string
+        skipped_currencies: Filled with the number of rows skipped per
+            unsupported currency code
         
     Returns:
-        List of transaction dictionaries with date, description, amount
+        List of transaction dictionaries with date, description, amount,
+        currency
     """
+    from backend.utils.fx import supported_currencies
+    supported = supported_currencies()
+    unsupported = skipped_currencies if skipped_currencies is not None else {}
     transactions = []
     csv_reader = csv.DictReader(file_content.splitlines())
     
@@ -42,6 +59,13 @@ def parse_csv(file_content: str) -> List[Dict[str, any]]:
             
             if not date_str or not description or not amount_str:
                 continue
+            
+            # Optional currency column
+            currency_str = None
+            for key in row.keys():
+                if key.lower() in ['currency', 'currency code', 'ccy']:
+                    currency_str = row[key]
+                    break
                 
             # Parse date - try multiple formats
             parsed_date = parse_date(date_str)
@@ -53,13 +77,20 @@ def parse_csv(file_content: str) -> List[Dict[str, any]]:
             if amount is None:
                 continue
             
+            # Only currencies that can be converted for totals are stored
+            currency = detect_currency(amount_str, currency_str)
+            if currency not in supported:
+                unsupported[currency] = unsupported.get(currency, 0) + 1
+                continue
+            
             # Clean description
             description = clean_description(description)
             
             transactions.append({
                 'date': parsed_date,
                 'description': description,
-                'amount': abs(amount)  # Store as positive value
+                'amount': abs(amount),  # Store as positive value
+                'currency': currency
             })
             
         except Exception as e:
@@ -97,7 +128,7 @@ def clean_amount(amount_str: str) -> float:
     """Clean and parse amount string"""
     try:
         # Remove currency symbols, commas, spaces
-        cleaned = re.sub(r'[£$€,\s]', '', amount_str)
+        cleaned = _AMOUNT_NOISE.sub('', amount_str)
         
         # Handle parentheses for negative amounts
         if '(' in cleaned and ')' in cleaned:
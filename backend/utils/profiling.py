@@ -0,0 +1,270 @@
+"""
+Opt-in per-request profiling
+
+A request is profiled when it is sampled (SUBSMART_PROFILE_SAMPLE_RATE) or
+carries an X-Profile header equal to SUBSMART_PROFILE_TOKEN. The endpoint
+runs under cProfile, SQL statements are counted and timed through engine
+events, and the result is written to a rotating directory as a .prof file
+(loadable with pstats / snakeviz) plus a .json summary.
+
+cProfile only sees the thread it is enabled in. Async endpoints that hand
+blocking work to the threadpool must use run_in_threadpool_profiled() for
+that work to appear in their profile.
+"""
+import asyncio
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from backend.database import shards
+
+PROFILE_SAMPLE_RATE = float(os.environ.get("SUBSMART_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOKEN = os.environ.get("SUBSMART_PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("SUBSMART_PROFILE_DIR", "./profiles")
+PROFILE_KEEP = int(os.environ.get("SUBSMART_PROFILE_KEEP", "50"))
+
+PROFILE_HEADER = "x-profile"
+
+_PROFILE_ID = re.compile(r'^[0-9]{8}T[0-9]{12}-[0-9a-f]{8}$')
+
+_current: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+
+class ProfileSession:
+    """Profiling state for a single request"""
+
+    def __init__(self, request: Request, reason: str):
+        now = datetime.now(timezone.utc)
+        self.id = f"{now.strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+        self.started_at = now.isoformat()
+        self.method = request.method
+        self.path = request.url.path
+        self.query = str(request.query_params)
+        self.reason = reason
+        self.profiler = cProfile.Profile()
+        # One per call handed to the threadpool by run_in_threadpool_profiled
+        self.thread_profilers: List[cProfile.Profile] = []
+        self.sql: Dict[str, Dict] = {}
+        self.duration = 0.0
+        self.status_code = None
+
+    def record_sql(self, statement: str, seconds: float) -> None:
+        key = ' '.join(statement.split())[:300]
+        stats = self.sql.setdefault(key, {"count": 0, "total_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += seconds * 1000
+
+    def run_profiled(self, func: Callable, *args, **kwargs):
+        """Call func under a profiler of its own, for the current thread"""
+        profiler = cProfile.Profile()
+        self.thread_profilers.append(profiler)
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+
+    def stats(self, stream: io.StringIO = None) -> Optional[pstats.Stats]:
+        """Endpoint and threadpool profiles combined, None if nothing was recorded"""
+        combined = None
+        for profiler in [self.profiler, *self.thread_profilers]:
+            try:
+                stats = pstats.Stats(profiler, stream=stream)
+            except TypeError:
+                # Nothing was recorded (e.g. the handler failed before running)
+                continue
+            if combined is None:
+                combined = stats
+            else:
+                combined.add(stats)
+        return combined
+
+    def summary(self) -> Dict:
+        stream = io.StringIO()
+        stats = self.stats(stream)
+        top_functions = ""
+        if stats is not None:
+            stats.sort_stats("cumulative").print_stats(25)
+            top_functions = stream.getvalue()
+
+        statements = sorted(self.sql.items(), key=lambda kv: -kv[1]["total_ms"])
+        return {
+            "id": self.id,
+            "started_at": self.started_at,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "reason": self.reason,
+            "status_code": self.status_code,
+            "duration_ms": round(self.duration * 1000, 3),
+            "sql_count": sum(s["count"] for _, s in statements),
+            "sql_total_ms": round(sum(s["total_ms"] for _, s in statements), 3),
+            "sql": [
+                {"statement": sql, "count": s["count"], "total_ms": round(s["total_ms"], 3)}
+                for sql, s in statements
+            ],
+            "top_functions": top_functions,
+        }
+
+    def save(self, directory: str = None, keep: int = None) -> None:
+        """Write .prof and .json files and drop the oldest beyond `keep`"""
+        directory = directory or PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        (self.stats() or self.profiler).dump_stats(os.path.join(directory, f"{self.id}.prof"))
+        with open(os.path.join(directory, f"{self.id}.json"), "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        rotate(directory, keep if keep is not None else PROFILE_KEEP)
+
+
+def rotate(directory: str, keep: int) -> None:
+    """Keep only the newest `keep` profiles in a directory"""
+    for profile_id in list_profile_ids(directory)[keep:]:
+        for ext in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(directory, profile_id + ext))
+            except FileNotFoundError:
+                pass
+
+
+def list_profile_ids(directory: str = None) -> List[str]:
+    """Saved profile IDs, newest first"""
+    directory = directory or PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    ids = {
+        name.rsplit(".", 1)[0] for name in os.listdir(directory)
+        if name.endswith(".json") and _PROFILE_ID.match(name.rsplit(".", 1)[0])
+    }
+    return sorted(ids, reverse=True)
+
+
+def profile_path(profile_id: str, ext: str, directory: str = None) -> Optional[str]:
+    """Path of a saved profile file, or None for unknown/invalid IDs"""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(directory or PROFILE_DIR, profile_id + ext)
+    return path if os.path.isfile(path) else None
+
+
+def should_profile(request: Request) -> Optional[str]:
+    """
+    Decide whether to profile a request
+
+    Returns:
+        "header" or "sampled" when the request should be profiled, else None
+    """
+    if PROFILE_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILE_TOKEN:
+        return "header"
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+async def run_in_threadpool_profiled(func: Callable, *args, **kwargs):
+    """
+    run_in_threadpool, with func profiled when the request is
+
+    Args:
+        func: Blocking callable
+        *args, **kwargs: Passed to func
+
+    Returns:
+        func's return value
+    """
+    session = _current.get()
+    if session is None:
+        return await run_in_threadpool(func, *args, **kwargs)
+    return await run_in_threadpool(session.run_profiled, func, *args, **kwargs)
+
+
+def _profiled(endpoint: Callable) -> Callable:
+    """Wrap an endpoint so it runs under the active session's profiler"""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            session = _current.get()
+            if session is None:
+                return await endpoint(*args, **kwargs)
+            # Note: other coroutines on the event loop are captured too,
+            # and threadpool work only via run_in_threadpool_profiled
+            session.profiler.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                session.profiler.disable()
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        session = _current.get()
+        if session is None:
+            return endpoint(*args, **kwargs)
+        # Sync endpoints run in a worker thread; profile just that thread
+        session.profiler.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            session.profiler.disable()
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that profiles the handler when should_profile() says so"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request: Request) -> Response:
+            reason = should_profile(request)
+            if reason is None:
+                return await handler(request)
+
+            session = ProfileSession(request, reason)
+            token = _current.set(session)
+            start = time.perf_counter()
+            try:
+                response = await handler(request)
+                session.status_code = response.status_code
+                response.headers["X-Profile-Id"] = session.id
+                return response
+            finally:
+                session.duration = time.perf_counter() - start
+                _current.reset(token)
+                await run_in_threadpool(session.save)
+
+        return profiled_handler
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    session = _current.get()
+    if session is None:
+        return
+    starts = conn.info.get("profile_query_start")
+    if starts:
+        session.record_sql(statement, time.perf_counter() - starts.pop())
+
+
+for _engine in shards.engines:
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
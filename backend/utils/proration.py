@@ -1,5 +1,7 @@
 from datetime import date, timedelta
-from typing import Dict
+from typing import Dict, Optional
+from backend.utils.cost import monthly_cost
+from backend.utils.currency import DEFAULT_CURRENCY
 
 
 def calculate_proration(
@@ -18,7 +20,8 @@ def calculate_proration(
     
     Args:
         amount: Subscription amount
-        frequency: Billing frequency (monthly, yearly, weekly, bi-weekly)
+        frequency: Billing frequency (weekly, bi-weekly, monthly, quarterly,
+            semi-annual, yearly)
         last_renewal_date: Date of last billing
         cancellation_date: Date of cancellation
         
@@ -97,6 +100,7 @@ def get_billing_cycle_days(frequency: str) -> int:
         'bi-weekly': 14,
         'monthly': 30,
         'quarterly': 90,
+        'semi-annual': 182,
         'yearly': 365,
         'annual': 365
     }
@@ -104,38 +108,48 @@ def get_billing_cycle_days(frequency: str) -> int:
     return frequency_map.get(frequency.lower())
 
 
-def estimate_annual_savings(subscriptions: list) -> Dict[str, any]:
+def estimate_annual_savings(
+    subscriptions: list,
+    currency: str = DEFAULT_CURRENCY,
+    on: Optional[date] = None
+) -> Dict[str, any]:
     """
     Estimate potential annual savings from cancelling subscriptions
     
+    Uses each subscription's stored monthly_cost when given, else derives
+    it from amount and frequency. Costs in other currencies are converted
+    at the rates of the given date; currencies without FX rates count as
+    zero and are listed under unconverted_currencies.
+    
     Args:
-        subscriptions: List of subscription dictionaries
+        subscriptions: List of subscription dictionaries (amount,
+            frequency, currency, optional monthly_cost)
+        currency: Currency of the estimates
+        on: Conversion date (default today)
         
     Returns:
         Dictionary with savings estimates
     """
-    total_monthly = 0.0
-    total_yearly = 0.0
-    
-    for sub in subscriptions:
-        amount = sub.get('amount', 0)
-        frequency = sub.get('frequency', 'monthly').lower()
-        
-        if frequency == 'monthly':
-            total_monthly += amount
-            total_yearly += amount * 12
-        elif frequency == 'yearly' or frequency == 'annual':
-            total_yearly += amount
-            total_monthly += amount / 12
-        elif frequency == 'weekly':
-            total_yearly += amount * 52
-            total_monthly += amount * 4.33
-        elif frequency == 'bi-weekly':
-            total_yearly += amount * 26
-            total_monthly += amount * 2.17
+    costs = [
+        sub['monthly_cost'] if sub.get('monthly_cost') is not None
+        else monthly_cost(sub.get('amount', 0), sub.get('frequency', 'monthly'))
+        for sub in subscriptions
+    ]
+    currencies = [sub.get('currency') or currency for sub in subscriptions]
+    unconverted = []
+    
+    if any(code != currency for code in currencies):
+        # NumPy is only needed for mixed currencies
+        from backend.utils.fx import convert, supported_currencies
+        costs = convert(costs, currencies, currency, on or date.today(), missing=0.0).tolist()
+        unconverted = sorted(set(currencies) - supported_currencies())
+    
+    total_monthly = sum(costs)
     
     return {
         'total_monthly_cost': round(total_monthly, 2),
-        'total_yearly_cost': round(total_yearly, 2),
-        'average_per_subscription': round(total_monthly / len(subscriptions), 2) if subscriptions else 0
+        'total_yearly_cost': round(total_monthly * 12, 2),
+        'average_per_subscription': round(total_monthly / len(subscriptions), 2) if subscriptions else 0,
+        'currency': currency,
+        'unconverted_currencies': unconverted
     }
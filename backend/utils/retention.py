@@ -0,0 +1,279 @@
+"""
+Transaction retention: fold old transactions into monthly rollups
+
+Transactions dated before the retention horizon are replaced by
+MerchantMonthlyRollup rows (see backend.utils.rollups), one per merchant,
+month and currency, which detection expands back into charges. Every
+month before the horizon is folded; the horizon is rounded down to a
+month start, so a merchant's month is never split between raw rows and a
+rollup.
+
+Each user is compacted in batches of whole months. A batch writes its
+months' rollups, deletes their raw rows and drops the cached detection
+result in one commit. Writers are blocked only briefly, and an
+interrupted run never counts a charge twice; rerunning picks up the
+months that were not committed.
+"""
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from backend.database import SNAPSHOT_DIR
+from backend.models.merchant_rollup import MerchantMonthlyRollup
+from backend.models.transaction import Transaction
+from backend.utils.detect_recurring import detect_recurring_records, normalize_merchant
+from backend.utils.detection import invalidate_detection, load_records
+from backend.utils.metrics import count_rows, timed_commit
+from backend.utils.rollups import expand_rollup, fold_merchant, month_start
+from backend.utils.txn_record import TxnRecord
+from backend.utils.versioning import bump_version
+
+# Transactions older than this many days are folded into rollups
+RETENTION_DAYS = int(os.environ.get("SUBSMART_RETENTION_DAYS", "730"))
+
+# Raw rows folded per commit (whole months, so batches can run over)
+COMPACT_BATCH_ROWS = 5000
+
+# Ids per DELETE statement, under SQLite's bound-parameter limit
+DELETE_CHUNK = 500
+
+# Free pages returned to the filesystem per incremental_vacuum step
+VACUUM_STEP_PAGES = 2000
+
+
+def retention_cutoff(days: int = RETENTION_DAYS, today: Optional[date] = None) -> date:
+    """First day kept raw: the start of the month `days` before today"""
+    return month_start((today or date.today()) - timedelta(days=days))
+
+
+def detection_view(records: Iterable[TxnRecord]) -> Dict[str, Dict]:
+    """Detected subscriptions by merchant, reduced to what compaction must preserve"""
+    return {
+        sub['merchant_name']: {
+            'frequency': sub['frequency'],
+            'amount': sub['amount'],
+            'start_date': sub['start_date'].isoformat(),
+            'next_billing_date': sub['next_billing_date'].isoformat(),
+        }
+        for sub in detect_recurring_records(records)
+    }
+
+
+def compare_detection(before: Dict[str, Dict], after: Dict[str, Dict]) -> Dict:
+    """Summarize how detection output differs between two detection_view()s"""
+    changed = sorted(
+        name for name in before.keys() | after.keys()
+        if before.get(name) != after.get(name)
+    )
+    return {
+        "before": len(before),
+        "after": len(after),
+        "changed": [
+            {"merchant_name": name, "before": before.get(name), "after": after.get(name)}
+            for name in changed
+        ],
+    }
+
+
+def compact_user(
+    db: Session,
+    user_id: int,
+    cutoff: date,
+    dry_run: bool = False,
+    batch_rows: int = COMPACT_BATCH_ROWS
+) -> Dict:
+    """
+    Fold a user's transactions dated before cutoff into monthly rollups
+
+    Args:
+        db: Database session on the user's shard
+        user_id: User ID
+        cutoff: Month start; earlier transactions are folded
+        dry_run: Plan and report without writing
+        batch_rows: Raw rows per commit
+
+    Returns:
+        Report with rows folded, rollups written, commits and the
+        detection results before and after
+    """
+    records = load_records(db, user_id)
+    before = detection_view(records)
+    rows = db.query(
+        Transaction.id,
+        Transaction.date,
+        Transaction.description,
+        Transaction.amount,
+        Transaction.currency
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.date < cutoff
+    ).order_by(Transaction.date, Transaction.id).all()
+
+    # Rollups are per merchant and currency, so charges in different
+    # currencies are never summed together
+    Series = Tuple[str, str]
+    stored: Dict[Series, Dict[date, MerchantMonthlyRollup]] = defaultdict(dict)
+    for rollup in db.query(MerchantMonthlyRollup).filter(
+        MerchantMonthlyRollup.user_id == user_id,
+        MerchantMonthlyRollup.month < cutoff
+    ):
+        stored[(rollup.merchant_key, rollup.currency)][rollup.month] = rollup
+
+    by_series: Dict[Series, List[TxnRecord]] = defaultdict(list)
+    ids_by_month: Dict[date, List[int]] = defaultdict(list)
+    for txn_id, txn_date, description, amount, currency in rows:
+        by_series[(normalize_merchant(description), currency)].append(
+            TxnRecord(txn_date, description, amount, currency)
+        )
+        ids_by_month[month_start(txn_date)].append(txn_id)
+
+    report = {
+        "user_id": user_id,
+        "rows_folded": len(rows),
+        "rollups_written": 0,
+        "batches": 0
+    }
+    if not rows:
+        report["detection"] = compare_detection(before, before)
+        return report
+
+    # Stored rollups of a month with raw rows are merged into the new fold
+    # and replaced, so a backfilled charge never sits next to its rollup
+    replaced: Dict[date, List[Series]] = defaultdict(list)
+    folded: Dict[date, List[MerchantMonthlyRollup]] = defaultdict(list)
+    for (key, currency), records in by_series.items():
+        series_stored = stored.get((key, currency), {})
+        for month in {month_start(record.date) for record in records}:
+            if month in series_stored:
+                replaced[month].append((key, currency))
+        for rollup in fold_merchant(user_id, key, records, series_stored):
+            folded[rollup.month].append(rollup)
+    report["rollups_written"] = sum(len(rollups) for rollups in folded.values())
+
+    if dry_run:
+        untouched = [
+            record
+            for series, months in stored.items()
+            for month, rollup in months.items() if series not in replaced.get(month, ())
+            for record in expand_rollup(rollup)
+        ]
+        after_records = untouched + [
+            record for rollups in folded.values() for rollup in rollups
+            for record in expand_rollup(rollup)
+        ] + [record for record in records if record.date >= cutoff]
+        report["detection"] = compare_detection(before, detection_view(after_records))
+        return report
+
+    batch: List[date] = []
+    batch_size = 0
+    months = sorted(ids_by_month)
+    for month in months:
+        batch.append(month)
+        batch_size += len(ids_by_month[month])
+        if batch_size < batch_rows and month != months[-1]:
+            continue
+        for batch_month in batch:
+            if replaced.get(batch_month):
+                db.query(MerchantMonthlyRollup).filter(
+                    MerchantMonthlyRollup.user_id == user_id,
+                    MerchantMonthlyRollup.month == batch_month,
+                    tuple_(
+                        MerchantMonthlyRollup.merchant_key, MerchantMonthlyRollup.currency
+                    ).in_(replaced[batch_month])
+                ).delete(synchronize_session="evaluate")
+            db.add_all(folded.get(batch_month, ()))
+            ids = ids_by_month[batch_month]
+            for start in range(0, len(ids), DELETE_CHUNK):
+                db.query(Transaction).filter(
+                    Transaction.id.in_(ids[start:start + DELETE_CHUNK])
+                ).delete(synchronize_session=False)
+        invalidate_detection(db, user_id)
+        bump_version(db, user_id)
+        timed_commit(db, "compact")
+        count_rows("compact", batch_size)
+        report["batches"] += 1
+        batch = []
+        batch_size = 0
+
+    if SNAPSHOT_DIR:
+        from backend.utils.snapshots import rebuild_snapshot
+        rebuild_snapshot(db, user_id)
+
+    report["detection"] = compare_detection(before, detection_view(load_records(db, user_id)))
+    return report
+
+
+def database_space(bind: Engine) -> Optional[Dict]:
+    """
+    Size of a SQLite database in pages
+
+    Returns:
+        Total and free bytes, or None for other databases
+    """
+    if bind.dialect.name != "sqlite":
+        return None
+    with bind.connect() as conn:
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+        page_count = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    return {
+        "bytes": page_size * page_count,
+        "free_bytes": page_size * free_pages,
+    }
+
+
+def incremental_vacuum(
+    bind: Engine,
+    step_pages: int = VACUUM_STEP_PAGES,
+    max_bytes: Optional[int] = None
+) -> Optional[Dict]:
+    """
+    Return a SQLite database's free pages to the filesystem
+
+    Pages are released in small steps so other connections can write in
+    between. Deleting rows scattered across pages (statements imported out
+    of date order) leaves those pages partly filled rather than free, and
+    rollups cannot reuse them. If the file is still larger than max_bytes
+    after the steps, it is rewritten with one full VACUUM. A database
+    created before auto_vacuum=INCREMENTAL was configured is converted the
+    same way first. A full VACUUM blocks writers while it runs and needs
+    about the file's size in free disk space.
+
+    Args:
+        bind: Engine of the database
+        step_pages: Pages released per step
+        max_bytes: Size the file should not exceed, usually its size
+            before compaction
+
+    Returns:
+        Whether the file was converted or rewritten and how many steps ran,
+        or None for other databases
+    """
+    if bind.dialect.name != "sqlite":
+        return None
+    converted = False
+    rewritten = False
+    steps = 0
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+            converted = True
+        free_pages = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        while free_pages:
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum({step_pages})")
+            steps += 1
+            remaining = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            if remaining >= free_pages:
+                break
+            free_pages = remaining
+        if max_bytes is not None:
+            page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+            if page_size * conn.exec_driver_sql("PRAGMA page_count").scalar() > max_bytes:
+                conn.exec_driver_sql("VACUUM")
+                rewritten = True
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return {"converted": converted, "rewritten": rewritten, "steps": steps}
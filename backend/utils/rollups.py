@@ -0,0 +1,164 @@
+"""
+Monthly per-merchant rollups of folded transactions
+
+Retention (backend.utils.retention) replaces old transactions with one
+MerchantMonthlyRollup row per merchant, currency and month. A rollup keeps what
+detection needs from its month: the number of charges after duplicate
+removal, the first and last charge dates and amounts, and the amount
+total. expand_rollup() turns it back into charges. The first and last
+charge are exact; the ones in between are spaced evenly and share the
+remaining amount. Values implied by the charge count are stored as NULL
+(see MerchantMonthlyRollup), so read rollups through expand_rollup() and
+rollup_totals(). Gaps between months are preserved exactly, and gaps
+within a month (weekly, bi-weekly) keep their average.
+"""
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.models.merchant_rollup import MerchantMonthlyRollup
+from backend.utils.charge_events import scan_charges
+from backend.utils.txn_record import TxnRecord
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def expand_rollup(rollup: MerchantMonthlyRollup) -> List[TxnRecord]:
+    """
+    Charges represented by a rollup
+
+    Amounts are split in whole cents, so the charges sum to amount_total.
+
+    Args:
+        rollup: Stored or freshly folded rollup
+
+    Returns:
+        charge_count TxnRecords in date order
+    """
+    count = rollup.charge_count
+    if count == 1:
+        return [TxnRecord(rollup.last_date, rollup.description, rollup.last_amount, rollup.currency)]
+
+    first = rollup.first_date.toordinal()
+    span = rollup.last_date.toordinal() - first
+    amounts = [rollup.first_amount]
+    if count > 2:
+        # amount_total is only stored when there are middle charges
+        middle_cents = round(rollup.amount_total * 100) - round(rollup.first_amount * 100) - round(rollup.last_amount * 100)
+        base, extra = divmod(middle_cents, count - 2)
+        amounts += [(base + (i < extra)) / 100 for i in range(count - 2)]
+    amounts.append(rollup.last_amount)
+    return [
+        TxnRecord(
+            date.fromordinal(first + round(i * span / (count - 1))),
+            rollup.description,
+            amount,
+            rollup.currency
+        )
+        for i, amount in enumerate(amounts)
+    ]
+
+
+def fold_merchant(
+    user_id: int,
+    merchant_key: str,
+    records: List[TxnRecord],
+    stored: Optional[Dict[date, MerchantMonthlyRollup]] = None
+) -> List[MerchantMonthlyRollup]:
+    """
+    Fold one merchant's charges in one currency into monthly rollups
+
+    Duplicate charges are dropped the same way detection drops them and
+    only counted. Stored rollups of months the records fall in are merged
+    in, so charges backfilled after an earlier compaction are not lost.
+
+    Args:
+        user_id: User ID
+        merchant_key: normalize_merchant() of the records' descriptions
+        records: The merchant's charges to fold, all in one currency
+        stored: Existing rollups of this merchant in that currency, by
+            month
+
+    Returns:
+        Rollups replacing every month the records fall in (months left
+        with no charges after duplicate removal are omitted)
+    """
+    stored = stored or {}
+    months = {month_start(record.date) for record in records}
+    merged = [
+        record
+        for month in months if month in stored
+        for record in expand_rollup(stored[month])
+    ]
+    # Stable sort: on ties, already-folded charges stay first
+    sequence = sorted(merged + list(records), key=lambda r: r.date)
+
+    seen = Counter(month_start(record.date) for record in sequence)
+    kept: Dict[date, List[TxnRecord]] = defaultdict(list)
+    for charge in scan_charges(sequence).charges:
+        kept[month_start(charge.date)].append(charge)
+
+    rollups = []
+    for month in sorted(months):
+        charges = kept.get(month)
+        if not charges:
+            continue
+        previous = stored.get(month)
+        single = len(charges) == 1
+        rollups.append(MerchantMonthlyRollup(
+            user_id=user_id,
+            merchant_key=merchant_key,
+            month=month,
+            description=charges[-1].description,
+            currency=charges[-1].currency,
+            charge_count=len(charges),
+            duplicate_count=seen[month] - len(charges) + (previous.duplicate_count if previous else 0),
+            first_date=None if single else charges[0].date,
+            last_date=charges[-1].date,
+            first_amount=None if single else charges[0].amount,
+            last_amount=charges[-1].amount,
+            amount_total=(
+                round(sum(charge.amount for charge in charges), 2) if len(charges) > 2 else None
+            )
+        ))
+    return rollups
+
+
+def load_rollup_records(db: Session, user_id: int) -> List[TxnRecord]:
+    """
+    Expand a user's rollups into charges
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        TxnRecords, oldest month first
+    """
+    rollups = db.query(MerchantMonthlyRollup).filter(
+        MerchantMonthlyRollup.user_id == user_id
+    ).order_by(MerchantMonthlyRollup.month)
+    return [record for rollup in rollups for record in expand_rollup(rollup)]
+
+
+def rollup_totals(db: Session, user_id: int) -> Tuple[int, float, Optional[date], Optional[date]]:
+    """
+    Charge count, amount total and date range covered by a user's rollups
+
+    Returns:
+        Tuple of (charges, amount total, first date, last date)
+    """
+    rollup = MerchantMonthlyRollup
+    # Stored in cents; NULL totals are the first plus last amount
+    count, cents, first, last = db.query(
+        func.total(rollup.charge_count),
+        func.total(func.coalesce(
+            rollup.amount_total, func.coalesce(rollup.first_amount, 0) + rollup.last_amount
+        )),
+        func.min(func.coalesce(rollup.first_date, rollup.last_date)),
+        func.max(rollup.last_date)
+    ).filter(rollup.user_id == user_id).one()
+    return int(count), round(cents / 100, 2), first, last
@@ -0,0 +1,51 @@
+from functools import lru_cache
+from typing import Iterable, List, Optional, Type
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """Build (once per model) a validator/serializer for List[model]"""
+    return TypeAdapter(List[model])
+
+
+def dump_models(model: Type[BaseModel], rows: Iterable) -> bytes:
+    """
+    Serialize ORM rows straight to JSON bytes through a Pydantic model
+    
+    Validation and serialization both run in pydantic-core, skipping
+    FastAPI's jsonable_encoder pass over intermediate dicts.
+    
+    Args:
+        model: Pydantic response model (with from_attributes enabled)
+        rows: ORM instances or mappings
+        
+    Returns:
+        UTF-8 encoded JSON array
+    """
+    adapter = _list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def models_response(
+    model: Type[BaseModel],
+    rows: Iterable,
+    headers: Optional[dict] = None
+) -> Response:
+    """
+    Build a JSON response from ORM rows without FastAPI re-encoding them
+    
+    Args:
+        model: Pydantic response model
+        rows: ORM instances or mappings
+        headers: Extra response headers
+        
+    Returns:
+        Response with an application/json body
+    """
+    return Response(
+        content=dump_models(model, rows),
+        media_type="application/json",
+        headers=headers
+    )
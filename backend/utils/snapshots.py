@@ -0,0 +1,469 @@
+"""
+Memory-mapped columnar transaction snapshots
+
+An optional, derived copy of each user's transactions laid out for
+analytical reads. Enabled by setting SUBSMART_SNAPSHOT_DIR; the database
+stays the source of truth and a snapshot can always be rebuilt from it.
+Charges folded into monthly rollups by retention are included, expanded,
+ahead of the raw transactions.
+
+Layout per user (SUBSMART_SNAPSHOT_DIR/user-<id>/):
+    dates.bin      ordinal dates (int32)
+    cents.bin      amounts in integer cents (int64)
+    merchants.bin  merchant key ids (int32), indexes into keys.json
+    currencies.bin ISO currency codes packed base-26 (int16)
+    keys.json      merchant key dictionary (normalize_merchant() output)
+    meta.json      format and row count; only the first `count` rows of
+                   each column are valid, so an interrupted append is
+                   ignored and truncated by the next writer
+
+Columns are opened with np.memmap, so readers share the page cache and
+nothing is copied until a slice is materialized.
+"""
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.database import SNAPSHOT_DIR
+from backend.models.transaction import Transaction
+from backend.utils.currency import DEFAULT_CURRENCY
+from backend.utils.detect_recurring import analyze_merchant_plans, normalize_merchant
+from backend.utils.rollups import load_rollup_records, rollup_totals
+from backend.utils.txn_record import TxnRecord
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+SNAPSHOT_FORMAT = 2
+
+COLUMNS: Tuple[Tuple[str, type], ...] = (
+    ("dates", np.int32),
+    ("cents", np.int64),
+    ("merchants", np.int32),
+    ("currencies", np.int16),
+)
+
+# Rows streamed from the database per chunk when rebuilding
+REBUILD_CHUNK = 50000
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def pack_currency(code: str) -> int:
+    """Pack a three-letter currency code into an int16 (base 26)"""
+    a, b, c = (ord(ch) - 65 for ch in code.upper())
+    return (a * 26 + b) * 26 + c
+
+
+def unpack_currency(value: int) -> str:
+    rest, c = divmod(int(value), 26)
+    a, b = divmod(rest, 26)
+    return chr(a + 65) + chr(b + 65) + chr(c + 65)
+
+
+def snapshot_path(user_id: int, directory: str = None) -> str:
+    return os.path.join(directory or SNAPSHOT_DIR, f"user-{user_id}")
+
+
+def _read_json(path: str, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+
+def _write_json(path: str, data) -> None:
+    """Write JSON atomically (readers never see a partial file)"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _locked(user_id: int, directory: str = None):
+    """Serialize writers of one user's snapshot across threads and processes"""
+    base = directory or SNAPSHOT_DIR
+    os.makedirs(base, exist_ok=True)
+    with open(os.path.join(base, f"user-{user_id}.lock"), "w") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+class Snapshot:
+    """
+    Read-only view of one user's columnar snapshot
+
+    Attributes:
+        count: Number of valid rows
+        dates: Ordinal dates (int32 memmap)
+        cents: Amounts in cents (int64 memmap)
+        merchants: Merchant key ids (int32 memmap)
+        currencies: Packed currency codes (int16 memmap)
+        keys: Merchant key dictionary
+    """
+    __slots__ = ('count', 'dates', 'cents', 'merchants', 'currencies', 'keys')
+
+    def __init__(self, count: int, dates, cents, merchants, currencies, keys: List[str]):
+        self.count = count
+        self.dates = dates
+        self.cents = cents
+        self.merchants = merchants
+        self.currencies = currencies
+        self.keys = keys
+
+    def currency_codes(self, packed: np.ndarray) -> np.ndarray:
+        """Unpack currency codes (decoded once per distinct code)"""
+        values, inverse = np.unique(packed, return_inverse=True)
+        return np.array([unpack_currency(v) for v in values.tolist()], dtype=object)[inverse]
+
+    @classmethod
+    def open(cls, user_id: int, directory: str = None) -> Optional["Snapshot"]:
+        """Map a user's snapshot, or None if there is no valid one"""
+        path = snapshot_path(user_id, directory)
+        meta = _read_json(os.path.join(path, "meta.json"), None)
+        if not meta or meta.get("format") != SNAPSHOT_FORMAT:
+            return None
+        count = meta["count"]
+        try:
+            columns = [
+                np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(count,))
+                if count else np.zeros(0, dtype=dtype)
+                for name, dtype in COLUMNS
+            ]
+        except (FileNotFoundError, ValueError):
+            # Missing or short column file
+            return None
+        return cls(count, *columns, _read_json(os.path.join(path, "keys.json"), []))
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable) -> "Snapshot":
+        """Build an in-memory snapshot (same layout, nothing written to disk)"""
+        keys: List[str] = []
+        columns = [
+            np.asarray(values, dtype=dtype)
+            for (_, dtype), values in zip(COLUMNS, _encode(keys, transactions))
+        ]
+        return cls(len(columns[0]), *columns, keys)
+
+    def grouped(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Order rows by merchant, then date
+
+        Returns:
+            Tuple of (order, group starts, group ends); the sort is stable,
+            so same-day rows keep insertion order like the row-based path
+        """
+        order = np.lexsort((self.dates, self.merchants))
+        merchants = self.merchants[order]
+        bounds = np.flatnonzero(merchants[1:] != merchants[:-1]) + 1
+        starts = np.concatenate(([0], bounds)) if self.count else np.zeros(0, dtype=np.int64)
+        ends = np.concatenate((bounds, [self.count])) if self.count else np.zeros(0, dtype=np.int64)
+        return order, starts, ends
+
+
+def _encode(keys: List[str], transactions: Iterable) -> Tuple[List[int], ...]:
+    """Encode transactions as column values, extending keys with new merchants"""
+    index = {key: i for i, key in enumerate(keys)}
+    packed: Dict[str, int] = {}
+    dates: List[int] = []
+    cents: List[int] = []
+    merchants: List[int] = []
+    currencies: List[int] = []
+    for txn in transactions:
+        key = normalize_merchant(txn['description'])
+        merchant_id = index.get(key)
+        if merchant_id is None:
+            merchant_id = index[key] = len(keys)
+            keys.append(key)
+        dates.append(txn['date'].toordinal())
+        cents.append(round(txn['amount'] * 100))
+        merchants.append(merchant_id)
+        currency = txn.get('currency') or DEFAULT_CURRENCY
+        code = packed.get(currency)
+        if code is None:
+            code = packed[currency] = pack_currency(currency)
+        currencies.append(code)
+    return dates, cents, merchants, currencies
+
+
+def _append_rows(path: str, meta: Dict, keys: List[str], transactions: Iterable) -> int:
+    """Append transactions to an open snapshot directory (caller holds the lock)"""
+    columns = _encode(keys, transactions)
+    if not columns[0]:
+        return 0
+
+    count = meta["count"]
+    for (name, dtype), values in zip(COLUMNS, columns):
+        column = os.path.join(path, f"{name}.bin")
+        with open(column, "r+b" if os.path.exists(column) else "wb") as f:
+            # Drop any tail left by an interrupted append
+            f.truncate(count * np.dtype(dtype).itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(np.asarray(values, dtype=dtype).tobytes())
+
+    _write_json(os.path.join(path, "keys.json"), keys)
+    meta["count"] = count + len(columns[0])
+    _write_json(os.path.join(path, "meta.json"), meta)
+    return len(columns[0])
+
+
+def _db_count(db: Session, user_id: int) -> int:
+    """Rows a user's snapshot should hold: transactions plus folded charges"""
+    count = db.query(func.count(Transaction.id)).filter(Transaction.user_id == user_id).scalar()
+    return count + rollup_totals(db, user_id)[0]
+
+
+def _rebuild_locked(db: Session, user_id: int, directory: str = None) -> int:
+    path = snapshot_path(user_id, directory)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    meta = {"format": SNAPSHOT_FORMAT, "count": 0}
+    keys: List[str] = []
+    _write_json(os.path.join(path, "meta.json"), meta)
+    _append_rows(path, meta, keys, load_rollup_records(db, user_id))
+
+    rows = db.query(
+        Transaction.date,
+        Transaction.description,
+        Transaction.amount,
+        Transaction.currency
+    ).filter(
+        Transaction.user_id == user_id
+    ).order_by(Transaction.id).yield_per(REBUILD_CHUNK)
+
+    chunk = []
+    for d, desc, amount, currency in rows:
+        chunk.append(TxnRecord(d, desc, amount, currency))
+        if len(chunk) >= REBUILD_CHUNK:
+            _append_rows(path, meta, keys, chunk)
+            chunk = []
+    _append_rows(path, meta, keys, chunk)
+    return meta["count"]
+
+
+def rebuild_snapshot(db: Session, user_id: int, directory: str = None) -> int:
+    """
+    Rebuild a user's snapshot from the database
+
+    Returns:
+        Number of rows written
+    """
+    with _locked(user_id, directory):
+        return _rebuild_locked(db, user_id, directory)
+
+
+def append_snapshot(db: Session, user_id: int, transactions: Sequence, directory: str = None) -> None:
+    """
+    Append newly committed transactions to a user's snapshot
+
+    Call after the transactions are committed. If the snapshot does not
+    line up with the database (missing, or rows committed by another
+    writer in between), it is rebuilt instead. Failures drop the snapshot
+    so the next reader rebuilds it; they never fail the upload.
+
+    Args:
+        db: Database session
+        user_id: User ID
+        transactions: The transactions just stored
+        directory: Snapshot root (defaults to SUBSMART_SNAPSHOT_DIR)
+    """
+    path = snapshot_path(user_id, directory)
+    try:
+        with _locked(user_id, directory):
+            meta = _read_json(os.path.join(path, "meta.json"), None)
+            expected = _db_count(db, user_id)
+            if not meta or meta.get("format") != SNAPSHOT_FORMAT or meta["count"] + len(transactions) != expected:
+                _rebuild_locked(db, user_id, directory)
+                return
+            keys = _read_json(os.path.join(path, "keys.json"), [])
+            _append_rows(path, meta, keys, transactions)
+    except Exception:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def load_snapshot(db: Session, user_id: int, directory: str = None) -> Optional[Snapshot]:
+    """
+    Open a user's snapshot, rebuilding it if its row count is stale
+
+    Returns:
+        Snapshot, or None if it could not be built
+    """
+    snapshot = Snapshot.open(user_id, directory)
+    if snapshot is not None and snapshot.count == _db_count(db, user_id):
+        return snapshot
+    rebuild_snapshot(db, user_id, directory)
+    return Snapshot.open(user_id, directory)
+
+
+def check_snapshot(db: Session, user_id: int, directory: str = None) -> Dict:
+    """
+    Compare a user's snapshot with the database
+
+    Checks row count, amount total (to the cent) and date range, counting
+    folded charges on the database side.
+
+    Returns:
+        Dictionary with both sides' figures and an "ok" flag
+    """
+    count, amount_total, first, last = db.query(
+        func.count(Transaction.id),
+        func.total(Transaction.amount),
+        func.min(Transaction.date),
+        func.max(Transaction.date)
+    ).filter(Transaction.user_id == user_id).one()
+    folded, folded_total, folded_first, folded_last = rollup_totals(db, user_id)
+    count += folded
+    amount_total += folded_total
+    first = min(d for d in (first, folded_first) if d) if first or folded_first else None
+    last = max(d for d in (last, folded_last) if d) if last or folded_last else None
+    database = {
+        "count": count,
+        "cents_total": round(amount_total * 100),
+        "first_date": first.isoformat() if first else None,
+        "last_date": last.isoformat() if last else None,
+    }
+
+    snapshot = Snapshot.open(user_id, directory)
+    if snapshot is None:
+        return {"user_id": user_id, "ok": count == 0, "database": database, "snapshot": None}
+
+    stored = {
+        "count": snapshot.count,
+        "cents_total": int(snapshot.cents.sum()),
+        "first_date": date.fromordinal(int(snapshot.dates.min())).isoformat() if snapshot.count else None,
+        "last_date": date.fromordinal(int(snapshot.dates.max())).isoformat() if snapshot.count else None,
+    }
+    ok = (
+        stored["count"] == database["count"]
+        and abs(stored["cents_total"] - database["cents_total"]) <= 1
+        and stored["first_date"] == database["first_date"]
+        and stored["last_date"] == database["last_date"]
+    )
+    return {"user_id": user_id, "ok": ok, "database": database, "snapshot": stored}
+
+
+def detect_from_snapshot(snapshot: Snapshot) -> List[Dict]:
+    """
+    Detect subscriptions from a snapshot
+
+    Grouping and sorting run in NumPy on the mapped columns; merchant keys
+    are already normalized, so only groups with two or more charges are
+    turned into records for analyze_merchant_plans.
+
+    Returns:
+        Same output as detect_recurring_records
+    """
+    if not snapshot.count:
+        return []
+    order, starts, ends = snapshot.grouped()
+    sizes = ends - starts
+    dates = snapshot.dates[order]
+    cents = snapshot.cents[order]
+    merchants = snapshot.merchants[order]
+    currencies = snapshot.currencies[order]
+
+    days = {day: date.fromordinal(day) for day in set(dates.tolist())}
+    codes = {value: unpack_currency(value) for value in set(currencies.tolist())}
+    subscriptions = []
+    for start, end in zip(starts[sizes >= 2].tolist(), ends[sizes >= 2].tolist()):
+        key = snapshot.keys[merchants[start]]
+        if not key:
+            continue
+        txns = [
+            TxnRecord(days[day], key, amount / 100, codes[currency])
+            for day, amount, currency in zip(
+                dates[start:end].tolist(), cents[start:end].tolist(), currencies[start:end].tolist()
+            )
+        ]
+        subscriptions.extend(analyze_merchant_plans(key, txns))
+    return subscriptions
+
+
+def activity_summary(snapshot: Snapshot) -> Dict[str, Dict]:
+    """
+    Per-merchant activity from a snapshot
+
+    Returns:
+        Same output as activity.summarize_activity
+    """
+    if not snapshot.count:
+        return {}
+    order, starts, ends = snapshot.grouped()
+    dates = snapshot.dates[order]
+    cents = snapshot.cents[order]
+    merchants = snapshot.merchants[order]
+    last = ends - 1
+    summary = {}
+    for merchant_id, first_day, last_day, count, amount in zip(
+        merchants[starts].tolist(), dates[starts].tolist(), dates[last].tolist(),
+        (ends - starts).tolist(), cents[last].tolist()
+    ):
+        key = snapshot.keys[merchant_id]
+        if key:
+            summary[key] = {
+                'first_seen': date.fromordinal(first_day),
+                'last_seen': date.fromordinal(last_day),
+                'charge_count': count,
+                'last_amount': amount / 100,
+            }
+    return summary
+
+
+def monthly_totals(
+    snapshot: Snapshot,
+    merchant_keys: Iterable[str],
+    months: Sequence[date],
+    currency: Optional[str] = None
+) -> List[float]:
+    """
+    Roll up spending with the given merchants by calendar month
+
+    Args:
+        snapshot: User snapshot
+        merchant_keys: Normalized merchant keys to include
+        months: Any date within each month to report
+        currency: Convert each charge into this currency at the rate of
+            its date, leaving out charges without FX rates; None sums raw
+            amounts
+
+    Returns:
+        Total spent per requested month
+    """
+    index = {key: i for i, key in enumerate(snapshot.keys)}
+    ids = [index[key] for key in merchant_keys if key in index]
+    if not snapshot.count or not ids:
+        return [0.0] * len(months)
+
+    selected = np.isin(snapshot.merchants, ids)
+    month_of = (
+        (snapshot.dates[selected] - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    )
+    wanted = np.array([(m.year - 1970) * 12 + m.month - 1 for m in months], dtype=np.int64)
+    low = int(wanted.min())
+    in_range = (month_of >= low) & (month_of <= int(wanted.max()))
+    weights = snapshot.cents[selected][in_range].astype(float)
+    if currency:
+        from backend.utils.fx import convert
+        weights = convert(
+            weights,
+            snapshot.currency_codes(snapshot.currencies[selected][in_range]),
+            currency,
+            snapshot.dates[selected][in_range],
+            missing=0.0
+        )
+    totals = np.bincount(
+        month_of[in_range] - low,
+        weights=weights,
+        minlength=int(wanted.max()) - low + 1
+    )
+    return [round(float(totals[m - low]) / 100, 2) for m in wanted.tolist()]
@@ -0,0 +1,56 @@
+from datetime import date
+from typing import Iterable, Iterator
+from backend.utils.currency import DEFAULT_CURRENCY
+
+
+class TxnRecord:
+    """
+    Compact transaction record used by the detection hot path
+    
+    Holds only the fields detection needs, without ORM state or a
+    per-instance dict. Supports item access (record['date']) so code
+    written against the legacy list-of-dicts format keeps working.
+    """
+    __slots__ = ('date', 'description', 'amount', 'currency')
+    
+    def __init__(self, date: date, description: str, amount: float, currency: str = DEFAULT_CURRENCY):
+        self.date = date
+        self.description = description
+        self.amount = amount
+        self.currency = currency
+    
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+    
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+    
+    def __repr__(self) -> str:
+        return f'TxnRecord({self.date!r}, {self.description!r}, {self.amount!r}, {self.currency!r})'
+
+
+def as_records(transactions: Iterable) -> Iterator[TxnRecord]:
+    """
+    Adapt transactions to TxnRecord
+    
+    Args:
+        transactions: TxnRecords, (date, description, amount[, currency])
+            tuples or dicts with date, description, amount and optionally
+            currency keys
+        
+    Yields:
+        TxnRecord instances
+    """
+    for txn in transactions:
+        if isinstance(txn, TxnRecord):
+            yield txn
+        elif isinstance(txn, dict):
+            yield TxnRecord(
+                txn['date'], txn['description'], txn['amount'],
+                txn.get('currency', DEFAULT_CURRENCY)
+            )
+        else:
+            yield TxnRecord(*txn)
@@ -0,0 +1,39 @@
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from backend.models.data_version import DataVersion
+
+
+def get_version(db: Session, user_id: int) -> int:
+    """
+    Get the current data version for a user
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        
+    Returns:
+        Version counter (0 if the user has never written anything)
+    """
+    version = db.query(DataVersion.version).filter(
+        DataVersion.user_id == user_id
+    ).scalar()
+    return version or 0
+
+
+def bump_version(db: Session, user_id: int) -> None:
+    """
+    Increment a user's data version as part of the current transaction
+    
+    Call before commit() in every endpoint that writes user data so the
+    new version becomes visible atomically with the change.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+    """
+    stmt = insert(DataVersion).values(user_id=user_id, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DataVersion.user_id],
+        set_={"version": DataVersion.version + 1}
+    )
+    db.execute(stmt)
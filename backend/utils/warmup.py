@@ -0,0 +1,64 @@
+"""
+Per-worker cache warmup
+
+Run once in each worker before it reports ready, so the first real requests
+do not pay for cold caches: the merchant normalization memo, the category
+lookup, Pydantic serializers, the FX rate table and one pooled connection
+per shard. It runs in the startup hook, so uvicorn only accepts
+connections on the worker once it has finished.
+"""
+from typing import Dict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.database import shards
+from backend.models.subscription import Subscription, SubscriptionResponse
+from backend.models.transaction import Transaction, TransactionResponse
+from backend.utils.categories import CATEGORY_CATALOG, category_for
+from backend.utils.detect_recurring import normalize_merchant
+from backend.utils.serialization import _list_adapter
+
+# Most frequent descriptors per shard fed through normalize_merchant
+WARM_DESCRIPTIONS = 5000
+
+
+def _warm_shard(index: int, db: Session) -> Dict[str, int]:
+    """Normalize/categorize the shard's most common names"""
+    descriptions = db.query(Transaction.description).group_by(
+        Transaction.description
+    ).order_by(func.count().desc()).limit(WARM_DESCRIPTIONS).all()
+    for (description,) in descriptions:
+        normalize_merchant(description)
+
+    merchants = db.query(Subscription.merchant_name).distinct().all()
+    for (merchant_name,) in merchants:
+        category_for(merchant_name)
+
+    return {"descriptions": len(descriptions), "merchants": len(merchants)}
+
+
+def warm_caches() -> Dict[str, int]:
+    """
+    Populate this process's caches ahead of traffic
+
+    Returns:
+        Counts of warmed entries
+    """
+    for keywords in CATEGORY_CATALOG.values():
+        for keyword in keywords:
+            normalize_merchant(keyword)
+            category_for(keyword)
+
+    for model in (SubscriptionResponse, TransactionResponse):
+        _list_adapter(model)
+
+    # Parses the rate file and imports NumPy ahead of the first conversion
+    from backend.utils.fx import load_fx_table
+    load_fx_table()
+
+    # Also opens (and keeps pooled) a connection per shard
+    results = shards.for_each_shard(_warm_shard)
+    return {
+        "shards": len(results),
+        "descriptions": sum(r["descriptions"] for r in results),
+        "merchants": sum(r["merchants"] for r in results),
+    }
@@ -3,26 +3,40 @@
 import { useEffect, useState } from 'react';
 import { useRouter } from 'next/navigation';
 import SubscriptionCard from '@/components/subscription-card';
-import { getSubscriptions, type Subscription } from '@/lib/api';
+import { getInsights, getSubscriptions, subscribeToEvents, type InsightTotals, type Subscription } from '@/lib/api';
 import { DollarSign, TrendingUp, Calendar, Package, Loader2, AlertCircle } from 'lucide-react';
 import { formatCurrency } from '@/lib/utils';
 
 export default function DashboardPage() {
     const router = useRouter();
     const [subscriptions, setSubscriptions] = useState<Subscription[]>([]);
+    const [totals, setTotals] = useState<InsightTotals | null>(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string>('');
 
     useEffect(() => {
         loadSubscriptions();
+        // Refresh when detection or subscription edits land (pushed, not polled)
+        return subscribeToEvents((event) => {
+            if (event.type !== 'upload') {
+                loadSubscriptions(false);
+            }
+        });
     }, []);
 
-    const loadSubscriptions = async () => {
+    const loadSubscriptions = async (showSpinner: boolean = true) => {
         try {
-            setLoading(true);
+            if (showSpinner) {
+                setLoading(true);
+            }
             setError('');
-            const data = await getSubscriptions(1, 'active');
+            // Totals come converted into one currency from the insights API
+            const [data, insights] = await Promise.all([
+                getSubscriptions(1, 'active', { sort: 'next_billing_date' }),
+                getInsights(1),
+            ]);
             setSubscriptions(data);
+            setTotals(insights);
         } catch (err: any) {
             setError(err.response?.data?.detail || err.message || 'Failed to load subscriptions');
         } finally {
@@ -35,18 +49,12 @@ export default function DashboardPage() {
     };
 
     // Calculate stats
-    const totalMonthly = subscriptions.reduce((sum, sub) => {
-        if (sub.frequency === 'monthly') return sum + sub.amount;
-        if (sub.frequency === 'yearly') return sum + sub.amount / 12;
-        if (sub.frequency === 'weekly') return sum + sub.amount * 4.33;
-        if (sub.frequency === 'bi-weekly') return sum + sub.amount * 2.17;
-        return sum;
-    }, 0);
-
-    const totalYearly = totalMonthly * 12;
+    const totalMonthly = totals?.total_monthly_cost ?? 0;
+    const totalYearly = totals?.total_yearly_cost ?? 0;
+    const currency = totals?.currency;
     const activeCount = subscriptions.filter(s => s.status === 'active').length;
 
-    // Get upcoming renewals (next 30 days)
+    // Get upcoming renewals (next 30 days); the API already sorts by next billing date
     const today = new Date();
     const thirtyDaysLater = new Date(today.getTime() + 30 * 24 * 60 * 60 * 1000);
     const upcomingRenewals = subscriptions
@@ -54,11 +62,6 @@ export default function DashboardPage() {
             if (!sub.next_billing_date) return false;
             const renewalDate = new Date(sub.next_billing_date);
             return renewalDate >= today && renewalDate <= thirtyDaysLater;
-        })
-        .sort((a, b) => {
-            const dateA = new Date(a.next_billing_date!).getTime();
-            const dateB = new Date(b.next_billing_date!).getTime();
-            return dateA - dateB;
         });
 
     if (loading) {
@@ -80,7 +83,7 @@ export default function DashboardPage() {
                     <h2 className="text-2xl font-bold text-foreground">Error Loading Dashboard</h2>
                     <p className="text-muted-foreground">{error}</p>
                     <button
-                        onClick={loadSubscriptions}
+                        onClick={() => loadSubscriptions()}
                         className="px-6 py-3 rounded-lg bg-primary text-primary-foreground font-medium hover:opacity-90 transition-opacity"
                     >
                         Try Again
@@ -142,13 +145,13 @@ export default function DashboardPage() {
                         <StatsCard
                             icon={<DollarSign className="h-6 w-6" />}
                             label="Monthly Spending"
-                            value={formatCurrency(totalMonthly)}
+                            value={formatCurrency(totalMonthly, currency)}
                             gradient="from-green-500 to-emerald-500"
                         />
                         <StatsCard
                             icon={<TrendingUp className="h-6 w-6" />}
                             label="Yearly Projection"
-                            value={formatCurrency(totalYearly)}
+                            value={formatCurrency(totalYearly, currency)}
                             gradient="from-purple-500 to-pink-500"
                         />
                         <StatsCard
@@ -181,7 +184,7 @@ export default function DashboardPage() {
                                                 </p>
                                             </div>
                                             <span className="text-lg font-bold text-foreground">
-                                                {formatCurrency(subscription.amount)}
+                                                {formatCurrency(subscription.amount, subscription.currency)}
                                             </span>
                                         </div>
                                     </div>
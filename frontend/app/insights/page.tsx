@@ -1,7 +1,7 @@
 'use client';
 
 import { useEffect, useState } from 'react';
-import { getInsights, type InsightsData } from '@/lib/api';
+import { getInsights, subscribeToEvents, type BillingEvent, type InsightsData } from '@/lib/api';
 import Chart from '@/components/chart';
 import { DollarSign, TrendingUp, CreditCard, AlertTriangle, Calendar, Loader2, AlertCircle } from 'lucide-react';
 import { formatCurrency } from '@/lib/utils';
@@ -13,11 +13,19 @@ export default function InsightsPage() {
 
     useEffect(() => {
         loadInsights();
+        // Refresh when detection or subscription edits land (pushed, not polled)
+        return subscribeToEvents((event) => {
+            if (event.type !== 'upload') {
+                loadInsights(false);
+            }
+        });
     }, []);
 
-    const loadInsights = async () => {
+    const loadInsights = async (showSpinner: boolean = true) => {
         try {
-            setLoading(true);
+            if (showSpinner) {
+                setLoading(true);
+            }
             setError('');
             const data = await getInsights();
             setInsights(data);
@@ -47,7 +55,7 @@ export default function InsightsPage() {
                     <h2 className="text-2xl font-bold text-foreground">Error Loading Insights</h2>
                     <p className="text-muted-foreground">{error}</p>
                     <button
-                        onClick={loadInsights}
+                        onClick={() => loadInsights()}
                         className="px-6 py-3 rounded-lg bg-primary text-primary-foreground font-medium hover:opacity-90 transition-opacity"
                     >
                         Try Again
@@ -95,13 +103,13 @@ export default function InsightsPage() {
                         <OverviewCard
                             icon={<DollarSign className="h-6 w-6" />}
                             label="Monthly Spending"
-                            value={formatCurrency(insights.total_monthly_cost)}
+                            value={formatCurrency(insights.total_monthly_cost, insights.currency)}
                             gradient="from-blue-500 to-cyan-500"
                         />
                         <OverviewCard
                             icon={<TrendingUp className="h-6 w-6" />}
                             label="Yearly Projection"
-                            value={formatCurrency(insights.total_yearly_cost)}
+                            value={formatCurrency(insights.total_yearly_cost, insights.currency)}
                             gradient="from-purple-500 to-pink-500"
                         />
                         <OverviewCard
@@ -113,10 +121,15 @@ export default function InsightsPage() {
                         <OverviewCard
                             icon={<TrendingUp className="h-6 w-6" />}
                             label="Avg per Subscription"
-                            value={formatCurrency(insights.average_per_subscription)}
+                            value={formatCurrency(insights.average_per_subscription, insights.currency)}
                             gradient="from-orange-500 to-red-500"
                         />
                     </div>
+                    {insights.unconverted_currencies.length > 0 && (
+                        <p className="text-sm text-muted-foreground">
+                            Totals leave out subscriptions in {insights.unconverted_currencies.join(', ')}, which have no exchange rates.
+                        </p>
+                    )}
 
                     {/* Charts Section */}
                     <div className="grid lg:grid-cols-2 gap-8">
@@ -170,7 +183,7 @@ export default function InsightsPage() {
                                 </div>
                                 <div className="text-right">
                                     <p className="text-3xl font-bold text-primary">
-                                        {formatCurrency(insights.highest_spend.amount)}
+                                        {formatCurrency(insights.highest_spend.amount, insights.highest_spend.currency)}
                                     </p>
                                     <p className="text-sm text-muted-foreground">
                                         per {insights.highest_spend.frequency}
@@ -206,7 +219,7 @@ export default function InsightsPage() {
                                         </div>
                                         <div className="text-right">
                                             <p className="text-xl font-bold text-foreground">
-                                                {formatCurrency(payment.amount)}
+                                                {formatCurrency(payment.amount, payment.currency)}
                                             </p>
                                             <p className="text-xs text-muted-foreground">
                                                 {new Date(payment.billing_date).toLocaleDateString('en-US', {
@@ -221,18 +234,53 @@ export default function InsightsPage() {
                         </div>
                     )}
 
-                    {/* Unused Subscriptions */}
-                    {insights.unused_subscriptions.length > 0 && (
+                    {/* Billing Events */}
+                    {insights.billing_events.length > 0 && (
+                        <div className="rounded-2xl border border-border bg-card p-8 space-y-4">
+                            <div className="flex items-center gap-3">
+                                <AlertCircle className="h-6 w-6 text-primary" />
+                                <h2 className="text-2xl font-semibold text-foreground">Billing Changes</h2>
+                            </div>
+                            <div className="space-y-3">
+                                {insights.billing_events.map((event, index) => (
+                                    <div
+                                        key={index}
+                                        className="flex items-center justify-between p-4 rounded-lg bg-background border border-border"
+                                    >
+                                        <div>
+                                            <h3 className="font-semibold text-foreground">{event.merchant_name}</h3>
+                                            <p className="text-sm text-muted-foreground">{describeBillingEvent(event)}</p>
+                                        </div>
+                                        <div className="text-right">
+                                            <p className="text-lg font-bold text-foreground">
+                                                {formatCurrency(event.amount, event.currency)}
+                                            </p>
+                                            <p className="text-xs text-muted-foreground">
+                                                {new Date(event.event_date).toLocaleDateString('en-US', {
+                                                    month: 'short',
+                                                    day: 'numeric',
+                                                    year: 'numeric',
+                                                })}
+                                            </p>
+                                        </div>
+                                    </div>
+                                ))}
+                            </div>
+                        </div>
+                    )}
+
+                    {/* Subscriptions that stopped charging */}
+                    {insights.lapsed_subscriptions.length > 0 && (
                         <div className="rounded-2xl border border-orange-500/20 bg-orange-500/5 p-8 space-y-4">
                             <div className="flex items-center gap-3">
                                 <AlertTriangle className="h-6 w-6 text-orange-600 dark:text-orange-400" />
-                                <h2 className="text-2xl font-semibold text-foreground">Potentially Unused Subscriptions</h2>
+                                <h2 className="text-2xl font-semibold text-foreground">Stopped Charging</h2>
                             </div>
                             <p className="text-sm text-muted-foreground">
-                                These subscriptions might not be in use. Consider reviewing or cancelling them.
+                                These subscriptions have missed their expected charges. They may already be cancelled; update their status if so.
                             </p>
                             <div className="space-y-3">
-                                {insights.unused_subscriptions.map((sub, index) => (
+                                {insights.lapsed_subscriptions.map((sub, index) => (
                                     <div
                                         key={index}
                                         className="flex items-center justify-between p-4 rounded-lg bg-background border border-border"
@@ -245,7 +293,7 @@ export default function InsightsPage() {
                                         </div>
                                         <div className="text-right">
                                             <p className="text-lg font-bold text-foreground">
-                                                {formatCurrency(sub.amount)}
+                                                {formatCurrency(sub.amount, sub.currency)}
                                             </p>
                                             <p className="text-xs text-muted-foreground capitalize">
                                                 {sub.frequency}
@@ -262,6 +310,17 @@ export default function InsightsPage() {
     );
 }
 
+function describeBillingEvent(event: BillingEvent): string {
+    switch (event.event_type) {
+        case 'price_change':
+            return `Price changed from ${formatCurrency(event.previous_amount ?? 0, event.currency)}`;
+        case 'duplicate_charge':
+            return 'Possible duplicate charge';
+        case 'missed_cycle':
+            return `No charge around ${event.expected_date ? new Date(event.expected_date).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }) : 'the expected date'}`;
+    }
+}
+
 interface OverviewCardProps {
     icon: React.ReactNode;
     label: string;
@@ -84,7 +84,7 @@ export default function Home() {
             <FeatureCard
               icon={<TrendingUp className="h-8 w-8" />}
               title="Insights & Trends"
-              description="Get actionable insights on spending trends, unused subscriptions, and savings opportunities."
+              description="Get actionable insights on spending trends, lapsed subscriptions, and savings opportunities."
               gradient="from-green-500 to-emerald-500"
             />
 
@@ -144,7 +144,7 @@ export default function SubscriptionDetailsPage() {
                                 <DetailItem
                                     icon={<DollarSign className="h-5 w-5" />}
                                     label="Amount"
-                                    value={formatCurrency(subscription.amount)}
+                                    value={formatCurrency(subscription.amount, subscription.currency)}
                                 />
                                 <DetailItem
                                     icon={<TrendingUp className="h-5 w-5" />}
@@ -225,13 +225,13 @@ export default function SubscriptionDetailsPage() {
                                         <div>
                                             <p className="text-sm text-muted-foreground">Charged Amount</p>
                                             <p className="text-xl font-bold text-foreground">
-                                                {formatCurrency(prorationResult.charged_amount)}
+                                                {formatCurrency(prorationResult.charged_amount, subscription.currency)}
                                             </p>
                                         </div>
                                         <div>
                                             <p className="text-sm text-muted-foreground">Refund Amount</p>
                                             <p className="text-xl font-bold text-green-600 dark:text-green-400">
-                                                {formatCurrency(prorationResult.refund_amount)}
+                                                {formatCurrency(prorationResult.refund_amount, subscription.currency)}
                                             </p>
                                         </div>
                                     </div>
@@ -141,6 +141,14 @@ export default function UploadPage() {
                                     <p className="text-lg text-muted-foreground">
                                         Successfully processed your transaction data
                                     </p>
+                                    {uploadResult && Object.keys(uploadResult.skipped_currencies).length > 0 && (
+                                        <p className="text-sm text-muted-foreground">
+                                            Skipped rows in unsupported currencies:{' '}
+                                            {Object.entries(uploadResult.skipped_currencies)
+                                                .map(([code, rows]) => `${code} (${rows})`)
+                                                .join(', ')}
+                                        </p>
+                                    )}
                                 </div>
                             </div>
 
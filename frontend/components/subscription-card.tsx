@@ -14,6 +14,8 @@ const frequencyColors = {
     yearly: 'bg-purple-500/10 text-purple-600 dark:text-purple-400',
     weekly: 'bg-green-500/10 text-green-600 dark:text-green-400',
     'bi-weekly': 'bg-orange-500/10 text-orange-600 dark:text-orange-400',
+    quarterly: 'bg-teal-500/10 text-teal-600 dark:text-teal-400',
+    'semi-annual': 'bg-pink-500/10 text-pink-600 dark:text-pink-400',
 };
 
 const statusColors = {
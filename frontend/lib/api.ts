@@ -16,6 +16,7 @@ export interface Transaction {
     date: string;
     description: string;
     amount: number;
+    currency: string;
     user_id: number;
 }
 
@@ -23,17 +24,29 @@ export interface Subscription {
     id: number;
     merchant_name: string;
     amount: number;
+    currency: string;
     frequency: string;
     start_date: string;
     next_billing_date: string | null;
     status: string;
     user_id: number;
+    monthly_cost: number;
+}
+
+export interface SubscriptionListOptions {
+    sort?: 'monthly_cost' | 'next_billing_date' | 'merchant_name';
+    order?: 'asc' | 'desc';
+    limit?: number;
+    cursor?: string;
+    fields?: (keyof Subscription)[];
 }
 
 export interface UploadResponse {
     status: string;
     message: string;
     transaction_count: number;
+    // Rows skipped per currency missing from the FX rate table
+    skipped_currencies: Record<string, number>;
     filename: string;
 }
 
@@ -44,6 +57,16 @@ export interface DetectResponse {
     subscriptions: any[];
 }
 
+export interface BillingEvent {
+    merchant_name: string;
+    event_type: 'price_change' | 'duplicate_charge' | 'missed_cycle';
+    event_date: string;
+    amount: number;
+    previous_amount: number | null;
+    currency: string;
+    expected_date: string | null;
+}
+
 export interface InsightsData {
     total_monthly_cost: number;
     total_yearly_cost: number;
@@ -52,13 +75,81 @@ export interface InsightsData {
         id: number;
         merchant_name: string;
         amount: number;
+        currency: string;
         frequency: string;
+        monthly_cost: number;
     } | null;
-    unused_subscriptions: any[];
+    // Active subscriptions that have missed billing cycles (likely cancelled)
+    lapsed_subscriptions: any[];
     predicted_upcoming_payments: any[];
     category_breakdown: { category: string; amount: number }[];
     spending_trend: { month: string; amount: number }[];
+    billing_events: BillingEvent[];
+    average_per_subscription: number;
+    currency: string;
+    unconverted_currencies: string[];
+}
+
+export interface ForecastScenario {
+    name?: string;
+    cancel: number[];
+}
+
+export interface ForecastProjection {
+    name: string;
+    cancelled: number[];
+    monthly: number[];
+    total: number;
+    savings: number;
+    total_monthly_cost: number;
+    total_yearly_cost: number;
+    annual_savings: number;
     average_per_subscription: number;
+    currency: string;
+}
+
+export type SubscriptionOperation =
+    | { op: 'create'; subscription: Omit<Subscription, 'id' | 'monthly_cost'> }
+    | { op: 'update'; id: number; changes: Partial<Omit<Subscription, 'id' | 'user_id' | 'monthly_cost'>> }
+    | { op: 'delete'; id: number };
+
+export interface BatchResult {
+    index: number;
+    op: SubscriptionOperation['op'];
+    id: number;
+    status: 'created' | 'updated' | 'deleted';
+    subscription?: Subscription;
+}
+
+export interface BatchResponse {
+    status: string;
+    created_count: number;
+    updated_count: number;
+    deleted_count: number;
+    results: BatchResult[];
+}
+
+export interface InsightTotals {
+    subscription_count: number;
+    total_monthly_cost: number;
+    total_yearly_cost: number;
+    currency: string;
+}
+
+export type ChangeEventType = 'upload' | 'detection' | 'subscriptions' | 'resync';
+
+export interface ChangeEvent {
+    type: ChangeEventType;
+    data: Record<string, any> & { insights?: InsightTotals };
+}
+
+export interface ForecastData {
+    start: string;
+    months: string[];
+    baseline: ForecastProjection;
+    scenarios: ForecastProjection[];
+    currency: string;
+    unconverted_currencies: string[];
 }
 
 // API Functions
@@ -90,9 +181,18 @@ export async function getTransactions(userId: number = 1): Promise<Transaction[]
 /**
  * Get all subscriptions
  */
-export async function getSubscriptions(userId: number = 1, status?: string): Promise<Subscription[]> {
+export async function getSubscriptions(
+    userId: number = 1,
+    status?: string,
+    options: SubscriptionListOptions = {}
+): Promise<Subscription[]> {
     const params = new URLSearchParams({ user_id: String(userId) });
     if (status) params.append('status', status);
+    if (options.sort) params.append('sort', options.sort);
+    if (options.order) params.append('order', options.order);
+    if (options.limit) params.append('limit', String(options.limit));
+    if (options.cursor) params.append('cursor', options.cursor);
+    if (options.fields) params.append('fields', options.fields.join(','));
 
     const response = await api.get(`/api/subscriptions?${params.toString()}`);
     return response.data;
@@ -101,8 +201,8 @@ export async function getSubscriptions(userId: number = 1, status?: string): Pro
 /**
  * Get single subscription by ID
  */
-export async function getSubscription(subscriptionId: number): Promise<Subscription> {
-    const response = await api.get(`/api/subscriptions/${subscriptionId}`);
+export async function getSubscription(subscriptionId: number, userId: number = 1): Promise<Subscription> {
+    const response = await api.get(`/api/subscriptions/${subscriptionId}?user_id=${userId}`);
     return response.data;
 }
 
@@ -115,10 +215,29 @@ export async function detectSubscriptions(userId: number = 1): Promise<DetectRes
 }
 
 /**
- * Get insights data
+ * Get insights data, with totals in the given display currency
  */
-export async function getInsights(userId: number = 1): Promise<InsightsData> {
-    const response = await api.get(`/api/insights?user_id=${userId}`);
+export async function getInsights(userId: number = 1, currency?: string): Promise<InsightsData> {
+    const params = new URLSearchParams({ user_id: String(userId) });
+    if (currency) params.append('currency', currency);
+
+    const response = await api.get(`/api/insights?${params.toString()}`);
+    return response.data;
+}
+
+/**
+ * Forecast spending, optionally for cancellation scenarios, in the given currency
+ */
+export async function getForecast(
+    scenarios: ForecastScenario[] = [],
+    months: number = 12,
+    userId: number = 1,
+    currency?: string
+): Promise<ForecastData> {
+    const params = new URLSearchParams({ user_id: String(userId) });
+    if (currency) params.append('currency', currency);
+
+    const response = await api.post(`/api/insights/forecast?${params.toString()}`, { scenarios, months });
     return response.data;
 }
 
@@ -127,17 +246,32 @@ export async function getInsights(userId: number = 1): Promise<InsightsData> {
  */
 export async function updateSubscription(
     subscriptionId: number,
-    data: Partial<Subscription>
+    data: Partial<Subscription>,
+    userId: number = 1
 ): Promise<Subscription> {
-    const response = await api.put(`/api/subscriptions/${subscriptionId}`, data);
+    const response = await api.put(`/api/subscriptions/${subscriptionId}?user_id=${userId}`, data);
     return response.data;
 }
 
 /**
  * Delete subscription
  */
-export async function deleteSubscription(subscriptionId: number): Promise<{ status: string; message: string }> {
-    const response = await api.delete(`/api/subscriptions/${subscriptionId}`);
+export async function deleteSubscription(
+    subscriptionId: number,
+    userId: number = 1
+): Promise<{ status: string; message: string }> {
+    const response = await api.delete(`/api/subscriptions/${subscriptionId}?user_id=${userId}`);
+    return response.data;
+}
+
+/**
+ * Apply several creates, updates and deletes in one request (all or nothing)
+ */
+export async function batchSubscriptions(
+    operations: SubscriptionOperation[],
+    userId: number = 1
+): Promise<BatchResponse> {
+    const response = await api.post(`/api/subscriptions/batch?user_id=${userId}`, { operations });
     return response.data;
 }
 
@@ -146,12 +280,32 @@ export async function deleteSubscription(subscriptionId: number): Promise<{ stat
  */
 export async function calculateProration(
     subscriptionId: number,
-    cancellationDate: string
+    cancellationDate: string,
+    userId: number = 1
 ): Promise<any> {
-    const response = await api.post(`/api/subscriptions/${subscriptionId}/prorate`, {
+    const response = await api.post(`/api/subscriptions/${subscriptionId}/prorate?user_id=${userId}`, {
         cancellation_date: cancellationDate,
     });
     return response.data;
 }
 
+/**
+ * Listen for the user's change events (upload progress, detection finished,
+ * subscription changes) instead of polling. Returns a function that closes
+ * the stream; the browser reconnects automatically on network errors.
+ */
+export function subscribeToEvents(
+    onEvent: (event: ChangeEvent) => void,
+    userId: number = 1
+): () => void {
+    const source = new EventSource(`${API_BASE_URL}/api/events?user_id=${userId}`);
+    const types: ChangeEventType[] = ['upload', 'detection', 'subscriptions', 'resync'];
+    for (const type of types) {
+        source.addEventListener(type, (message) => {
+            onEvent({ type, data: JSON.parse((message as MessageEvent).data) });
+        });
+    }
+    return () => source.close();
+}
+
 export default api;